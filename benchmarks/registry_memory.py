@@ -0,0 +1,82 @@
+"""Measures the memory held by a registry snapshot loaded into definition objects.
+
+Builds the dicts of a synthetic namespace, loads them with
+``FeatureBundle.from_dict`` and reports the memory retained per feature:
+
+    python -m benchmarks.registry_memory --bundles 1000 --features 100
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from glacius import FeatureBundle
+
+
+def namespace_dicts(num_bundles: int, features_per_bundle: int):
+    windows = [1, 7, 30, 90]
+    categories = ["books", "games", "music", "movies", "toys"]
+    bundles = []
+    for b in range(num_bundles):
+        features = []
+        for f in range(features_per_bundle):
+            category = categories[f % len(categories)]
+            window = windows[(f // len(categories)) % len(windows)]
+            features.append(
+                {
+                    "name": f"bundle_{b}_clicks_{category}_{window}d_{f}",
+                    "description": "",
+                    "expr_sql": f"CASE WHEN `category` = '{category}' "
+                    "THEN `clicks` ELSE 0 END",
+                    "dtype": "INT64",
+                    "agg": {"method": "SUM", "window": window * 24 * 3600},
+                }
+            )
+        bundles.append(
+            {
+                "name": f"bundle_{b}",
+                "description": "",
+                "source": {
+                    "name": f"events_{b}",
+                    "description": "",
+                    "timestamp_col": "timestamp",
+                    "uri": f"s3://bucket/events_{b}",
+                    "file_type": "PARQUET",
+                    "source_type": "FILE",
+                    "query": None,
+                },
+                "features": features,
+                "entity": {"keys": ["user_id"]},
+            }
+        )
+    return bundles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bundles", type=int, default=1000)
+    parser.add_argument("--features", type=int, default=100)
+    args = parser.parse_args()
+
+    dicts = namespace_dicts(args.bundles, args.features)
+    num_features = args.bundles * args.features
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    bundles = [FeatureBundle.from_dict(d) for d in dicts]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"features:          {num_features}")
+    print(f"load time:         {elapsed:.2f} s")
+    print(f"retained:          {retained / 2**20:.1f} MiB")
+    print(f"peak:              {peak / 2**20:.1f} MiB")
+    print(f"bytes per feature: {retained / num_features:.0f}")
+    assert len(bundles) == args.bundles
+
+
+if __name__ == "__main__":
+    main()
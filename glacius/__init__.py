@@ -20,7 +20,21 @@ from glacius.dtypes import (
 )
 from glacius.feature import Feature
 from glacius.feature_bundle import FeatureBundle
+from glacius.feature_template import FeatureTemplate
 from glacius.job import Job
-from glacius.dsl import when, and_, or_, concat, date_diff, add, sub, mul, div, col
+from glacius.dsl import (
+    when,
+    and_,
+    or_,
+    concat,
+    date_diff,
+    add,
+    sub,
+    mul,
+    div,
+    col,
+    param,
+)
 from glacius.client import Client
+from glacius.async_client import AsyncClient
 from glacius.entity import Entity
@@ -1,6 +1,8 @@
 from datetime import timedelta
 from enum import Enum
 
+from glacius.slots import slot_items
+
 
 class AggregationType(Enum):
     """
@@ -24,6 +26,8 @@ class Aggregation:
         _window (timedelta): The time window for which the aggregation is computed.
     """
 
+    __slots__ = ("_method", "_window")
+
     _method: AggregationType
     _window: timedelta
 
@@ -52,7 +56,7 @@ class Aggregation:
         return self._window
 
     def __repr__(self) -> str:
-        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        items = (f"{k} = {v}" for k, v in slot_items(self))
         return f"<{self.__class__.__name__}({', '.join(items)})>"
 
     def to_dict(self) -> dict:
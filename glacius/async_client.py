@@ -0,0 +1,227 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from glacius.batching import AsyncOnlineRequestBatcher
+from glacius.client import (
+    GLACIUS_ONLINE_URL,
+    ONLINE_STORE_PATH,
+    online_features_payload,
+)
+from glacius.dtypes import DataType
+from glacius.online_cache import OnlineFeatureCache, merge_responses
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """asyncio-native client for online feature retrieval.
+
+    All calls share one pooled aiohttp session, so connections (and their TLS
+    handshakes) are reused across requests. The client is safe to use from many
+    concurrent coroutines on the same event loop; at most ``max_connections``
+    requests are in flight at once and the rest wait for a free connection.
+
+    Example:
+        async with AsyncClient(api_key="***", namespace="production") as client:
+            features = await client.get_online_features(
+                feature_names=["total_clicks_7d"], entity_ids=["user_id:1"]
+            )
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        namespace: str,
+        *,
+        max_connections: int = 100,
+        keepalive_timeout: float = 30.0,
+        timeout: Optional[float] = 1.0,
+        online_url: str = GLACIUS_ONLINE_URL,
+        online_cache: Optional[OnlineFeatureCache] = None,
+        batch_window: Optional[float] = None,
+        max_batch_size: int = 256,
+    ):
+        """Generates an async glacius client instance
+
+        Args:
+            api_key (str): API key
+            namespace (str): The namespace
+            max_connections (int): Size of the connection pool.
+            keepalive_timeout (float): Seconds an idle connection is kept open.
+            timeout (float, optional): Default deadline in seconds for a call,
+                including the wait for a pooled connection. None disables it.
+            online_url (str): Base url of the online store.
+            online_cache (OnlineFeatureCache, optional): Serves repeated lookups
+                from memory.
+            batch_window (float, optional): If set, lookups from concurrent
+                coroutines made within this many seconds are coalesced into a
+                single request.
+            max_batch_size (int): Distinct entity ids that flush a batch early.
+        """
+        self._api_key = api_key
+        self._namespace = namespace
+        self._max_connections = max_connections
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = timeout
+        self._online_url = online_url
+        self._online_cache = online_cache
+        self._batcher = (
+            AsyncOnlineRequestBatcher(
+                self._post_online_features, batch_window, max_batch_size
+            )
+            if batch_window is not None
+            else None
+        )
+        self._session = None
+
+    @property
+    def api_key(self):
+        return self._api_key
+
+    @property
+    def namespace(self):
+        return self._namespace
+
+    @property
+    def online_cache(self) -> Optional[OnlineFeatureCache]:
+        return self._online_cache
+
+    def _get_session(self):
+        # Runs without awaiting, so concurrent coroutines can't create two sessions.
+        if self._session is None or self._session.closed:
+            try:
+                import aiohttp
+            except ImportError as e:
+                raise ImportError(
+                    "AsyncClient requires aiohttp: pip install 'glacius[async]'"
+                ) from e
+
+            connector = aiohttp.TCPConnector(
+                limit=self._max_connections,
+                limit_per_host=self._max_connections,
+                keepalive_timeout=self._keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers={"X-API-Key": self.api_key}
+            )
+        return self._session
+
+    async def get_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        timeout: Optional[float] = None,
+        as_matrix: bool = False,
+        dtypes: Optional[Dict[str, DataType]] = None,
+        default: Optional[Any] = None,
+    ):
+        """Looks up online features. Same request and response as
+        ``Client.get_online_features``.
+
+        Args:
+            feature_names (List[str]): The features to fetch.
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            timeout (float, optional): Deadline in seconds for this call, overriding
+                the client default.
+            as_matrix (bool): Return an OnlineFeatureMatrix (entities x features
+                numpy matrix in request order) instead of the decoded JSON.
+            dtypes (Dict[str, DataType], optional): Feature name to Feature.dtype,
+                picks the matrix dtype.
+            default (Any, optional): Matrix value of missing features.
+
+        Returns:
+            The decoded response, an OnlineFeatureMatrix, or None if the online
+            store returned an error.
+
+        Raises:
+            asyncio.TimeoutError: If the deadline is exceeded.
+        """
+        if not as_matrix:
+            return await self._get_online_features(feature_names, entity_ids, timeout)
+
+        from glacius.online_matrix import decode_online_matrix
+
+        if self._online_cache is None and self._batcher is None:
+            # Decode the raw body straight into the matrix.
+            response = await self._post_online_features(
+                feature_names, entity_ids, timeout, raw=True
+            )
+        else:
+            response = await self._get_online_features(
+                feature_names, entity_ids, timeout
+            )
+        if response is None:
+            return None
+        return decode_online_matrix(
+            response, feature_names, entity_ids, dtypes, default
+        )
+
+    async def _get_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        timeout: Optional[float],
+    ):
+        if self._online_cache is None:
+            return await self._fetch_online_features(feature_names, entity_ids, timeout)
+
+        cached, entity_ids, feature_names = self._online_cache.lookup(
+            self.namespace, feature_names, entity_ids
+        )
+        if not entity_ids:
+            return cached
+
+        fetched = await self._fetch_online_features(feature_names, entity_ids, timeout)
+        if fetched is None:
+            return None
+        self._online_cache.put_response(self.namespace, fetched)
+        return merge_responses(cached, fetched)
+
+    async def _fetch_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        timeout: Optional[float],
+    ):
+        if self._batcher is None:
+            return await self._post_online_features(feature_names, entity_ids, timeout)
+
+        deadline = self._timeout if timeout is None else timeout
+        return await asyncio.wait_for(
+            self._batcher.get_online_features(feature_names, entity_ids), deadline
+        )
+
+    async def _post_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        timeout: Optional[float] = None,
+        raw: bool = False,
+    ):
+        session = self._get_session()
+        payload = online_features_payload(self.namespace, feature_names, entity_ids)
+        deadline = self._timeout if timeout is None else timeout
+
+        async def post():
+            async with session.post(
+                f"{self._online_url}{ONLINE_STORE_PATH}", json=payload
+            ) as response:
+                if response.status == 200:
+                    return await (response.read() if raw else response.json())
+                logger.error(f"Failed to get online features: {response.status}")
+                return None
+
+        return await asyncio.wait_for(post(), deadline)
+
+    async def close(self):
+        """Closes the pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
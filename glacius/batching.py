@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+OnlineResponse = Dict[str, Dict[str, Any]]
+
+
+class _Batch:
+    """Online requests collected during one batching window."""
+
+    def __init__(self):
+        self.entity_ids: Dict[str, None] = {}
+        self.feature_names: Dict[str, None] = {}
+        self.closed = False
+        self.done = threading.Event()
+        self.future: Optional["asyncio.Future"] = None
+        self.result: Optional[OnlineResponse] = None
+        self.error: Optional[BaseException] = None
+
+    def add(self, feature_names: List[str], entity_ids: List[str]) -> None:
+        self.feature_names.update(dict.fromkeys(feature_names))
+        self.entity_ids.update(dict.fromkeys(entity_ids))
+
+
+def split_response(
+    response: Optional[OnlineResponse],
+    feature_names: List[str],
+    entity_ids: List[str],
+) -> Optional[OnlineResponse]:
+    """Extracts one caller's entities and features from a merged response."""
+    if response is None:
+        return None
+    result = {}
+    for entity_id in entity_ids:
+        values = response.get(entity_id)
+        if values is not None:
+            result[entity_id] = {
+                name: values[name] for name in feature_names if name in values
+            }
+    return result
+
+
+class OnlineRequestBatcher:
+    """Coalesces concurrent online lookups from many threads into one request.
+
+    The first caller of a window waits up to ``max_wait`` seconds (or until the
+    batch holds ``max_batch_size`` distinct entity ids) for other callers to join,
+    then sends a single request with the deduplicated entity ids and feature names
+    and hands every caller its own slice of the response.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], List[str]], Optional[OnlineResponse]],
+        max_wait: float = 0.002,
+        max_batch_size: int = 256,
+    ):
+        """Initializes an OnlineRequestBatcher.
+
+        Args:
+            fetch (Callable): Sends one online request given (feature_names,
+                entity_ids) and returns the decoded response.
+            max_wait (float): Seconds the first caller waits for others to join.
+            max_batch_size (int): Distinct entity ids that flush a batch early.
+        """
+        self._fetch = fetch
+        self._max_wait = max_wait
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Condition()
+        self._batch: Optional[_Batch] = None
+
+    def get_online_features(
+        self, feature_names: List[str], entity_ids: List[str]
+    ) -> Optional[OnlineResponse]:
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            batch.add(feature_names, entity_ids)
+            if len(batch.entity_ids) >= self._max_batch_size:
+                self._close(batch)
+                self._lock.notify_all()
+            elif leader:
+                self._lock.wait_for(lambda: batch.closed, self._max_wait)
+                self._close(batch)
+
+        if leader:
+            try:
+                batch.result = self._fetch(
+                    list(batch.feature_names), list(batch.entity_ids)
+                )
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return split_response(batch.result, feature_names, entity_ids)
+
+    def _close(self, batch: _Batch) -> None:
+        batch.closed = True
+        if self._batch is batch:
+            self._batch = None
+
+
+class AsyncOnlineRequestBatcher:
+    """asyncio counterpart of OnlineRequestBatcher for concurrent coroutines."""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], List[str]], Awaitable[Optional[OnlineResponse]]],
+        max_wait: float = 0.002,
+        max_batch_size: int = 256,
+    ):
+        self._fetch = fetch
+        self._max_wait = max_wait
+        self._max_batch_size = max_batch_size
+        self._batch: Optional[_Batch] = None
+
+    async def get_online_features(
+        self, feature_names: List[str], entity_ids: List[str]
+    ) -> Optional[OnlineResponse]:
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch()
+            loop = asyncio.get_running_loop()
+            batch.future = loop.create_future()
+            loop.call_later(self._max_wait, self._flush, batch)
+        batch.add(feature_names, entity_ids)
+        if len(batch.entity_ids) >= self._max_batch_size:
+            self._flush(batch)
+
+        # Shielded so a caller giving up doesn't cancel the request of the others.
+        response = await asyncio.shield(batch.future)
+        return split_response(response, feature_names, entity_ids)
+
+    def _flush(self, batch: _Batch) -> None:
+        if batch.closed:
+            return
+        batch.closed = True
+        if self._batch is batch:
+            self._batch = None
+        flushed = batch.future
+        task = asyncio.ensure_future(
+            self._fetch(list(batch.feature_names), list(batch.entity_ids))
+        )
+
+        def resolve(task: "asyncio.Task") -> None:
+            if task.cancelled():
+                flushed.cancel()
+            elif task.exception() is not None:
+                flushed.set_exception(task.exception())
+            else:
+                flushed.set_result(task.result())
+
+        task.add_done_callback(resolve)
@@ -1,34 +1,102 @@
 import logging
-from typing import List, Optional
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 import requests
 from requests.exceptions import HTTPError
 
 from glacius import FeatureBundle, Job
+from glacius.batching import OnlineRequestBatcher
 from glacius.data_sources.source import DataSource
+from glacius.disk_cache import read_json, write_json
+from glacius.dtypes import DataType
+from glacius.hash_utils import sha256_hash_str
 from glacius.job import JobStatus, JobType, Runtime, ComputeTier
+from glacius.online_cache import OnlineFeatureCache, merge_responses
+from glacius.payloads import post_json
+from glacius.registration import Manifest, RegistrationDiff, manifest_identifier
+from glacius.registry_snapshot import RegistrySnapshot
 
 logger = logging.getLogger(__name__)
 
 API_URL = "https://app.glacius.ai"
 GLACIUS_ONLINE_URL = "https://online.glacius.ai"
+ONLINE_STORE_PATH = "/online-store"
+
+
+def online_features_payload(
+    namespace: str, feature_names: List[str], entity_ids: List[str]
+) -> dict:
+    """Request body of an online store lookup, shared by Client and AsyncClient."""
+    return {
+        "namespace": namespace,
+        "feature_names": feature_names,
+        "entity_ids": entity_ids,
+    }
+
 
 class Client:
     def __init__(
         self,
         api_key: str,
         namespace: str,
+        online_cache: Optional[OnlineFeatureCache] = None,
+        batch_window: Optional[float] = None,
+        max_batch_size: int = 256,
+        workspace: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        workspace_cache_ttl: float = 24 * 3600,
+        registry_revalidate_after: float = 60,
+        payload_encoding: Optional[str] = "gzip",
     ):
         """Generates a glacius client instance
 
+        The workspace is resolved from the API key on first use, so creating a client
+        (e.g. to define features) makes no network calls.
+
         Args:
             api_key (str): API key
             namespace (str): The namespace
+            online_cache (OnlineFeatureCache, optional): Serves repeated online
+                lookups from memory.
+            batch_window (float, optional): If set, concurrent online lookups from
+                different threads made within this many seconds are coalesced
+                into a single request.
+            max_batch_size (int): Distinct entity ids that flush a batch early.
+            workspace (str, optional): The workspace of the API key, skips resolving
+                it.
+            cache_dir (str, optional): Enables on-disk caching under this directory,
+                e.g. ``glacius.disk_cache.default_cache_dir()``. The resolved
+                workspace is cached per API key (by hash, never in clear text) and
+                registry snapshots are stored there, see pull_registry.
+            workspace_cache_ttl (float): Seconds a cached workspace stays valid.
+            registry_revalidate_after (float): Seconds after which a pulled "latest"
+                registry snapshot is revalidated with its ETag before resolving
+                feature names from it. Registering expires it right away.
+            payload_encoding (str, optional): Content encoding of the streamed
+                register and job request bodies: "gzip", "zstd" or None.
         """
         self._api_key = api_key
         self._namespace = namespace
         self._api_key = api_key
-        self._workspace = self._get_workspace_from_key(api_key)
+        self._online_cache = online_cache
+        self._batcher = (
+            OnlineRequestBatcher(
+                self._post_online_features, batch_window, max_batch_size
+            )
+            if batch_window is not None
+            else None
+        )
+        self._workspace = workspace
+        self._workspace_lock = threading.Lock()
+        self._cache_dir = cache_dir
+        self._workspace_cache_ttl = workspace_cache_ttl
+        self._snapshots: Dict[str, RegistrySnapshot] = {}
+        self._registry_revalidate_after = registry_revalidate_after
+        self._payload_encoding = payload_encoding
 
     @property
     def api_key(self):
@@ -40,8 +108,41 @@ class Client:
 
     @property
     def workspace(self):
+        if self._workspace is None:
+            with self._workspace_lock:
+                if self._workspace is None:
+                    self._workspace = self._resolve_workspace()
         return self._workspace
 
+    @property
+    def cache_dir(self) -> Optional[str]:
+        return self._cache_dir
+
+    def _resolve_workspace(self):
+        if self._cache_dir is None:
+            return self._get_workspace_from_key(self.api_key)
+
+        path = os.path.join(
+            self._cache_dir, "workspaces", f"{sha256_hash_str(self.api_key)}.json"
+        )
+        cached = read_json(path)
+        if cached is not None and cached.get("expires_at", 0) > time.time():
+            return cached["workspace"]
+
+        workspace = self._get_workspace_from_key(self.api_key)
+        write_json(
+            path,
+            {
+                "workspace": workspace,
+                "expires_at": time.time() + self._workspace_cache_ttl,
+            },
+        )
+        return workspace
+
+    @property
+    def online_cache(self) -> Optional[OnlineFeatureCache]:
+        return self._online_cache
+
     @property
     def stub(self):
         return self._stub
@@ -61,19 +162,76 @@ class Client:
             logging.error(f"Error during requests call: {e}")
             raise
 
-    def get_online_features(self, feature_names: List[str], entity_ids: List[str]):
+    def get_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        as_matrix: bool = False,
+        dtypes: Optional[Dict[str, DataType]] = None,
+        default: Optional[Any] = None,
+    ):
+        """Looks up the latest feature values of entities in the online store.
+
+        Args:
+            feature_names (List[str]): The features to fetch.
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            as_matrix (bool): Return an OnlineFeatureMatrix (entities x features
+                numpy matrix in request order) instead of the decoded JSON.
+            dtypes (Dict[str, DataType], optional): Feature name to Feature.dtype,
+                picks the matrix dtype.
+            default (Any, optional): Matrix value of missing features.
+
+        Returns:
+            The online store response, an OnlineFeatureMatrix, or None on errors.
+        """
+        if not as_matrix:
+            return self._get_online_features(feature_names, entity_ids)
+
+        from glacius.online_matrix import decode_online_matrix
+
+        if self._online_cache is None and self._batcher is None:
+            # Decode the raw body straight into the matrix.
+            response = self._post_online_features(feature_names, entity_ids, raw=True)
+        else:
+            response = self._get_online_features(feature_names, entity_ids)
+        if response is None:
+            return None
+        return decode_online_matrix(
+            response, feature_names, entity_ids, dtypes, default
+        )
+
+    def _get_online_features(self, feature_names: List[str], entity_ids: List[str]):
+        if self._online_cache is None:
+            return self._fetch_online_features(feature_names, entity_ids)
+
+        cached, entity_ids, feature_names = self._online_cache.lookup(
+            self.namespace, feature_names, entity_ids
+        )
+        if not entity_ids:
+            return cached
+
+        fetched = self._fetch_online_features(feature_names, entity_ids)
+        if fetched is None:
+            return None
+        self._online_cache.put_response(self.namespace, fetched)
+        return merge_responses(cached, fetched)
+
+    def _fetch_online_features(self, feature_names: List[str], entity_ids: List[str]):
+        if self._batcher is not None:
+            return self._batcher.get_online_features(feature_names, entity_ids)
+        return self._post_online_features(feature_names, entity_ids)
+
+    def _post_online_features(
+        self, feature_names: List[str], entity_ids: List[str], raw: bool = False
+    ):
         try:
             headers = {"X-API-Key": self.api_key}
-            online_features_api = f"{GLACIUS_ONLINE_URL}/online-store"
-            payload = {
-                "namespace": self.namespace,
-                "feature_names": feature_names,
-                "entity_ids": entity_ids,
-            }
+            online_features_api = f"{GLACIUS_ONLINE_URL}{ONLINE_STORE_PATH}"
+            payload = online_features_payload(self.namespace, feature_names, entity_ids)
 
             response = requests.post(online_features_api, json=payload, headers=headers)
             if response.status_code == 200:
-                return response.json()
+                return response.content if raw else response.json()
             else:
                 logger.exception(
                     f"Failed to get online features: {response.status_code}"
@@ -83,16 +241,118 @@ class Client:
         except Exception as e:
             pass
 
+    def pull_registry(self, namespace_version: str = "latest") -> RegistrySnapshot:
+        """Pulls a namespace version into a local registry snapshot.
+
+        Afterwards feature names of that version are resolved locally by
+        get_offline_features and materialize_features. With a cache_dir the snapshot
+        is also stored on disk: pinned versions are then never fetched again and
+        "latest" is revalidated with its ETag, downloading bundles only if the
+        namespace changed.
+
+        Args:
+            namespace_version (str): The version to pull.
+
+        Returns:
+            RegistrySnapshot: The snapshot.
+        """
+        path = self._snapshot_path(namespace_version)
+        snapshot = self._snapshots.get(namespace_version)
+        if snapshot is None and path is not None:
+            snapshot = RegistrySnapshot.load(path)
+        if snapshot is not None and namespace_version != "latest":
+            self._snapshots[namespace_version] = snapshot
+            return snapshot
+
+        headers = {"X-API-Key": self.api_key}
+        if snapshot is not None and snapshot.etag:
+            headers["If-None-Match"] = snapshot.etag
+        response = requests.get(
+            f"{API_URL}/namespace/{self.namespace}/{namespace_version}/feature-bundles",
+            headers=headers,
+        )
+        if response.status_code == 304:
+            snapshot.fetched_at = time.time()
+        else:
+            response.raise_for_status()
+            snapshot = RegistrySnapshot(
+                namespace=self.namespace,
+                namespace_version=namespace_version,
+                feature_bundles=response.json().get("feature_bundles"),
+                etag=response.headers.get("ETag"),
+            )
+
+        if path is not None:
+            snapshot.save(path)
+        self._snapshots[namespace_version] = snapshot
+        return snapshot
+
+    def _snapshot_path(self, namespace_version: str) -> Optional[str]:
+        if self._cache_dir is None:
+            return None
+        return os.path.join(
+            self._cache_dir, "registry", self.namespace, f"{namespace_version}.json"
+        )
+
+    def _resolve_feature_bundles(
+        self, feature_names: List[str], namespace_version: str
+    ) -> List[dict]:
+        """Resolves feature names into bundle dicts, locally if the version has a
+        snapshot (see pull_registry). A "latest" snapshot is revalidated once it
+        is older than registry_revalidate_after."""
+        snapshot = self._snapshots.get(namespace_version)
+        if namespace_version == "latest":
+            age = time.time() - snapshot.fetched_at if snapshot else 0
+            if age > self._registry_revalidate_after:
+                snapshot = self.pull_registry(namespace_version)
+        elif snapshot is None:
+            path = self._snapshot_path(namespace_version)
+            snapshot = RegistrySnapshot.load(path) if path else None
+            if snapshot is not None:
+                self._snapshots[namespace_version] = snapshot
+        if snapshot is not None:
+            return snapshot.resolve(feature_names)
+
+        headers = {"X-API-Key": self.api_key}
+        request_body = {"feature_names": feature_names}
+        features_api_url = (
+            f"{API_URL}/namespace/{self.namespace}/{namespace_version}/filter-server"
+        )
+        response = requests.post(features_api_url, json=request_body, headers=headers)
+        response.raise_for_status()
+        return response.json().get("feature_bundles")
+
     def get_offline_features(
         self,
         labels_datasource: DataSource,
         output_path: str,
         compute_tier: str = "M",
         namespace_version: str = "latest",
-        num_workers: int = 8,
+        num_workers: Optional[int] = None,
         feature_names: Optional[List[str]] = None,
         feature_bundles: Optional[List[FeatureBundle]] = None,
+        runtime: str = "EMR",
     ):
+        """Computes point-in-time correct features for every row of the labels.
+
+        Args:
+            labels_datasource (DataSource): The label spine.
+            output_path (str): Where the resulting dataset is written.
+            compute_tier (str): Cluster size for remote runtimes.
+            namespace_version (str): Registry version to pull feature_names from.
+            num_workers (int, optional): Number of workers, 8 for remote runtimes
+                by default. Local runs are single-process by default; with more
+                workers they use a process pool of at most one worker per CPU,
+                partitioned by entity.
+            feature_names (List[str], optional): Features to pull from the registry.
+            feature_bundles (List[FeatureBundle], optional): Ad hoc bundles. Remote
+                jobs get their templates expanded into plain features.
+            runtime (str): "EMR" submits a job. "LOCAL" runs the join in-process on
+                FileSource data and writes output_path in the labels' file type.
+
+        Returns:
+            Job: The submitted job, or an already finished job for local runs.
+        """
         try:
             if feature_names and feature_bundles:
                 raise ValueError(
@@ -100,38 +360,39 @@ class Client:
                 )
 
             namespace = self.namespace
-            runtime = "EMR"
             headers = {"X-API-Key": self.api_key}
 
             if feature_names:
-                request_body = {"feature_names": feature_names}
-
-
-                features_api_url = (
-                    f"{API_URL}/namespace/{namespace}/{namespace_version}/filter-server"
-                )
-                response = requests.post(
-                    features_api_url, json=request_body, headers=headers
-                )
-
-                response.raise_for_status()
-                response_deser = response.json()
-
                 inputs = {
                     "labels_datasource": labels_datasource.to_dict(),
-                    "feature_bundles": [
-                        bundle_dict
-                        for bundle_dict in response_deser.get("feature_bundles")
-                    ],
+                    "feature_bundles": self._resolve_feature_bundles(
+                        feature_names, namespace_version
+                    ),
                     "output_path": output_path,
                 }
             else:
                 inputs = {
                     "labels_datasource": labels_datasource.to_dict(),
-                    "feature_bundles": [fb.to_dict() for fb in feature_bundles],
+                    "feature_bundles": [
+                        fb.expanded().to_dict() for fb in feature_bundles
+                    ],
                     "output_path": output_path,
                 }
 
+            if Runtime(runtime) == Runtime.LOCAL:
+                if not feature_bundles:
+                    feature_bundles = [
+                        FeatureBundle.from_dict(bundle_dict)
+                        for bundle_dict in inputs["feature_bundles"]
+                    ]
+                return self._run_local_offline_job(
+                    inputs,
+                    labels_datasource,
+                    feature_bundles,
+                    namespace_version,
+                    num_workers,
+                )
+
             job = Job(
                 namespace=namespace,
                 provider_region="us-east-1",
@@ -141,7 +402,7 @@ class Client:
                 inputs=inputs,
                 job_type=JobType.OFFLINE_FEATURES_COMPUTATION,
                 compute_tier=ComputeTier[compute_tier],
-                num_workers=num_workers,
+                num_workers=num_workers or 8,
                 workspace=self.workspace,
             )
 
@@ -151,7 +412,9 @@ class Client:
                 f"{API_URL}/jobs/{self.workspace}/{namespace}/{namespace_version}"
             )
 
-            response = requests.post(api_endpoint, json=job_data, headers=headers)
+            response = post_json(
+                api_endpoint, job_data, headers, self._payload_encoding
+            )
             job_dict = response.json().get("job")
             response.raise_for_status()
 
@@ -160,27 +423,80 @@ class Client:
             if e.response is not None:
                 raise Exception(f"{e.response.json().get('detail')}")
 
+    def _run_local_offline_job(
+        self,
+        inputs: dict,
+        labels_datasource: DataSource,
+        feature_bundles: List[FeatureBundle],
+        namespace_version: str,
+        num_workers: Optional[int],
+    ) -> Job:
+        from glacius.local import compute_offline_features, write_table
+
+        num_workers = _local_workers(num_workers)
+        result = compute_offline_features(
+            labels_datasource, feature_bundles, num_workers=num_workers
+        )
+        write_table(result, inputs["output_path"], labels_datasource.file_type)
+
+        return Job(
+            namespace=self.namespace,
+            provider_region="local",
+            namespace_version=namespace_version,
+            runtime=Runtime.LOCAL,
+            job_status=JobStatus.SUCCEEDED,
+            inputs=inputs,
+            outputs=inputs["output_path"],
+            job_type=JobType.OFFLINE_FEATURES_COMPUTATION,
+            num_workers=num_workers,
+            workspace=self._workspace,
+        )
+
     def register(
         self,
         feature_bundles: List[FeatureBundle],
         commit_msg: str,
+        incremental: bool = False,
     ):
+        """Registers feature bundles in the namespace.
+
+        Args:
+            feature_bundles (List[FeatureBundle]): The bundles to register. Their
+                templates are registered as the plain features they expand into.
+            commit_msg (str): Describes the change.
+            incremental (bool): Only uploads bundles and features whose identifier
+                changed since the last registration, plus the names of removed
+                ones. ``feature_bundles`` then is the complete state of the
+                namespace. The last registered state is read from the manifest in
+                cache_dir, or fetched from the registry.
+
+        Returns:
+            The server's response; None for an incremental registration without
+            changes, which makes no request.
+        """
         # The URL where your FastAPI server is running
         try:
             headers = {"X-API-Key": self.api_key}
             api_endpoint = f"{API_URL}/namespace/{self.workspace}/{self.namespace}/register_features"
 
-            # Convert your objects to their JSON representations
-            feature_bundles_json = [fb.to_json() for fb in feature_bundles]
+            # The registry only knows plain features
+            feature_bundles = [fb.expanded() for fb in feature_bundles]
+            if incremental:
+                return self._register_incremental(
+                    api_endpoint, headers, feature_bundles, commit_msg
+                )
+
+            # Bundles are encoded one at a time while the body is sent
             payload = {
-                "feature_bundles": feature_bundles_json,
+                "feature_bundles": (fb.to_dict() for fb in feature_bundles),
                 "commit_msg": commit_msg,
             }
 
-            response = requests.post(api_endpoint, json=payload, headers=headers)
+            response = post_json(api_endpoint, payload, headers, self._payload_encoding)
 
             # Raise an error if the request was unsuccessful
             response.raise_for_status()
+            self._expire_latest_snapshot()
 
             return (
                 response.json()
@@ -190,28 +506,106 @@ class Client:
             if e.response is not None:
                 raise Exception(f"{e.response.json().get('detail')}")
 
+    def _register_incremental(
+        self,
+        api_endpoint: str,
+        headers: Dict[str, str],
+        feature_bundles: List[FeatureBundle],
+        commit_msg: str,
+    ):
+        path = self._manifest_path()
+        previous = read_json(path) if path is not None else None
+        from_disk = previous is not None
+        if previous is None:
+            previous = self._fetch_manifest(headers)
+
+        diff = RegistrationDiff.compute(previous, feature_bundles)
+        if diff.is_empty():
+            return None
+
+        payload = diff.to_payload(commit_msg, manifest_identifier(previous))
+        response = post_json(api_endpoint, payload, headers, self._payload_encoding)
+        if response.status_code == 409 and from_disk:
+            # Someone else registered since our last run, diff against their state
+            previous = self._fetch_manifest(headers)
+            diff = RegistrationDiff.compute(previous, feature_bundles)
+            payload = diff.to_payload(commit_msg, manifest_identifier(previous))
+            response = post_json(api_endpoint, payload, headers, self._payload_encoding)
+        response.raise_for_status()
+        self._expire_latest_snapshot()
+
+        if path is not None:
+            write_json(path, diff.manifest)
+        return response.json()
+
+    def _expire_latest_snapshot(self) -> None:
+        """Makes the next name resolution revalidate the "latest" snapshot, after
+        a registration changed the namespace."""
+        snapshot = self._snapshots.get("latest")
+        if snapshot is not None:
+            snapshot.fetched_at = 0.0
+
+    def _manifest_path(self) -> Optional[str]:
+        if self._cache_dir is None:
+            return None
+        return os.path.join(
+            self._cache_dir, "manifests", self.workspace, f"{self.namespace}.json"
+        )
+
+    def _fetch_manifest(self, headers: Dict[str, str]) -> Manifest:
+        """Fetches the registry's manifest of the namespace, empty if nothing was
+        registered yet."""
+        response = requests.get(
+            f"{API_URL}/namespace/{self.workspace}/{self.namespace}/manifest",
+            headers=headers,
+        )
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return response.json().get("manifest", {})
+
     def materialize_features(
         self,
         feature_names: List[str],
         namespace_version: str = "latest",
         compute_tier: str = "M",
-        num_workers: int = 4,
+        num_workers: Optional[int] = None,
+        runtime: str = "EMR",
+        online_store_path: Optional[str] = None,
+        as_of: Optional[datetime] = None,
     ):
+        """Materializes the latest values of features into an online store.
+
+        Args:
+            feature_names (List[str]): The features to materialize.
+            namespace_version (str): Registry version to pull feature_names from.
+            compute_tier (str): Cluster size for remote runtimes.
+            num_workers (int, optional): Number of workers, 4 for remote runtimes
+                by default. Local runs are single-process by default, see
+                get_offline_features.
+            runtime (str): "EMR" submits a job that writes the hosted online store.
+                "LOCAL" computes the values in-process from FileSource data and
+                writes them to a LocalOnlineStore at online_store_path.
+            online_store_path (str, optional): The LocalOnlineStore file of local
+                runs. Defaults to ``{cache_dir}/online/{namespace}.sqlite``.
+            as_of (datetime, optional): End of the windows of local runs, now by
+                default.
+
+        Returns:
+            Job: The submitted job, or an already finished job for local runs.
+        """
         namespace = self.namespace
-        runtime = "EMR"
-        request_body = {"feature_names": feature_names}
         headers = {"X-API-Key": self.api_key}
-        features_api_url = (
-            f"{API_URL}/namespace/{namespace}/{namespace_version}/filter-server"
-        )
-        response = requests.post(features_api_url, json=request_body, headers=headers)
-        response.raise_for_status()
-        response_deser = response.json()
         inputs = {
-            "feature_bundles": [
-                bundle_dict for bundle_dict in response_deser.get("feature_bundles")
-            ],
+            "feature_bundles": self._resolve_feature_bundles(
+                feature_names, namespace_version
+            ),
         }
+        if Runtime(runtime) == Runtime.LOCAL:
+            return self._run_local_materialization_job(
+                inputs, online_store_path, as_of, namespace_version, num_workers
+            )
+
         job = Job(
             namespace=namespace,
             provider_region="us-east-1",
@@ -221,20 +615,64 @@ class Client:
             inputs=inputs,
             job_type=JobType.MATERIALIZATION,
             compute_tier=ComputeTier[compute_tier],
-            num_workers=num_workers,
+            num_workers=num_workers or 4,
             workspace=self.workspace,
         )
 
         job_data = job.to_dict()
 
-        print(job_data)
-
         api_endpoint = (
             f"{API_URL}/jobs/{self.workspace}/{namespace}/{namespace_version}"
         )
 
-        response = requests.post(api_endpoint, json=job_data, headers=headers)
+        response = post_json(api_endpoint, job_data, headers, self._payload_encoding)
         job_dict = response.json().get("job")
         response.raise_for_status()
 
         return Job.from_dict(job_dict)
+
+    def _run_local_materialization_job(
+        self,
+        inputs: dict,
+        online_store_path: Optional[str],
+        as_of: Optional[datetime],
+        namespace_version: str,
+        num_workers: Optional[int],
+    ) -> Job:
+        from glacius.local import LocalOnlineStore, materialize_local
+
+        if online_store_path is None:
+            if self._cache_dir is None:
+                raise ValueError(
+                    "Local materialization needs an online_store_path or a cache_dir"
+                )
+            online_store_path = os.path.join(
+                self._cache_dir, "online", f"{self.namespace}.sqlite"
+            )
+        feature_bundles = [
+            FeatureBundle.from_dict(bundle_dict)
+            for bundle_dict in inputs["feature_bundles"]
+        ]
+        num_workers = _local_workers(num_workers)
+        with LocalOnlineStore(online_store_path) as store:
+            materialize_local(store, feature_bundles, as_of, num_workers)
+
+        return Job(
+            namespace=self.namespace,
+            provider_region="local",
+            namespace_version=namespace_version,
+            runtime=Runtime.LOCAL,
+            job_status=JobStatus.SUCCEEDED,
+            inputs=inputs,
+            outputs=online_store_path,
+            job_type=JobType.MATERIALIZATION,
+            num_workers=num_workers,
+            workspace=self._workspace,
+        )
+
+
+def _local_workers(num_workers: Optional[int]) -> int:
+    # Starting a process pool only pays off for large jobs, so it is opt-in
+    if num_workers is None:
+        return 1
+    return max(1, min(num_workers, os.cpu_count() or 1))
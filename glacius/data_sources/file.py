@@ -1,5 +1,6 @@
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from glacius.data_sources.source import DataSource, SourceType
 
@@ -12,6 +13,8 @@ class FileType(Enum):
 
 
 class FileSource(DataSource):
+    __slots__ = ("_uri", "_file_type", "_query", "_partition_by", "_partition_format")
+
     uri: str
     file_type: FileType
 
@@ -24,8 +27,23 @@ class FileSource(DataSource):
         uri: str,
         file_type: FileType,
         query: Optional[str] = None,
+        partition_by: Optional[str] = None,
+        partition_format: str = "%Y-%m-%d",
     ):
-        """Initializes a new instance of FileSource."""
+        """Initializes a new instance of FileSource.
+
+        Args:
+            name (str): The name of the source.
+            description (str): A description of the source.
+            timestamp_col (str): The event timestamp column.
+            uri (str): The file, or the root directory of a partitioned source.
+            file_type (FileType): The format of the files.
+            query (str, optional): A query over the files.
+            partition_by (str, optional): The partition key of a Hive partitioned
+                layout, e.g. "dt" for ``{uri}/dt=2024-01-31/``. Partitions hold
+                the events whose (UTC) timestamp formats to their value.
+            partition_format (str): strftime format of the partition values.
+        """
         super().__init__(
             name=name,
             description=description,
@@ -35,6 +53,8 @@ class FileSource(DataSource):
         self._uri = uri
         self._file_type = file_type
         self._query = query
+        self._partition_by = partition_by
+        self._partition_format = partition_format
 
     @property
     def uri(self) -> str:
@@ -50,17 +70,59 @@ class FileSource(DataSource):
         """FileType: Gets the type of the file."""
         return self._file_type
 
+    @property
+    def partition_by(self) -> Optional[str]:
+        """str, optional: The partition key of a Hive partitioned layout."""
+        return self._partition_by
+
+    @property
+    def partition_format(self) -> str:
+        """str: The strftime format of the partition values."""
+        return self._partition_format
+
     @property
     def source_type(self):
         return self._source_type
 
+    def partition_paths(self, start: datetime, end: datetime) -> List[str]:
+        """The minimal set of partitions holding the events of a time range.
+
+        The uris are derived from the layout, without listing the source, so some
+        of them may not exist (e.g. days without events).
+
+        Args:
+            start (datetime): The earliest event timestamp of interest.
+            end (datetime): The latest event timestamp of interest (inclusive).
+
+        Returns:
+            List[str]: The partition uris in time order, or just the uri of
+                unpartitioned sources.
+        """
+        if self.partition_by is None:
+            return [self.uri]
+
+        # Step by the finest unit of the format; coarser formats repeat values
+        if "%H" in self.partition_format:
+            step = timedelta(hours=1)
+            current = start.replace(minute=0, second=0, microsecond=0)
+        else:
+            step = timedelta(days=1)
+            current = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        values = {}
+        while current <= end:
+            values[current.strftime(self.partition_format)] = None
+            current += step
+        root = self.uri.rstrip("/")
+        return [f"{root}/{self.partition_by}={value}" for value in values]
+
     def to_dict(self) -> dict:
         """Converts the FileSource instance to a dictionary.
 
         Returns:
             dict: The dictionary representation of the FileSource.
         """
-        return {
+        data = {
             "name": self.name,
             "description": self.description,
             "timestamp_col": self.timestamp_col,
@@ -69,6 +131,11 @@ class FileSource(DataSource):
             "source_type": self.source_type.value,
             "query": self.query,
         }
+        # Unpartitioned sources keep their dict (and identifier) unchanged
+        if self.partition_by is not None:
+            data["partition_by"] = self.partition_by
+            data["partition_format"] = self.partition_format
+        return data
 
     @classmethod
     def from_dict(cls, data_dict: dict) -> "FileSource":
@@ -80,9 +147,6 @@ class FileSource(DataSource):
         Returns:
             FileSource: A new instance of FileSource.
         """
-
-        print(data_dict)
-
         return cls(
             name=data_dict["name"],
             description=data_dict["description"],
@@ -90,4 +154,6 @@ class FileSource(DataSource):
             uri=data_dict["uri"],
             file_type=FileType(data_dict["file_type"]),
             query=data_dict["query"] if "query" in data_dict else None,
+            partition_by=data_dict.get("partition_by"),
+            partition_format=data_dict.get("partition_format", "%Y-%m-%d"),
         )
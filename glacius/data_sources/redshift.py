@@ -5,6 +5,8 @@ from glacius.data_sources.source import DataSource, SourceType
 
 
 class RedshiftSource(DataSource):
+    __slots__ = ("_table", "_jdbc_url", "_query")
+
     table: str
     jdbc_url: str
     source_type: SourceType
@@ -4,6 +4,8 @@ from glacius.data_sources.source import DataSource, SourceType
 
 
 class SnowflakeSource(DataSource):
+    __slots__ = ("_table", "_database", "_schema", "_query")
+
     database: str
     schema: str
     table: str
@@ -3,6 +3,7 @@ from enum import Enum
 
 from typing import Optional
 from glacius.hash_utils import md5_hash_str
+from glacius.slots import slot_items
 
 
 class SourceType(Enum):
@@ -14,6 +15,14 @@ class SourceType(Enum):
 
 
 class DataSource:
+    __slots__ = (
+        "_name",
+        "_description",
+        "_timestamp_col",
+        "_source_type",
+        "_cached_identifier",
+    )
+
     name: str
     description: str
     timestamp_col: str
@@ -49,22 +58,27 @@ class DataSource:
         return self._source_type
     
     def __repr__(self):
-        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        items = (f"{k} = {v}" for k, v in slot_items(self))
         return f"<{self.__class__.__name__}({', '.join(items)})>"
 
     @property
     def identifier(self) -> str:
         """
-        Computes a deterministic identifier for the RedshiftSource object.
+        Computes a deterministic identifier for the DataSource object.
+
+        Sources are immutable, so the identifier is computed once.
 
         Returns:
             str: The computed identifier.
         """
-        # Convert the object to its dict representation
-        data = self.to_dict()
+        identifier = getattr(self, "_cached_identifier", None)
+        if identifier is None:
+            # Convert the object to its dict representation
+            data = self.to_dict()
 
-        # Convert the dict to a JSON string
-        serialized_data = json.dumps(data, sort_keys=True)
+            # Convert the dict to a JSON string
+            serialized_data = json.dumps(data, sort_keys=True)
 
-        # Compute an MD5 hash of the JSON string
-        return md5_hash_str(serialized_data)
+            # Compute an MD5 hash of the JSON string
+            identifier = self._cached_identifier = md5_hash_str(serialized_data)
+        return identifier
@@ -0,0 +1,40 @@
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+CACHE_DIR_ENV = "GLACIUS_CACHE_DIR"
+
+
+def default_cache_dir() -> str:
+    """The directory of glacius' on-disk caches: $GLACIUS_CACHE_DIR or ~/.glacius."""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.path.expanduser("~"), ".glacius"
+    )
+
+
+def read_json(path: str) -> Optional[Any]:
+    """Reads a cached JSON document, None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: str, data: Any) -> None:
+    """Atomically replaces a cached JSON document.
+
+    The document is written to a temporary file in the same directory and renamed
+    over the target, so concurrent readers never see a partial file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,44 +1,232 @@
+import inspect
 import re
-from typing import Any, Union
+import threading
+import weakref
+from functools import lru_cache, reduce
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to evaluate expressions locally
+    np = None
+
+
+# Operator precedences, higher binds tighter. Nodes compile operands that bind
+# looser than the operator requires in parentheses, so every compiled expression
+# parses back into the same tree.
+_OR, _AND, _COMPARISON, _ADDITIVE, _MULTIPLICATIVE, _PRIMARY = range(1, 7)
+
+
+def _intern_key(value: Any) -> Any:
+    # Operands are interned before their parents, so equal sub-trees are the same
+    # object and their identity is a key. Literals are keyed by type and repr to
+    # keep 1, 1.0 and True (and 0.0 and -0.0) apart.
+    if isinstance(value, Expr):
+        return id(value)
+    return (type(value), repr(value))
+
+
+class _Interned(type):
+    """Hash-conses expression nodes: constructing a node equal to a live one
+    returns that node."""
+
+    def __init__(cls, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        cls._instances = weakref.WeakValueDictionary()
+        cls._signature = inspect.signature(cls.__init__)
+        parameters = list(cls._signature.parameters.values())[1:]
+        variadic = any(p.kind is p.VAR_POSITIONAL for p in parameters)
+        cls._arity = None if variadic else len(parameters)
+
+    def __call__(cls, *args: Any, **kwargs: Any) -> Any:
+        if kwargs or (cls._arity is not None and len(args) != cls._arity):
+            # Bind keywords and defaults, so equal nodes get equal arguments
+            bound = cls._signature.bind(None, *args, **kwargs)
+            bound.apply_defaults()
+            args = bound.args[1:]
+        key = tuple(_intern_key(arg) for arg in args)
+        with _INTERN_LOCK:
+            node = cls._instances.get(key)
+            if node is None:
+                node = super().__call__(*args)
+                object.__setattr__(node, "_args", args)
+                cls._instances[key] = node
+        return node
+
+
+_INTERN_LOCK = threading.RLock()
 
 
 # Base class for all expressions
-class Expr:
+class Expr(metaclass=_Interned):
+    """Base class of expression nodes.
+
+    Nodes are immutable and interned: structurally equal expressions are the same
+    object, so ``is`` is structural equality. The compiled SQL and the structural
+    hash are computed once per node.
+    """
+
+    __slots__ = ("_args", "_sql", "_hash", "__weakref__")
+
+    precedence = _PRIMARY
+
     def compile(self) -> str:
-        pass
+        sql = getattr(self, "_sql", None)
+        if sql is None:
+            sql = self._compile()
+            object.__setattr__(self, "_sql", sql)
+        return sql
+
+    def _compile(self) -> str:
+        raise NotImplementedError
+
+    def __hash__(self) -> int:
+        structural_hash = getattr(self, "_hash", None)
+        if structural_hash is None:
+            structural_hash = hash(
+                (self.__class__.__name__,)
+                + tuple(
+                    hash(arg) if isinstance(arg, Expr) else _intern_key(arg)
+                    for arg in self._args
+                )
+            )
+            object.__setattr__(self, "_hash", structural_hash)
+        return structural_hash
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, "_args"):
+            raise AttributeError(f"{self.__class__.__name__} nodes are immutable")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} nodes are immutable")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Unpickled and copied nodes are interned again
+        return (self.__class__, self._args)
+
+    def children(self) -> Tuple[Any, ...]:
+        """Returns the operands of this node: sub-expressions or literal values."""
+        return ()
+
+    def with_children(self, *children: Any) -> "Expr":
+        """Returns a node of the same kind with its operands replaced."""
+        return self
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        """Evaluates the expression over a batch of columns as whole-array operations.
+
+        Args:
+            columns (Mapping[str, Any]): Column name to numpy array. All arrays must
+                have the same length.
+            cache (SubexpressionCache, optional): Shares the results of common
+                sub-expressions across evaluations of the same batch.
+
+        Returns:
+            Any: A numpy array with one value per row, or a scalar for expressions
+                that reference no columns.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} cannot be evaluated locally"
+        )
 
 
 def compile_value(value: Union[Expr, Any]) -> str:
     if isinstance(value, Expr):
         return value.compile()
     elif isinstance(value, str):
-        return f"'{value}'"  # Surround strings with quotes
+        escaped = value.replace("'", "''")
+        return f"'{escaped}'"  # Surround strings with quotes
     else:
         return str(value)  # Keep numbers and other types as-is
 
 
+def compile_operand(value: Union[Expr, Any], min_precedence: int) -> str:
+    """Compiles an operand, in parentheses if it binds looser than required."""
+    compiled = compile_value(value)
+    if isinstance(value, Expr) and value.precedence < min_precedence:
+        return f"({compiled})"
+    return compiled
+
+
+def evaluate_value(
+    value: Union[Expr, Any], columns: Mapping[str, Any], cache: Optional[Any] = None
+) -> Any:
+    if np is None:
+        raise ImportError(
+            "Evaluating expressions requires numpy: pip install 'glacius[local]'"
+        )
+    if isinstance(value, Expr):
+        if cache is not None:
+            return cache.evaluate(value, columns)
+        return value.evaluate(columns)
+    return value  # Literals broadcast against the column arrays
+
+
+def _as_dates(values: Any) -> Any:
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[us]")
+    return values.astype("datetime64[D]").astype(np.int64)
+
+
+_COMPARISONS = {
+    "=": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<>": lambda left, right: left != right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+}
+
+
 # Implement Condition class for logical conditions
 class Condition(Expr):
+    __slots__ = ("left", "operator", "right")
+
+    precedence = _COMPARISON
+
     def __init__(self, left: Expr, operator: str, right: Any):
         self.left = left
         self.operator = operator
         self.right = right
 
-    def compile(self) -> str:
-        return f"{compile_value(self.left)} {self.operator} {compile_value(self.right)}"
+    def _compile(self) -> str:
+        left = compile_operand(self.left, _COMPARISON + 1)
+        right = compile_operand(self.right, _COMPARISON + 1)
+        return f"{left} {self.operator} {right}"
+
+    def children(self) -> Tuple[Any, ...]:
+        return (self.left, self.right)
+
+    def with_children(self, left: Any, right: Any) -> "Condition":
+        return Condition(left, self.operator, right)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        left = evaluate_value(self.left, columns, cache)
+        right = evaluate_value(self.right, columns, cache)
+        return np.asarray(_COMPARISONS[self.operator](left, right), dtype=bool)
 
 
 # Implement 'col' for column references
 class col(Expr):
+    __slots__ = ("column_name",)
+
     def __init__(self, column_name: str):
         self.column_name = column_name
 
-    def compile(self) -> str:
+    def _compile(self) -> str:
         return f"`{self.column_name}`"
 
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        return columns[self.column_name]
+
     def __eq__(self, other: Any) -> Condition:
         return Condition(self, "=", other)
 
+    __hash__ = Expr.__hash__
+
     def __gt__(self, other: Any) -> Condition:
         return Condition(self, ">", other)
 
@@ -54,197 +242,487 @@ class col(Expr):
 
 # Implement 'when' for conditional logic
 class when(Expr):
-    def __init__(self, condition: Expr):
+    __slots__ = ("condition", "true_value", "false_value")
+
+    def __init__(
+        self, condition: Expr, true_value: Any = None, false_value: Any = None
+    ):
         self.condition = condition
+        self.true_value = true_value
+        self.false_value = false_value
 
     def then(self, value: Any) -> "when":
-        self.true_value = value
-        return self
+        return when(self.condition, value, self.false_value)
 
     def otherwise(self, value: Any) -> "when":
-        self.false_value = value
-        return self
+        return when(self.condition, self.true_value, value)
 
-    def compile(self) -> str:
+    def _compile(self) -> str:
+        if self.true_value is None or self.false_value is None:
+            raise ValueError("when() needs both then() and otherwise()")
         return f"CASE WHEN {compile_value(self.condition)} THEN {compile_value(self.true_value)} ELSE {compile_value(self.false_value)} END"
 
+    def children(self) -> Tuple[Any, ...]:
+        return (self.condition, self.true_value, self.false_value)
+
+    def with_children(
+        self, condition: Any, true_value: Any, false_value: Any
+    ) -> "when":
+        return when(condition, true_value, false_value)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        return np.where(
+            evaluate_value(self.condition, columns, cache),
+            evaluate_value(self.true_value, columns, cache),
+            evaluate_value(self.false_value, columns, cache),
+        )
+
 
 # Implement AND logic
 class and_(Expr):
+    __slots__ = ("args",)
+
+    precedence = _AND
+
     def __init__(self, *args: Expr):
         self.args = args
 
-    def compile(self) -> str:
-        return " AND ".join([compile_value(arg) for arg in self.args])
+    def _compile(self) -> str:
+        return " AND ".join([compile_operand(arg, _AND + 1) for arg in self.args])
+
+    def children(self) -> Tuple[Any, ...]:
+        return tuple(self.args)
+
+    def with_children(self, *args: Any) -> "and_":
+        return and_(*args)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        return reduce(
+            np.logical_and, [evaluate_value(arg, columns, cache) for arg in self.args]
+        )
 
 
 # Implement 'concat' for string concatenation
 class concat(Expr):
+    __slots__ = ("args",)
+
     def __init__(self, *args: Expr):
         self.args = args
 
-    def compile(self) -> str:
+    def _compile(self) -> str:
         return f"CONCAT({', '.join([compile_value(arg) for arg in self.args])})"
 
+    def children(self) -> Tuple[Any, ...]:
+        return tuple(self.args)
+
+    def with_children(self, *args: Any) -> "concat":
+        return concat(*args)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        parts = [evaluate_value(arg, columns, cache) for arg in self.args]
+        return reduce(np.char.add, [np.asarray(part).astype(str) for part in parts])
+
+
+# Implement 'param' for placeholders of feature template parameters
+class param(Expr):
+    """A template parameter, bound to a value for every expanded feature.
+
+    Compiles to ``${name}``. Formatting a param into a string, as in
+    ``col(f"clicks_{window}")``, yields the same placeholder, which binds inside
+    column names and string literals too.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _compile(self) -> str:
+        return f"${{{self.name}}}"
+
+    def __str__(self) -> str:
+        return self.compile()
+
+    def __format__(self, format_spec: str) -> str:
+        return self.compile()
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        raise ValueError(f"Parameter {self.name} is not bound")
+
+
+_PARAM_RE = re.compile(r"\$\{(\w+)\}")
+
+
+def find_params(value: Any) -> List[str]:
+    """Returns the names of the parameters in an expression, in order of first
+    occurrence."""
+    names: Dict[str, None] = {}
+
+    def visit(value: Any) -> None:
+        if isinstance(value, param):
+            names[value.name] = None
+        elif isinstance(value, col):
+            names.update(dict.fromkeys(_PARAM_RE.findall(value.column_name)))
+        elif isinstance(value, str):
+            names.update(dict.fromkeys(_PARAM_RE.findall(value)))
+        elif isinstance(value, Expr):
+            for child in value.children():
+                visit(child)
+
+    visit(value)
+    return list(names)
+
+
+def find_columns(value: Any) -> List[str]:
+    """Returns the names of the columns an expression references, in order of
+    first occurrence."""
+    names: Dict[str, None] = {}
+
+    def visit(value: Any) -> None:
+        if isinstance(value, col):
+            names[value.column_name] = None
+        elif isinstance(value, Expr):
+            for child in value.children():
+                visit(child)
+
+    visit(value)
+    return list(names)
+
+
+def bind_params(value: Any, params: Mapping[str, Any]) -> Any:
+    """Replaces the parameters in an expression with their values.
+
+    Args:
+        value (Any): An expression or literal.
+        params (Mapping[str, Any]): Parameter name to value.
+
+    Returns:
+        Any: The bound expression or literal.
+
+    Raises:
+        KeyError: If a parameter has no value.
+    """
+
+    def substitute(text: str) -> str:
+        return _PARAM_RE.sub(lambda match: str(params[match.group(1)]), text)
+
+    if isinstance(value, param):
+        return params[value.name]
+    if isinstance(value, col):
+        return col(substitute(value.column_name))
+    if isinstance(value, str):
+        return substitute(value)
+    if isinstance(value, Expr):
+        children = value.children()
+        if children:
+            return value.with_children(
+                *(bind_params(child, params) for child in children)
+            )
+    return value
+
 
 # Implement 'date_diff' to get the difference between two dates
 class date_diff(Expr):
+    __slots__ = ("date1", "date2")
+
     def __init__(self, date1: Expr, date2: Expr):
         self.date1 = date1
         self.date2 = date2
 
-    def compile(self) -> str:
+    def _compile(self) -> str:
         return f"DATEDIFF({compile_value(self.date1)}, {compile_value(self.date2)})"
 
+    def children(self) -> Tuple[Any, ...]:
+        return (self.date1, self.date2)
+
+    def with_children(self, date1: Any, date2: Any) -> "date_diff":
+        return date_diff(date1, date2)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        date1 = _as_dates(evaluate_value(self.date1, columns, cache))
+        date2 = _as_dates(evaluate_value(self.date2, columns, cache))
+        return date1 - date2
+
+
+class _BinaryOp(Expr):
+    """Shared structure of the arithmetic operators."""
+
+    __slots__ = ("left", "right")
+
+    operator = ""
 
-# Implement addition
-class add(Expr):
     def __init__(self, left: Expr, right: Expr):
         self.left = left
         self.right = right
 
-    def compile(self) -> str:
-        return f"{compile_value(self.left)} + {compile_value(self.right)}"
+    def _compile(self) -> str:
+        # Left-associative: only a right operand of the same precedence needs
+        # parentheses
+        left = compile_operand(self.left, self.precedence)
+        right = compile_operand(self.right, self.precedence + 1)
+        return f"{left} {self.operator} {right}"
+
+    def children(self) -> Tuple[Any, ...]:
+        return (self.left, self.right)
+
+    def with_children(self, left: Any, right: Any) -> "Expr":
+        return self.__class__(left, right)
+
+
+# Implement addition
+class add(_BinaryOp):
+    __slots__ = ()
+
+    precedence = _ADDITIVE
+    operator = "+"
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        left = evaluate_value(self.left, columns, cache)
+        right = evaluate_value(self.right, columns, cache)
+        return np.add(left, right)
 
 
 # Implement 'or_' for OR logic
 class or_(Expr):
+    __slots__ = ("args",)
+
+    precedence = _OR
+
     def __init__(self, *args: Expr):
         self.args = args
 
-    def compile(self) -> str:
-        return " OR ".join([compile_value(arg) for arg in self.args])
+    def _compile(self) -> str:
+        return " OR ".join([compile_operand(arg, _OR + 1) for arg in self.args])
+
+    def children(self) -> Tuple[Any, ...]:
+        return tuple(self.args)
+
+    def with_children(self, *args: Any) -> "or_":
+        return or_(*args)
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        return reduce(
+            np.logical_or, [evaluate_value(arg, columns, cache) for arg in self.args]
+        )
 
 
 # Implement subtraction
-class sub(Expr):
-    def __init__(self, left: Expr, right: Expr):
-        self.left = left
-        self.right = right
+class sub(_BinaryOp):
+    __slots__ = ()
 
-    def compile(self) -> str:
-        return f"{compile_value(self.left)} - {compile_value(self.right)}"
+    precedence = _ADDITIVE
+    operator = "-"
 
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        left = evaluate_value(self.left, columns, cache)
+        right = evaluate_value(self.right, columns, cache)
+        return np.subtract(left, right)
 
-# Implement multiplication
-class mul(Expr):
-    def __init__(self, left: Expr, right: Expr):
-        self.left = left
-        self.right = right
 
-    def compile(self) -> str:
-        return f"{compile_value(self.left)} * {compile_value(self.right)}"
+# Implement multiplication
+class mul(_BinaryOp):
+    __slots__ = ()
 
+    precedence = _MULTIPLICATIVE
+    operator = "*"
 
-# Implement division
-class div(Expr):
-    def __init__(self, left: Expr, right: Expr):
-        self.left = left
-        self.right = right
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        left = evaluate_value(self.left, columns, cache)
+        right = evaluate_value(self.right, columns, cache)
+        return np.multiply(left, right)
 
-    def compile(self) -> str:
-        return f"{compile_value(self.left)} / {compile_value(self.right)}"
-
-
-def parse_col(text: str) -> col:
-    column_name = re.findall(r"`([^`]+)`", text)[0]
-    return col(column_name)
-
-
-def parse_condition(text: str) -> Condition:
-    # Attempt to match more general condition expressions
-    match = re.match(r"(.+) ([=<>!]+) (.+)", text)
-    if not match:
-        raise ValueError("Invalid condition")
-
-    left, operator, right = match.groups()
-    return Condition(parse_value(left.strip()), operator, parse_value(right.strip()))
-
-
-def parse_add(text: str) -> add:
-    left, right = text.split(" + ")
-    return add(parse_value(left), parse_value(right))
-
-
-def parse_when(text: str) -> when:
-    match = re.match(r"CASE WHEN (.+) THEN (.+) ELSE (.+) END", text)
-    if not match:
-        raise ValueError("Invalid when")
-
-    condition, true_value, false_value = match.groups()
-    return (
-        when(parse_value(condition))
-        .then(parse_value(true_value))
-        .otherwise(parse_value(false_value))
-    )
-
-
-def parse_concat(text: str) -> concat:
-    # This regular expression captures everything inside CONCAT's parentheses
-    match = re.match(r"CONCAT\((.+)\)", text)
-    if not match:
-        raise ValueError("Invalid CONCAT expression")
-
-    # Extracting arguments and splitting them by comma
-    args_text = match.group(1)
-    args = [arg.strip() for arg in args_text.split(",")]
-
-    # Parsing each argument and creating a concat instance
-    return concat(*[parse_value(arg) for arg in args])
-
-
-def parse_value(text: str) -> Expr:
-    text = text.strip()
-    if re.match(r"CASE WHEN .+ THEN .+ ELSE .+ END", text):
-        return parse_when(text)
-    elif text.startswith("`") and text.endswith("`"):
-        return parse_col(text)
-    elif text.startswith("'") and text.endswith("'"):
-        return text[1:-1]
-    elif " AND " in text:
-        return and_(*[parse_value(sub_expr) for sub_expr in text.split(" AND ")])
-    elif " OR " in text:
-        return or_(*[parse_value(sub_expr) for sub_expr in text.split(" OR ")])
-    elif text.isdigit():
-        return int(text)
-    elif re.match(r".+ [=<>!]+ .+", text):
-        return parse_condition(text)
-    elif " + " in text:
-        return parse_add(text)
-    elif " - " in text:
-        left, right = text.split(" - ")
-        return sub(parse_value(left), parse_value(right))
-    elif " * " in text:
-        left, right = text.split(" * ")
-        return mul(parse_value(left), parse_value(right))
-    elif " / " in text:
-        left, right = text.split(" / ")
-        return div(parse_value(left), parse_value(right))
-    elif text == "True":
-        return True
-    elif text == "False":
-        return False
-    elif text.startswith("CONCAT(") and text.endswith(")"):
-        return parse_concat(text)
-    else:
-        raise ValueError(f"Invalid expression: {text}")
 
+# Implement division
+class div(_BinaryOp):
+    __slots__ = ()
+
+    precedence = _MULTIPLICATIVE
+    operator = "/"
+
+    def evaluate(self, columns: Mapping[str, Any], cache: Optional[Any] = None) -> Any:
+        left = evaluate_value(self.left, columns, cache)
+        right = evaluate_value(self.right, columns, cache)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.true_divide(left, right)
+
+
+_BINARY_OPERATORS = {
+    "+": (_ADDITIVE, add),
+    "-": (_ADDITIVE, sub),
+    "*": (_MULTIPLICATIVE, mul),
+    "/": (_MULTIPLICATIVE, div),
+}
+
+_TOKEN_RE = re.compile(
+    r"""
+    \s*(?:
+        `(?P<col>[^`]*)`
+      | '(?P<str>(?:[^']|'')*)'
+      | (?P<num>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+      | (?P<op>>=|<=|<>|!=|=|<|>|[-+*/])
+      | \$\{(?P<param>\w+)\}
+      | (?P<punct>[(),])
+      | (?P<word>[A-Za-z_]\w*)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = {"AND", "OR", "CASE", "WHEN", "THEN", "ELSE", "END", "CONCAT", "DATEDIFF"}
+_END = ("end", None)
+
+
+def tokenize(text: str) -> List[Tuple[str, Any]]:
+    """Splits compiled SQL into (kind, value) tokens in a single pass.
+
+    Kinds are "col", "str", "num", "op", "param", "punct", "keyword" and "bool".
+
+    Raises:
+        ValueError: On characters that start no token.
+    """
+    tokens = []
+    position, end = 0, len(text.rstrip())
+    while position < end:
+        match = _TOKEN_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unexpected character at {position} in: {text}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "str":
+            value = value.replace("''", "'")
+        elif kind == "num":
+            value = float(value) if value.strip("0123456789") else int(value)
+        elif kind == "word":
+            if value in ("True", "False"):
+                kind, value = "bool", value == "True"
+            elif value.upper() in _KEYWORDS:
+                kind, value = "keyword", value.upper()
+            else:
+                raise ValueError(f"Unknown identifier {value!r} in: {text}")
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """Precedence-climbing parser over the tokens of one compiled expression."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self) -> Tuple[str, Any]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return _END
+
+    def next(self) -> Tuple[str, Any]:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, kind: str, value: Any) -> None:
+        token = self.next()
+        if token != (kind, value):
+            raise ValueError(f"Expected {value!r}, got {token[1]!r} in: {self.text}")
+
+    def parse(self) -> Any:
+        value = self.expression(_OR)
+        if self.peek() is not _END:
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in: {self.text}")
+        return value
+
+    def expression(self, min_precedence: int) -> Any:
+        left = self.primary()
+        compared = False
+        while True:
+            kind, value = self.peek()
+            if kind == "keyword" and value in ("AND", "OR"):
+                precedence, node = (_AND, and_) if value == "AND" else (_OR, or_)
+                if precedence < min_precedence:
+                    return left
+                args = [left]
+                while self.peek() == (kind, value):
+                    self.next()
+                    args.append(self.expression(precedence + 1))
+                left = node(*args)
+            elif kind == "op" and value in _BINARY_OPERATORS:
+                precedence, node = _BINARY_OPERATORS[value]
+                if precedence < min_precedence:
+                    return left
+                self.next()
+                left = node(left, self.expression(precedence + 1))
+            elif kind == "op":
+                if _COMPARISON < min_precedence:
+                    return left
+                if compared:
+                    raise ValueError(f"Chained comparison in: {self.text}")
+                self.next()
+                left = Condition(left, value, self.expression(_COMPARISON + 1))
+                compared = True
+            else:
+                return left
+
+    def primary(self) -> Any:
+        kind, value = self.next()
+        if kind == "col":
+            return col(value)
+        if kind == "param":
+            return param(value)
+        if kind in ("str", "num", "bool"):
+            return value
+        if (kind, value) == ("op", "-") and self.peek()[0] == "num":
+            return -self.next()[1]
+        if (kind, value) == ("punct", "("):
+            inner = self.expression(_OR)
+            self.expect("punct", ")")
+            return inner
+        if (kind, value) == ("keyword", "CASE"):
+            self.expect("keyword", "WHEN")
+            condition = self.expression(_OR)
+            self.expect("keyword", "THEN")
+            true_value = self.expression(_OR)
+            self.expect("keyword", "ELSE")
+            false_value = self.expression(_OR)
+            self.expect("keyword", "END")
+            return when(condition, true_value, false_value)
+        if (kind, value) in (("keyword", "CONCAT"), ("keyword", "DATEDIFF")):
+            self.expect("punct", "(")
+            args = [self.expression(_OR)]
+            while self.peek() == ("punct", ","):
+                self.next()
+                args.append(self.expression(_OR))
+            self.expect("punct", ")")
+            if value == "CONCAT":
+                return concat(*args)
+            if len(args) != 2:
+                raise ValueError(f"DATEDIFF takes two arguments in: {self.text}")
+            return date_diff(*args)
+        raise ValueError(f"Unexpected {value!r} in: {self.text}")
+
+
+def parse_value(text: str) -> Any:
+    """Parses compiled SQL into an expression, or a literal for literal SQL.
+
+    Raises:
+        ValueError: If the text is not a compiled expression.
+    """
+    return _Parser(text).parse()
+
+
+@lru_cache(maxsize=8192)
+def reconstruct(compiled: str) -> Expr:
+    """Parses a compiled expression back into its tree, inverting ``Expr.compile``.
 
-def reconstruct_case_when(compiled: str) -> Expr:
-    match = re.match(r"CASE WHEN (.+) THEN (.+) ELSE (.+) END", compiled)
-    if not match:
-        raise ValueError("Invalid CASE WHEN expression")
+    Parsing is linear in the length of the SQL, and results are cached by the SQL
+    string since a namespace repeats the same expressions across many features.
 
-    condition, true_value, false_value = match.groups()
-    return (
-        when(parse_value(condition))
-        .then(parse_value(true_value))
-        .otherwise(parse_value(false_value))
-    )
+    Args:
+        compiled (str): The output of ``Expr.compile``.
 
+    Returns:
+        Expr: An expression that compiles to the same SQL.
 
-def reconstruct(compiled: str) -> Expr:
-    if "CASE WHEN" in compiled:
-        return reconstruct_case_when(compiled)
-    else:
-        return parse_value(compiled)
+    Raises:
+        ValueError: If the text is not a compiled expression.
+    """
+    return parse_value(compiled)
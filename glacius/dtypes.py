@@ -41,3 +41,24 @@ Binary = DataType.BINARY
 Array = DataType.ARRAY
 Map = DataType.MAP
 Struct = DataType.STRUCT
+
+# Fixed width types and the numpy dtype holding their values
+NUMPY_DTYPES = {
+    DataType.INT32: "int32",
+    DataType.INT64: "int64",
+    DataType.FLOAT32: "float32",
+    DataType.FLOAT64: "float64",
+    DataType.BOOLEAN: "bool",
+    DataType.BYTE: "int8",
+    DataType.SHORT: "int16",
+    DataType.DATE: "datetime64[D]",
+    DataType.TIMESTAMP: "datetime64[us]",
+}
+
+INTEGRAL_TYPES = {
+    DataType.INT32,
+    DataType.INT64,
+    DataType.BOOLEAN,
+    DataType.BYTE,
+    DataType.SHORT,
+}
@@ -1,10 +1,20 @@
 import json
-from typing import List, Union
+from typing import Any, List, Sequence, Union
+
+from glacius.hash_utils import fnv1a_64_array, md5_hash_str
+from glacius.slots import slot_items
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to encode ids in bulk
+    np = None
 
 
 class Entity:
     """Represents an entity that can be identified using either a single key or multiple keys."""
 
+    __slots__ = ("keys",)
+
     keys: List[str]  # List of keys where each key is a column name
 
     def __init__(self, *, key: str = None, keys: List[str] = None):
@@ -35,7 +45,7 @@ class Entity:
         Returns:
             str: The string representation of the Entity.
         """
-        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        items = (f"{k} = {v}" for k, v in slot_items(self))
         return f"<{self.__class__.__name__}({', '.join(items)})>"
 
     def to_dict(self) -> dict:
@@ -58,6 +68,16 @@ class Entity:
         """
         return cls(keys=data["keys"])
 
+    @property
+    def identifier(self) -> str:
+        """
+        Computes a deterministic identifier for the Entity object.
+
+        Returns:
+            str: The computed identifier.
+        """
+        return md5_hash_str(json.dumps(self.to_dict(), sort_keys=True))
+
     def id(self, *args):
         if len(args) != len(self.keys):
             raise Exception(
@@ -67,3 +87,38 @@ class Entity:
         ids_and_keys = sorted(zip(self.keys, args), key=lambda x: x[0])
 
         return ":".join(":".join(pair) for pair in ids_and_keys)
+
+    def ids(self, *columns: Sequence[Any], hashed: bool = False):
+        """Encodes the ids of many entities in one vectorized pass.
+
+        Equivalent to ``[self.id(*values) for values in zip(*columns)]``, without
+        the per-id Python overhead. Values are converted with ``str``.
+
+        Args:
+            *columns (Sequence[Any]): One sequence or numpy array of values per key,
+                in the order of ``keys``.
+            hashed (bool): Return the 64-bit FNV-1a hashes of the UTF-8 encoded ids
+                instead (see ``hash_utils.fnv1a_64``), a compact form for indexes
+                and lookups.
+
+        Returns:
+            The ids as a list of str, or their hashes as a uint64 numpy array.
+        """
+        if np is None:
+            raise ImportError(
+                "Encoding ids in bulk requires numpy: pip install 'glacius[local]'"
+            )
+        if len(columns) != len(self.keys):
+            raise Exception(
+                f"ids should match the total number of keys specified for this entity: {len(self.keys)}"
+            )
+
+        encoded = None
+        for key, column in sorted(zip(self.keys, columns), key=lambda x: x[0]):
+            pair = np.char.add(f"{key}:", np.asarray(column).astype(str))
+            if encoded is not None:
+                pair = np.char.add(np.char.add(encoded, ":"), pair)
+            encoded = pair
+        if hashed:
+            return fnv1a_64_array(encoded)
+        return encoded.tolist()
@@ -5,11 +5,21 @@ from glacius.aggregation import DEFAULT_AGG, Aggregation, AggregationType
 from glacius.dsl import Expr, reconstruct
 from glacius.dtypes import DataType
 from glacius.hash_utils import md5_hash_str
+from glacius.slots import slot_items
 
 
 class Feature:
     """Represents a feature with its specifications."""
 
+    __slots__ = (
+        "_name",
+        "_description",
+        "_expr",
+        "_dtype",
+        "_agg",
+        "_cached_identifier",
+    )
+
     name: str
     description: str
     expr: Expr
@@ -76,7 +86,7 @@ class Feature:
         Returns:
             str: String representation of the feature.
         """
-        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        items = (f"{k} = {v}" for k, v in slot_items(self))
         return f"<{self.__class__.__name__}({', '.join(items)})>"
 
     def to_dict(self):
@@ -118,14 +128,19 @@ class Feature:
         """
         Computes a deterministic identifier for the Feature object.
 
+        Features are immutable, so the identifier is computed once.
+
         Returns:
             str: The computed identifier.
         """
-        # Convert the object to its dict representation
-        data = self.to_dict()
+        identifier = getattr(self, "_cached_identifier", None)
+        if identifier is None:
+            # Convert the object to its dict representation
+            data = self.to_dict()
 
-        # Convert the dict to a JSON string
-        serialized_data = json.dumps(data, sort_keys=True)
+            # Convert the dict to a JSON string
+            serialized_data = json.dumps(data, sort_keys=True)
 
-        # Compute an MD5 hash of the JSON string
-        return md5_hash_str(serialized_data)
+            # Compute an MD5 hash of the JSON string
+            identifier = self._cached_identifier = md5_hash_str(serialized_data)
+        return identifier
@@ -1,11 +1,12 @@
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from glacius.data_sources.registry import ENUM_TO_SOURCE_CLS
 from glacius.data_sources.source import DataSource, SourceType
 from glacius.entity import Entity
 from glacius.feature import Feature
-from glacius.hash_utils import md5_hash_str
+from glacius.feature_template import FeatureTemplate
+from glacius.hash_utils import combine_hashes
 
 
 class FeatureBundle:
@@ -16,6 +17,7 @@ class FeatureBundle:
         description: str = "",
         features: List[Feature] = None,
         entity: Entity = None,
+        templates: List[FeatureTemplate] = None,
     ):
         """Initializes a FeatureBundle.
 
@@ -25,12 +27,17 @@ class FeatureBundle:
             source (DataSource): Data source for the bundle.
             features (List[Feature], optional): List of features in the bundle.
             entity_keys (List[EntityKey], optional): List of entity keys.
+            templates (List[FeatureTemplate], optional): Feature families in the
+                bundle, expanded by iter_features.
         """
         self._name = name
         self._description = description
         self._source = source
-        self._features = features if features else []
+        # Copies, so the cached features_identifier can't go stale
+        self._features = list(features) if features else []
         self._entity = entity
+        self._templates = list(templates) if templates else []
+        self._cached_features_identifier = None
 
     def add_feature(self, feature: Feature) -> None:
         """Adds a feature to the bundle.
@@ -38,7 +45,8 @@ class FeatureBundle:
         Args:
             feature (Feature): The feature to be added.
         """
-        self.features.append(feature)
+        self._features.append(feature)
+        self._cached_features_identifier = None
 
     def add_features(self, features: List[Feature]) -> None:
         """Adds a list of features to the bundle
@@ -46,8 +54,47 @@ class FeatureBundle:
         Args:
             features (List[Feature]): The list of features to be added.
         """
-        for feature in features:
-            self.features.append(feature)
+        self._features.extend(features)
+        self._cached_features_identifier = None
+
+    def add_template(self, template: FeatureTemplate) -> None:
+        """Adds a feature template to the bundle.
+
+        Args:
+            template (FeatureTemplate): The template to be added.
+        """
+        self._templates.append(template)
+        self._cached_features_identifier = None
+
+    def iter_features(self) -> Iterator[Feature]:
+        """Iterates all features of the bundle: the features, then the expanded
+        templates.
+
+        Yields:
+            Feature: The features.
+        """
+        yield from self.features
+        for template in self.templates:
+            yield from template.iter_features()
+
+    def expanded(self) -> "FeatureBundle":
+        """The bundle with its templates expanded into plain features.
+
+        The registry and remote jobs only know plain features, so bundles are
+        expanded before they are sent.
+
+        Returns:
+            FeatureBundle: The bundle itself if it has no templates, else a copy.
+        """
+        if not self.templates:
+            return self
+        return FeatureBundle(
+            name=self.name,
+            source=self.source,
+            description=self.description,
+            features=list(self.iter_features()),
+            entity=self.entity,
+        )
 
     @property
     def name(self) -> str:
@@ -65,29 +112,37 @@ class FeatureBundle:
         return self._source
 
     @property
-    def features(self) -> List[Feature]:
-        """List[Feature]: The features contained in the bundle."""
-        return self._features
+    def features(self) -> Tuple[Feature, ...]:
+        """Tuple[Feature, ...]: The features contained in the bundle, changed
+        through add_feature(s)."""
+        return tuple(self._features)
 
     @property
     def entity(self) -> Entity:
         """List[EntityKey]: The entity keys associated with the bundle."""
         return self._entity
 
+    @property
+    def templates(self) -> Tuple[FeatureTemplate, ...]:
+        """Tuple[FeatureTemplate, ...]: The feature templates of the bundle,
+        changed through add_template."""
+        return tuple(self._templates)
+
     def to_json(self) -> str:
-        return json.dumps(
-            {
-                "name": self.name,
-                "description": self.description,
-                "source": self.source.to_dict(),  # We'll need to implement to_dict method for the DataSource subclasses
-                "features": [
-                    feature.to_dict() for feature in self.features
-                ],  # We'll need to implement to_dict for Feature
-                "entity": self.entity.to_dict()
-                if self.entity
-                else None,  # Assuming entity has to_dict method
-            }
-        )
+        data = {
+            "name": self.name,
+            "description": self.description,
+            "source": self.source.to_dict(),  # We'll need to implement to_dict method for the DataSource subclasses
+            "features": [
+                feature.to_dict() for feature in self.features
+            ],  # We'll need to implement to_dict for Feature
+            "entity": self.entity.to_dict()
+            if self.entity
+            else None,  # Assuming entity has to_dict method
+        }
+        if self.templates:
+            data["templates"] = [template.to_dict() for template in self.templates]
+        return json.dumps(data)
 
     @classmethod
     def from_json(cls, json_str: str) -> "FeatureBundle":
@@ -116,6 +171,10 @@ class FeatureBundle:
                 for feature_dict in data_dict["features"]
             ],
             entity=Entity.from_dict(data_dict["entity"]),
+            templates=[
+                FeatureTemplate.from_dict(template_dict)
+                for template_dict in data_dict.get("templates", [])
+            ],
         )
 
     def __repr__(self):
@@ -124,7 +183,11 @@ class FeatureBundle:
         Returns:
             str: The string representation of the FeatureBundle.
         """
-        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        items = (
+            f"{k} = {v}"
+            for k, v in self.__dict__.items()
+            if not k.startswith("_cached")
+        )
         return f"<{self.__class__.__name__}({', '.join(items)})>"
 
     def to_dict(self) -> Dict[str, Any]:
@@ -133,7 +196,7 @@ class FeatureBundle:
         Returns:
             dict: A dictionary representation of the FeatureBundle.
         """
-        return {
+        data = {
             "name": self.name,
             "description": self.description,
             "source": self.source.to_dict(),  # Assuming DataSource has a to_dict method
@@ -144,6 +207,10 @@ class FeatureBundle:
             if self.entity
             else None,  # Assuming Entity has a to_dict method
         }
+        # Only bundles with templates carry the key
+        if self.templates:
+            data["templates"] = [template.to_dict() for template in self.templates]
+        return data
 
     @classmethod
     def from_dict(cls, data_dict: Dict[str, Any]) -> "FeatureBundle":
@@ -156,7 +223,6 @@ class FeatureBundle:
             FeatureBundle: A new instance of FeatureBundle.
         """
         # Retrieve the DataSource subclass using the source type from the data dictionary
-        print(data_dict, type(data_dict))
         data_source_constructor = ENUM_TO_SOURCE_CLS[data_dict["source"]["source_type"]]
 
         # Create a DataSource instance from its dictionary representation
@@ -173,6 +239,10 @@ class FeatureBundle:
             entity=Entity.from_dict(data_dict["entity"])
             if data_dict["entity"]
             else None,
+            templates=[
+                FeatureTemplate.from_dict(template_dict)
+                for template_dict in data_dict.get("templates", [])
+            ],
         )
 
     @property
@@ -180,14 +250,37 @@ class FeatureBundle:
         """
         Computes a deterministic identifier for the FeatureBundle object.
 
+        The identifier is the root of a Merkle tree over the bundle: it combines
+        ``header_identifier`` with ``features_identifier``, which in turn combines
+        the (cached) identifiers of the features. Reading it after a change only
+        rehashes what changed.
+
         Returns:
             str: The computed identifier.
         """
-        # Convert the object to its dict representation
-        data = self.to_dict()
+        return combine_hashes(self.header_identifier, self.features_identifier)
+
+    @property
+    def header_identifier(self) -> str:
+        """str: Identifies everything but the features: name, description, source
+        and entity."""
+        return combine_hashes(
+            self.name,
+            self.description,
+            self.source.identifier,
+            self.entity.identifier if self.entity else None,
+        )
 
-        # Convert the dict to a JSON string
-        serialized_data = json.dumps(data, sort_keys=True)
+    @property
+    def features_identifier(self) -> str:
+        """str: Identifies the features and templates, in order.
 
-        # Compute an MD5 hash of the JSON string
-        return md5_hash_str(serialized_data)
+        Cached until the next add_feature(s) or add_template, the only ways to
+        change the features.
+        """
+        if self._cached_features_identifier is None:
+            self._cached_features_identifier = combine_hashes(
+                *(feature.identifier for feature in self.features),
+                *(template.identifier for template in self.templates),
+            )
+        return self._cached_features_identifier
@@ -0,0 +1,242 @@
+import itertools
+import json
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, Sequence, Union
+
+from glacius.aggregation import DEFAULT_AGG, Aggregation, AggregationType
+from glacius.dsl import Expr, bind_params, find_params, param, reconstruct
+from glacius.dtypes import DataType
+from glacius.feature import Feature
+from glacius.hash_utils import md5_hash_str
+from glacius.slots import slot_items
+
+# Parameters that set the aggregation of the expanded features instead of binding
+# into the expression
+WINDOW_PARAM = "window"
+METHOD_PARAM = "method"
+AGG_PARAMS = (WINDOW_PARAM, METHOD_PARAM)
+
+
+class FeatureTemplate:
+    """A family of features: one expression over the Cartesian product of
+    parameter grids.
+
+    The template is stored and serialized as the expression plus the grids, and
+    only expanded into features when iterated. For example::
+
+        FeatureTemplate(
+            name="clicks_{category}_{window.days}d",
+            expr=lambda category: when(col("category") == category)
+            .then(col("clicks"))
+            .otherwise(0),
+            dtype=Int64,
+            params={
+                "category": ["books", "games"],
+                "window": [timedelta(days=1), timedelta(days=7)],
+            },
+            agg=Aggregation(method=AggregationType.SUM),
+        )
+
+    expands into four features. The parameters "window" (timedelta values) and
+    "method" (AggregationType values) override the window and method of ``agg``.
+    """
+
+    __slots__ = (
+        "_name",
+        "_description",
+        "_expr",
+        "_dtype",
+        "_params",
+        "_agg",
+        "_cached_identifier",
+    )
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        expr: Union[Expr, Callable[..., Expr]],
+        dtype: DataType,
+        params: Dict[str, Sequence[Any]],
+        description: str = "",
+        agg: Aggregation = DEFAULT_AGG,
+    ):
+        """Initializes a FeatureTemplate.
+
+        Args:
+            name (str): Format string of the feature names, formatted with the
+                parameters, e.g. "clicks_{category}_{window.days}d".
+            expr (Union[Expr, Callable[..., Expr]]): The expression, with
+                ``param`` placeholders, or a builder called with one ``param`` per
+                expression parameter. Builders may only use parameters as values
+                of DSL nodes or format them into column names and strings.
+            dtype (DataType): The data type of the features.
+            params (Dict[str, Sequence[Any]]): Parameter name to its values.
+            description (str, optional): Description of the features.
+            agg (Aggregation, optional): The aggregation of the features.
+
+        Raises:
+            ValueError: If the expression and the parameters don't match.
+        """
+        if callable(expr) and not isinstance(expr, Expr):
+            expr = expr(**{n: param(n) for n in params if n not in AGG_PARAMS})
+
+        expr_params = find_params(expr)
+        missing = [n for n in expr_params if n not in params]
+        unused = [n for n in params if n not in expr_params and n not in AGG_PARAMS]
+        if missing or unused:
+            raise ValueError(
+                f"Template {name}: parameters {missing} have no values and "
+                f"{unused} are not used by the expression"
+            )
+
+        self._name = name
+        self._description = description
+        self._expr = expr
+        self._dtype = dtype
+        self._params = {n: list(values) for n, values in params.items()}
+        self._agg = agg
+
+    @property
+    def name(self) -> str:
+        """str: The format string of the feature names."""
+        return self._name
+
+    @property
+    def description(self) -> str:
+        """str: A descriptive text of the features."""
+        return self._description
+
+    @property
+    def expr(self) -> Expr:
+        """Expr: The expression, with parameter placeholders."""
+        return self._expr
+
+    @property
+    def dtype(self) -> DataType:
+        """DataType: The data type of the features."""
+        return self._dtype
+
+    @property
+    def params(self) -> Dict[str, list]:
+        """Dict[str, list]: The parameter grids."""
+        return self._params
+
+    @property
+    def agg(self) -> Aggregation:
+        """Aggregation: The aggregation, before window and method parameters."""
+        return self._agg
+
+    def __len__(self) -> int:
+        """The number of features the template expands into."""
+        size = 1
+        for values in self.params.values():
+            size *= len(values)
+        return size
+
+    def iter_features(self) -> Iterator[Feature]:
+        """Expands the template lazily, in the order of the parameter grids.
+
+        Yields:
+            Feature: One feature per combination of parameter values.
+        """
+        names = list(self.params)
+        expr_names = find_params(self.expr)
+        bound: Dict[tuple, Any] = {}
+        aggs: Dict[tuple, Aggregation] = {}
+        for values in itertools.product(*self.params.values()):
+            combination = dict(zip(names, values))
+            expr_values = tuple(combination[n] for n in expr_names)
+            agg_values = (
+                combination.get(WINDOW_PARAM, self.agg.window),
+                combination.get(METHOD_PARAM, self.agg.method),
+            )
+            # Combinations that differ only in parameters the expression doesn't use
+            # (usually the aggregation) share the bound expression
+            if expr_values not in bound:
+                bound[expr_values] = bind_params(self.expr, combination)
+            if agg_values not in aggs:
+                aggs[agg_values] = Aggregation(
+                    method=agg_values[1], window=agg_values[0]
+                )
+            yield Feature(
+                name=self.name.format(**combination),
+                description=self.description,
+                expr=bound[expr_values],
+                dtype=self.dtype,
+                agg=aggs[agg_values],
+            )
+
+    def __repr__(self):
+        items = (f"{k} = {v}" for k, v in slot_items(self))
+        return f"<{self.__class__.__name__}({', '.join(items)})>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the template to its compact dictionary representation.
+
+        Returns:
+            dict: The expression SQL, with ``${name}`` placeholders, and the grids.
+        """
+        return {
+            "name": self.name,
+            "description": self.description,
+            "expr_sql": self.expr.compile(),
+            "dtype": self.dtype.value,
+            "agg": self.agg.to_dict(),
+            "params": {
+                n: [_encode_value(n, value) for value in values]
+                for n, values in self.params.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data_dict: Dict[str, Any]) -> "FeatureTemplate":
+        """Creates a FeatureTemplate from its dictionary representation.
+
+        Args:
+            data_dict (Dict[str, Any]): Dictionary representation of a template.
+
+        Returns:
+            FeatureTemplate: The template.
+        """
+        return cls(
+            name=data_dict["name"],
+            description=data_dict["description"],
+            expr=reconstruct(data_dict["expr_sql"]),
+            dtype=DataType(data_dict["dtype"]),
+            params={
+                n: [_decode_value(n, value) for value in values]
+                for n, values in data_dict["params"].items()
+            },
+            agg=Aggregation.from_dict(data_dict["agg"]),
+        )
+
+    @property
+    def identifier(self) -> str:
+        """
+        Computes a deterministic identifier for the FeatureTemplate object.
+
+        Returns:
+            str: The computed identifier.
+        """
+        identifier = getattr(self, "_cached_identifier", None)
+        if identifier is None:
+            serialized_data = json.dumps(self.to_dict(), sort_keys=True)
+            identifier = self._cached_identifier = md5_hash_str(serialized_data)
+        return identifier
+
+
+def _encode_value(name: str, value: Any) -> Any:
+    if name == WINDOW_PARAM:
+        return int(value.total_seconds())
+    if name == METHOD_PARAM:
+        return value.value
+    return value
+
+
+def _decode_value(name: str, value: Any) -> Any:
+    if name == WINDOW_PARAM:
+        return timedelta(seconds=value)
+    if name == METHOD_PARAM:
+        return AggregationType(value)
+    return value
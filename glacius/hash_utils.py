@@ -1,7 +1,72 @@
 import hashlib
+import json
+from typing import Any, Optional
 
 
 def md5_hash_str(input_str: str) -> str:
     md5_hash = hashlib.md5()
     md5_hash.update(input_str.encode("utf-8"))
     return md5_hash.hexdigest()
+
+
+def sha256_hash_str(input_str: str) -> str:
+    sha256_hash = hashlib.sha256()
+    sha256_hash.update(input_str.encode("utf-8"))
+    return sha256_hash.hexdigest()
+
+
+def combine_hashes(*hashes: Optional[str]) -> str:
+    """Hashes an ordered sequence of child hashes into their parent's hash."""
+    return md5_hash_str(json.dumps(hashes))
+
+
+FNV_OFFSET_64 = 0xCBF29CE484222325
+FNV_PRIME_64 = 0x100000001B3
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def fnv1a_64(data: bytes) -> int:
+    """The 64-bit FNV-1a hash: fast, non-cryptographic, for hash tables."""
+    h = FNV_OFFSET_64
+    for byte in data:
+        h = ((h ^ byte) * FNV_PRIME_64) & _MASK_64
+    return h
+
+
+def fnv1a_64_array(values: Any) -> "np.ndarray":
+    """Vectorized ``fnv1a_64`` of many strings (UTF-8 encoded) or bytes at once.
+
+    Args:
+        values: A sequence or numpy array of str or bytes.
+
+    Returns:
+        np.ndarray: The uint64 hashes.
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    if values.dtype.kind != "S":
+        values = values.astype(str)
+        points = values.view(np.uint32).reshape(len(values), values.itemsize // 4)
+        if points.size and points.max() < 0x80:
+            # ASCII: narrowing the UCS-4 code points is the UTF-8 encoding
+            values = points.astype(np.uint8).view(f"S{points.shape[1]}").ravel()
+        else:
+            values = np.char.encode(values, "utf-8")
+    width = values.dtype.itemsize
+    # One contiguous row per byte position
+    codes = np.ascontiguousarray(values.view(np.uint8).reshape(len(values), width).T)
+    lengths = np.char.str_len(values)
+    shortest = int(lengths.min()) if len(values) else 0
+
+    hashes = np.full(len(values), FNV_OFFSET_64, dtype=np.uint64)
+    prime = np.uint64(FNV_PRIME_64)
+    for j in range(width):
+        if j < shortest:
+            np.bitwise_xor(hashes, codes[j], out=hashes)
+            np.multiply(hashes, prime, out=hashes)
+        else:
+            # Fixed-width bytes are zero padded; stop at every value's own length
+            active = lengths > j
+            hashes[active] = (hashes[active] ^ codes[j, active]) * prime
+    return hashes
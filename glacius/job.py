@@ -6,6 +6,7 @@ class Runtime(Enum):
     EMR = "EMR"
     DATABRICKS = "Databricks"
     GCP = "GCP"
+    LOCAL = "LOCAL"
 
 
 class JobStatus(Enum):
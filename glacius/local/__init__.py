@@ -0,0 +1,16 @@
+try:
+    import numpy  # noqa: F401
+except ImportError as e:
+    raise ImportError(
+        "Local execution requires numpy: pip install 'glacius[local]'"
+    ) from e
+
+from glacius.local.engine import compute_latest_features, compute_offline_features
+from glacius.local.io import iter_file_source, read_file_source, write_table
+from glacius.local.online_store import LocalOnlineStore, materialize_local
+from glacius.local.parallel import EntityPartitionedPool
+from glacius.local.snapshot import (
+    FeatureSnapshot,
+    materialize_snapshot,
+    write_snapshot,
+)
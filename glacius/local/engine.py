@@ -0,0 +1,251 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import ContextManager, List, Optional, Tuple
+
+import numpy as np
+
+from glacius.data_sources.file import FileSource
+from glacius.data_sources.source import DataSource
+from glacius.feature_bundle import FeatureBundle
+from glacius.local.io import Table, iter_file_source, read_file_source, to_timestamps
+from glacius.local.join import (
+    aggregate_windows,
+    asof_positions,
+    common_key_dtype,
+    entity_codes,
+    normalize_keys,
+)
+from glacius.local.planner import bundle_columns, max_window, plan_bundle
+from glacius.local.parallel import EntityPartitionedPool
+from glacius.local.stream import DEFAULT_BUFFER_BYTES, StreamingJoin, prefetch
+from glacius.optimizer import CommonSubexpressions
+
+
+def compute_offline_features(
+    labels_datasource: DataSource,
+    feature_bundles: List[FeatureBundle],
+    batch_size: Optional[int] = None,
+    max_buffered_bytes: int = DEFAULT_BUFFER_BYTES,
+    num_workers: int = 1,
+) -> Table:
+    """Computes point-in-time correct features for every label in-process.
+
+    Every feature is aggregated over the events of the label's entity that happened
+    in ``(label_ts - agg.window, label_ts]``.
+
+    Args:
+        labels_datasource (DataSource): The label spine. Must be a FileSource.
+        feature_bundles (List[FeatureBundle]): Bundles backed by FileSources.
+        batch_size (int, optional): Stream the events in batches of this many
+            rows instead of loading them at once, for sources larger than memory.
+            Only the labels, their aggregates and the buffered batches are held in
+            memory.
+        max_buffered_bytes (int): The memory ceiling of batches read ahead of the
+            computation when streaming.
+        num_workers (int): Joins run in a pool of this many processes, on entity
+            hash partitions of the labels and events, if greater than one.
+
+    Returns:
+        Table: The label columns followed by one column per feature.
+    """
+    labels = read_file_source(_file_source(labels_datasource))
+    label_ts = to_timestamps(labels[labels_datasource.timestamp_col])
+
+    output = dict(labels)
+    with _worker_pool(num_workers, batch_size) as pool:
+        for bundle in feature_bundles:
+            output.update(
+                join_bundle(
+                    labels, label_ts, bundle, batch_size, max_buffered_bytes, pool
+                )
+            )
+    return output
+
+
+def compute_latest_features(
+    bundle: FeatureBundle,
+    as_of: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_buffered_bytes: int = DEFAULT_BUFFER_BYTES,
+    num_workers: int = 1,
+) -> Tuple[List[str], Table]:
+    """Computes the feature values of every entity of a bundle as of a point in time.
+
+    This is what materialization writes to an online store: one row per entity
+    that has events in the bundle's source, aggregated over ``(as_of - window,
+    as_of]``.
+
+    Args:
+        bundle (FeatureBundle): A bundle backed by a FileSource.
+        as_of (datetime, optional): The point in time, now by default. Naive
+            datetimes are UTC.
+        batch_size (int, optional): Stream the events in batches of this many
+            rows, see ``compute_offline_features``.
+        max_buffered_bytes (int): The memory ceiling of batches read ahead.
+        num_workers (int): Processes to compute entity partitions in parallel
+            with, see ``compute_offline_features``.
+
+    Returns:
+        Tuple[List[str], Table]: The entity ids (see ``Entity.id``) and one column
+            per feature, row-aligned.
+    """
+    source = _file_source(bundle.source)
+    if bundle.entity is None:
+        raise ValueError(f"Feature bundle {bundle.name} has no entity to join on")
+
+    keys = bundle.entity.keys
+    if batch_size is None:
+        entities = _distinct_rows(read_file_source(source, columns=keys), keys)
+    else:
+        entities = None
+        batches = iter_file_source(source, keys, batch_size=batch_size)
+        for batch in prefetch(batches, max_buffered_bytes):
+            batch = _distinct_rows(batch, keys)
+            if entities is not None:
+                batch = _distinct_rows(_concat_keys(entities, batch, keys), keys)
+            entities = batch
+        if entities is None:
+            entities = {key: np.array([], dtype=object) for key in keys}
+
+    label_ts = np.full(len(entities[keys[0]]), _as_of_micros(as_of), dtype=np.int64)
+    entity_ids = bundle.entity.ids(*(entities[key] for key in keys))
+    with _worker_pool(num_workers, batch_size) as pool:
+        features = join_bundle(
+            entities, label_ts, bundle, batch_size, max_buffered_bytes, pool
+        )
+    return entity_ids, features
+
+
+def join_bundle(
+    labels: Table,
+    label_ts: np.ndarray,
+    bundle: FeatureBundle,
+    batch_size: Optional[int] = None,
+    max_buffered_bytes: int = DEFAULT_BUFFER_BYTES,
+    pool: Optional[EntityPartitionedPool] = None,
+) -> Table:
+    """Joins the features of a single bundle onto the label spine, streaming the
+    events in batches if batch_size is set or in parallel on a pool."""
+    source = _file_source(bundle.source)
+    if bundle.entity is None:
+        raise ValueError(f"Feature bundle {bundle.name} has no entity to join on")
+
+    keys = bundle.entity.keys
+    missing = [key for key in keys if key not in labels]
+    if missing:
+        raise ValueError(f"Labels are missing entity keys {missing} of {bundle.name}")
+
+    # Only events within the longest window of some label can contribute
+    time_range = None
+    if len(label_ts):
+        time_range = (
+            int(label_ts.min()) - _micros(max_window(bundle)),
+            int(label_ts.max()),
+        )
+    if batch_size is not None:
+        join = StreamingJoin(labels, label_ts, bundle)
+        batches = iter_file_source(
+            source, bundle_columns(bundle), time_range, batch_size
+        )
+        for events in prefetch(batches, max_buffered_bytes):
+            join.update(events)
+        return join.result()
+
+    events = read_file_source(source, bundle_columns(bundle), time_range)
+    if pool is not None:
+        return pool.join(labels, label_ts, events, bundle)
+    return join_events(labels, label_ts, events, bundle)
+
+
+def join_events(
+    labels: Table,
+    label_ts: np.ndarray,
+    events: Table,
+    bundle: FeatureBundle,
+    keys: Optional[List[str]] = None,
+) -> Table:
+    """Joins the features of a bundle, computed from already loaded events, onto
+    the label spine. The entity key columns are ``bundle.entity.keys`` unless keys
+    is given, e.g. columns of already encoded entities."""
+    keys = keys or bundle.entity.keys
+    event_ts = to_timestamps(events[bundle.source.timestamp_col])
+    label_codes, event_codes = entity_codes(labels, events, keys)
+
+    order = np.lexsort((event_ts, event_codes))
+    events = {name: column[order] for name, column in events.items()}
+    event_ts, event_codes = event_ts[order], event_codes[order]
+
+    hi = asof_positions(event_codes, event_ts, label_codes, label_ts)
+    groups = plan_bundle(bundle)
+    cache = CommonSubexpressions([group.expr for group in groups]).cache()
+    features = {}
+    for group in groups:
+        windows = group.windows
+        values = np.broadcast_to(cache.evaluate(group.expr, events), event_ts.shape)
+
+        # One merge answers the lower bounds of every window length of the group.
+        lo = asof_positions(
+            event_codes,
+            event_ts,
+            np.tile(label_codes, len(windows)),
+            np.concatenate([label_ts - _micros(window) for window in windows]),
+        )
+        los = np.split(lo, len(windows))
+
+        columns = dict(zip(windows, aggregate_windows(values, los, hi, group.method)))
+        for feature in group.features:
+            features[feature.name] = columns[feature.agg.window]
+    return features
+
+
+def _worker_pool(
+    num_workers: int, batch_size: Optional[int]
+) -> ContextManager[Optional[EntityPartitionedPool]]:
+    if num_workers <= 1:
+        return nullcontext()
+    if batch_size is not None:
+        raise ValueError("Streaming (batch_size) runs in a single process")
+    return EntityPartitionedPool(num_workers)
+
+
+def _distinct_rows(table: Table, keys: List[str]) -> Table:
+    # Entities with a null key have no id
+    table, nulls = normalize_keys(table, keys)
+    table = {key: values[~nulls] for key, values in table.items()}
+    codes, _ = entity_codes(table, table, keys)
+    first = np.unique(codes, return_index=True)[1]
+    return {key: table[key][first] for key in keys}
+
+
+def _concat_keys(left: Table, right: Table, keys: List[str]) -> Table:
+    # Batches of CSV sources may infer different types for the same column
+    table = {}
+    for key in keys:
+        left_values, right_values = left[key], right[key]
+        if left_values.dtype != right_values.dtype:
+            dtype = common_key_dtype(left_values.dtype, right_values.dtype)
+            left_values = left_values.astype(dtype)
+            right_values = right_values.astype(dtype)
+        table[key] = np.concatenate([left_values, right_values])
+    return table
+
+
+def _micros(window: timedelta) -> int:
+    return int(window.total_seconds() * 1_000_000)
+
+
+def _as_of_micros(as_of: Optional[datetime]) -> int:
+    if as_of is None:
+        as_of = datetime.now(timezone.utc)
+    if as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(as_of, "us").astype(np.int64))
+
+
+def _file_source(source: DataSource) -> FileSource:
+    if not isinstance(source, FileSource):
+        raise ValueError(
+            f"{source.name} is a {source.source_type.value} source; "
+            "only FileSources can be computed locally"
+        )
+    return source
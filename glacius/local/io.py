@@ -0,0 +1,350 @@
+import csv
+import itertools
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from glacius.data_sources.file import FileSource, FileType
+
+Table = Dict[str, np.ndarray]
+
+_EPOCH = datetime(1970, 1, 1)
+
+REMOTE_SCHEMES = ("s3://", "s3a://", "s3n://", "gs://", "abfs://", "hdfs://")
+
+
+def local_path(uri: str) -> str:
+    """Resolves a FileSource uri to a path on the local filesystem.
+
+    Args:
+        uri (str): A plain path or a ``file://`` uri.
+
+    Returns:
+        str: The local path.
+    """
+    if uri.startswith(REMOTE_SCHEMES):
+        raise ValueError(
+            f"{uri} is not a local path. Mount the data locally or use a remote runtime."
+        )
+    if uri.startswith("file://"):
+        return uri[len("file://") :]
+    return uri
+
+
+def infer_column(values: List[str]) -> np.ndarray:
+    """Converts a list of raw CSV strings into the narrowest numpy column.
+
+    Integers become int64, numbers with nulls or decimals become float64 (nulls are
+    NaN) and everything else stays an object array of str with None for nulls.
+    """
+    raw = np.array(values, dtype=object)
+    nulls = raw == ""
+    if not nulls.any():
+        try:
+            return raw.astype(np.int64)
+        except (TypeError, ValueError):
+            pass
+    try:
+        column = np.where(nulls, "nan", raw).astype(np.float64)
+        if not nulls.all():
+            return column
+    except (TypeError, ValueError):
+        pass
+    raw[nulls] = None
+    return raw
+
+
+def to_timestamps(column: np.ndarray) -> np.ndarray:
+    """Normalizes a timestamp column to int64 microseconds since the epoch.
+
+    Numeric columns are interpreted as epoch seconds, strings as ISO 8601.
+    """
+    if np.issubdtype(column.dtype, np.datetime64):
+        return column.astype("datetime64[us]").astype(np.int64)
+    if np.issubdtype(column.dtype, np.number):
+        return (column.astype(np.float64) * 1_000_000).astype(np.int64)
+    stripped = [value[:-1] if value.endswith("Z") else value for value in column]
+    return np.array(stripped, dtype="datetime64[us]").astype(np.int64)
+
+
+def read_file_source(
+    source: FileSource,
+    columns: Optional[List[str]] = None,
+    time_range: Optional[Tuple[int, int]] = None,
+) -> Table:
+    """Loads a FileSource into a dictionary of numpy columns.
+
+    Parquet reads only decode the requested columns and push the time range down
+    to the reader, which skips row groups whose statistics are outside of it. Of
+    partitioned sources, only the partitions of the time range are opened.
+
+    Args:
+        source (FileSource): The source to read.
+        columns (List[str], optional): Only return these columns.
+        time_range (Tuple[int, int], optional): Only return rows whose timestamp
+            is within these bounds (inclusive), in microseconds since the epoch.
+            ``columns`` must then include the timestamp column.
+
+    Returns:
+        Table: Column name to numpy array.
+    """
+    tables = []
+    for path in source_files(source, time_range):
+        if source.file_type == FileType.PARQUET:
+            tables.append(
+                _read_parquet(path, columns, source.timestamp_col, time_range)
+            )
+        else:
+            tables.append(_read_csv(path, columns))
+    table = _concat_tables(tables, columns)
+    if time_range is None:
+        return table
+
+    # Pushdown may keep extra rows (e.g. of coarser timestamp types)
+    timestamps = to_timestamps(table[source.timestamp_col])
+    keep = (timestamps >= time_range[0]) & (timestamps <= time_range[1])
+    if keep.all():
+        return table
+    return {name: column[keep] for name, column in table.items()}
+
+
+def iter_file_source(
+    source: FileSource,
+    columns: Optional[List[str]] = None,
+    time_range: Optional[Tuple[int, int]] = None,
+    batch_size: int = 65536,
+) -> Iterator[Table]:
+    """Streams a FileSource as record batches instead of loading it at once.
+
+    Takes the same column, time range and partition pruning as
+    ``read_file_source``; batches hold at most batch_size rows and only the rows
+    within the time range.
+
+    Args:
+        source (FileSource): The source to read.
+        columns (List[str], optional): Only return these columns.
+        time_range (Tuple[int, int], optional): Only return rows whose timestamp
+            is within these bounds (inclusive), in microseconds since the epoch.
+        batch_size (int): The maximum number of rows per batch.
+
+    Yields:
+        Table: Column name to numpy array, for every batch.
+    """
+    paths = source_files(source, time_range)
+    if source.file_type == FileType.PARQUET:
+        batches = _iter_parquet(
+            paths, columns, source.timestamp_col, time_range, batch_size
+        )
+    else:
+        batches = (
+            batch for path in paths for batch in _iter_csv(path, columns, batch_size)
+        )
+
+    for batch in batches:
+        if time_range is not None:
+            timestamps = to_timestamps(batch[source.timestamp_col])
+            keep = (timestamps >= time_range[0]) & (timestamps <= time_range[1])
+            if not keep.all():
+                batch = {name: column[keep] for name, column in batch.items()}
+        if len(next(iter(batch.values()), ())):
+            yield batch
+
+
+def source_files(
+    source: FileSource, time_range: Optional[Tuple[int, int]] = None
+) -> List[str]:
+    """The local files to read for a time range of a FileSource.
+
+    Args:
+        source (FileSource): The source.
+        time_range (Tuple[int, int], optional): Bounds (inclusive) of the event
+            timestamps of interest, in microseconds since the epoch. Partitioned
+            sources are pruned to the partitions of this range.
+
+    Returns:
+        List[str]: The paths, in partition order.
+    """
+    root = local_path(source.uri)
+    if source.partition_by is None:
+        return [root]
+
+    if time_range is None:
+        prefix = f"{source.partition_by}="
+        partitions = [
+            os.path.join(root, name)
+            for name in sorted(os.listdir(root))
+            if name.startswith(prefix)
+        ]
+    else:
+        start, end = (_EPOCH + timedelta(microseconds=t) for t in time_range)
+        partitions = [
+            local_path(uri)
+            for uri in source.partition_paths(start, end)
+            if os.path.isdir(local_path(uri))
+        ]
+
+    # Skip markers and metadata such as _SUCCESS and .crc files
+    return [
+        os.path.join(partition, name)
+        for partition in partitions
+        for name in sorted(os.listdir(partition))
+        if not name.startswith(("_", "."))
+    ]
+
+
+def _concat_tables(tables: List[Table], columns: Optional[List[str]]) -> Table:
+    if len(tables) == 1:
+        return tables[0]
+    if not tables:
+        return {name: np.array([], dtype=object) for name in columns or []}
+    return {
+        name: np.concatenate([table[name] for table in tables]) for name in tables[0]
+    }
+
+
+def _read_csv(path: str, columns: Optional[List[str]]) -> Table:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        raw_columns = list(zip(*reader)) or [()] * len(header)
+
+    wanted = set(columns) if columns is not None else set(header)
+    return {
+        name: infer_column(list(values))
+        for name, values in zip(header, raw_columns)
+        if name in wanted
+    }
+
+
+def _iter_csv(
+    path: str, columns: Optional[List[str]], batch_size: int
+) -> Iterator[Table]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        wanted = [
+            i for i, name in enumerate(header) if columns is None or name in columns
+        ]
+        while True:
+            rows = list(itertools.islice(reader, batch_size))
+            if not rows:
+                return
+            raw_columns = list(zip(*rows))
+            yield {header[i]: infer_column(list(raw_columns[i])) for i in wanted}
+
+
+def _iter_parquet(
+    paths: List[str],
+    columns: Optional[List[str]],
+    timestamp_col: str,
+    time_range: Optional[Tuple[int, int]],
+    batch_size: int,
+) -> Iterator[Table]:
+    if not paths:
+        return
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "Reading parquet sources locally requires pyarrow: pip install 'glacius[local]'"
+        ) from e
+
+    dataset = ds.dataset(paths, format="parquet")
+    filters = None
+    if time_range is not None:
+        filters = _time_filter(dataset.schema.field(timestamp_col), time_range)
+    # Read ahead at most one batch, the caller bounds buffering (see prefetch)
+    for batch in dataset.to_batches(
+        columns=columns,
+        filter=filters,
+        batch_size=batch_size,
+        batch_readahead=1,
+        fragment_readahead=1,
+    ):
+        yield {
+            name: batch.column(name).to_numpy(zero_copy_only=False)
+            for name in batch.schema.names
+        }
+
+
+def _read_parquet(
+    path: str,
+    columns: Optional[List[str]],
+    timestamp_col: str,
+    time_range: Optional[Tuple[int, int]],
+) -> Table:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Reading parquet sources locally requires pyarrow: pip install 'glacius[local]'"
+        ) from e
+
+    filters = None
+    if time_range is not None:
+        field = pq.read_schema(path).field(timestamp_col)
+        filters = _time_filter(field, time_range)
+    table = pq.read_table(path, columns=columns, filters=filters)
+    return {
+        name: table.column(name).to_numpy(zero_copy_only=False)
+        for name in table.column_names
+    }
+
+
+def _time_filter(field: Any, time_range: Tuple[int, int]) -> Any:
+    """A filter expression of the time range on a parquet timestamp column, or None
+    for column types without a cheap, exact comparison (e.g. strings)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    lo, hi = time_range
+    if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+        # Casting truncates, which keeps both bounds inclusive for coarser units
+        micros = pa.timestamp("us", tz=getattr(field.type, "tz", None))
+        lo = pa.scalar(lo, micros).cast(field.type, safe=False)
+        hi = pa.scalar(hi, micros).cast(field.type, safe=False)
+    elif pa.types.is_integer(field.type):
+        lo, hi = lo // 1_000_000, hi // 1_000_000
+    elif pa.types.is_floating(field.type):
+        # Widened by a microsecond against rounding, the exact check comes after
+        lo, hi = (lo - 1) / 1_000_000, (hi + 1) / 1_000_000
+    else:
+        return None
+    return (pc.field(field.name) >= lo) & (pc.field(field.name) <= hi)
+
+
+def write_table(table: Table, path: str, file_type: FileType) -> None:
+    """Writes a table of numpy columns to a local CSV or Parquet file.
+
+    Args:
+        table (Table): Column name to numpy array.
+        path (str): The output path or ``file://`` uri.
+        file_type (FileType): The file format to write.
+    """
+    path = local_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if file_type == FileType.PARQUET:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table(table), path)
+        return
+
+    names = list(table)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(_csv_values(table[name]) for name in names)))
+
+
+def _csv_values(column: np.ndarray) -> List:
+    if np.issubdtype(column.dtype, np.datetime64):
+        return list(np.datetime_as_string(column))
+    if np.issubdtype(column.dtype, np.floating):
+        return ["" if np.isnan(value) else value for value in column.tolist()]
+    return ["" if value is None else value for value in column.tolist()]
@@ -0,0 +1,196 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from glacius.aggregation import AggregationType
+from glacius.local.io import Table
+from glacius.local.window import sliding_aggregate
+
+
+def entity_codes(
+    left: Table, right: Table, keys: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Maps the entity keys of two tables onto a shared dense integer code.
+
+    Rows of ``left`` and ``right`` with equal values for every key column get the
+    same code, so the join below only ever has to compare integers. Keys are
+    compared by value: integral floats (integer columns with nulls, as inferred
+    from CSV) equal integers. Rows with a null key match no row of the other
+    table; their codes are negative.
+    """
+    n_left = len(left[keys[0]])
+    nulls = np.zeros(n_left + len(right[keys[0]]), dtype=bool)
+    key_codes = []
+    for key in keys:
+        left_values, left_nulls = _key_values(left[key])
+        right_values, right_nulls = _key_values(right[key])
+        if left_values.dtype != right_values.dtype:
+            dtype = common_key_dtype(left_values.dtype, right_values.dtype)
+            left_values = left_values.astype(dtype)
+            right_values = right_values.astype(dtype)
+        values = np.concatenate([left_values, right_values])
+        nulls |= np.concatenate([left_nulls, right_nulls])
+        key_codes.append(np.unique(values, return_inverse=True)[1].ravel())
+
+    if len(key_codes) == 1:
+        codes = key_codes[0]
+    else:
+        codes = np.unique(np.stack(key_codes, axis=1), axis=0, return_inverse=True)[1]
+        codes = codes.ravel()
+
+    codes = codes.astype(np.int64)
+    codes[:n_left][nulls[:n_left]] = -2
+    codes[n_left:][nulls[n_left:]] = -1
+    return codes[:n_left], codes[n_left:]
+
+
+def normalize_keys(table: Table, keys: List[str]) -> Tuple[Table, np.ndarray]:
+    """Normalizes key columns for comparison by value, see ``entity_codes``.
+
+    Returns:
+        Tuple[Table, np.ndarray]: The normalized key columns, and a mask of the
+            rows with a null key, whose normalized values are placeholders.
+    """
+    nulls = np.zeros(len(table[keys[0]]), dtype=bool)
+    normalized = {}
+    for key in keys:
+        normalized[key], key_nulls = _key_values(table[key])
+        nulls |= key_nulls
+    return normalized, nulls
+
+
+def common_key_dtype(left: np.dtype, right: np.dtype) -> np.dtype:
+    """The dtype to compare two normalized key columns of different dtypes in."""
+    if left.kind in "biuf" and right.kind in "biuf":
+        return np.result_type(left, right)
+    return np.dtype(str)
+
+
+def _key_values(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """A key column normalized for comparison by value, and its null mask."""
+    if values.dtype.kind == "f":
+        nulls = np.isnan(values)
+        values = np.where(nulls, 0, values)
+        if np.array_equal(values, np.trunc(values)):
+            values = values.astype(np.int64)
+        return values, nulls
+    if values.dtype.kind in "mM":
+        return values, np.isnat(values)
+    if values.dtype == object:
+        nulls = np.array([value is None for value in values], dtype=bool)
+        if nulls.any():
+            values = np.where(nulls, "", values)
+        return values, nulls
+    return values, np.zeros(len(values), dtype=bool)
+
+
+def asof_positions(
+    event_codes: np.ndarray,
+    event_ts: np.ndarray,
+    query_codes: np.ndarray,
+    query_ts: np.ndarray,
+) -> np.ndarray:
+    """As-of lookup of queries in events sorted by (code, ts).
+
+    ``event_codes``/``event_ts`` must be sorted by (code, ts). For every query the
+    result is the number of events ordered at or before (code, ts), so
+    ``events[lo:hi]`` with ``lo``/``hi`` computed for two query timestamps of the
+    same entity is exactly the events of that entity in the half open interval
+    (lo_ts, hi_ts].
+    """
+    # Ranks of the timestamps among the distinct event timestamps make (code, ts)
+    # one int64 key with the same order, and the merge a binary search.
+    distinct_ts = np.unique(event_ts)
+    stride = len(distinct_ts) + 1
+    event_keys = event_codes.astype(np.int64) * stride + np.searchsorted(
+        distinct_ts, event_ts, side="right"
+    )
+    query_keys = query_codes.astype(np.int64) * stride + np.searchsorted(
+        distinct_ts, query_ts, side="right"
+    )
+    return np.searchsorted(event_keys, query_keys, side="right").astype(np.int64)
+
+
+def is_null(values: np.ndarray) -> np.ndarray:
+    if np.issubdtype(values.dtype, np.floating):
+        return np.isnan(values)
+    if values.dtype == object:
+        return np.array([value is None for value in values], dtype=bool)
+    return np.zeros(len(values), dtype=bool)
+
+
+def aggregate_windows(
+    values: np.ndarray,
+    los: Sequence[np.ndarray],
+    hi: np.ndarray,
+    method: AggregationType,
+) -> List[np.ndarray]:
+    """Aggregates ``values[lo[i]:hi[i]]`` for every window i of every ``lo``.
+
+    Every ``lo`` is the lower bound of one window length; all of them share the
+    upper bound ``hi`` and are answered from the same pass over ``values``. SUM/AVG
+    are looked up in one set of running sums (prefix arrays) and LATEST comes from
+    the as-of position, all vectorized. MIN/MAX/DISTINCT sweep the windows with the
+    incremental kernels in ``glacius.local.window``. Null values are skipped, and
+    empty windows produce a null (NaN for numeric results, None otherwise).
+
+    Returns:
+        List[np.ndarray]: One result column per ``lo``.
+    """
+    nulls = is_null(values)
+
+    if method == AggregationType.LATEST:
+        if not len(values):
+            return [_null_column(values.dtype, len(hi)) for _ in los]
+        # Position of the newest non-null event before every hi, -1 if none; it
+        # is only in the window (and of the same entity) if it is at or after lo
+        valid = np.where(nulls, -1, np.arange(len(values)))
+        last = np.concatenate([[-1], np.maximum.accumulate(valid)])[hi]
+        latest = values[np.maximum(last, 0)]
+        return [_with_nulls(latest, last < lo) for lo in los]
+
+    if method in (AggregationType.SUM, AggregationType.AVG):
+        numeric = np.where(nulls, 0, values).astype(np.float64)
+        sums = np.concatenate([[0.0], np.cumsum(numeric)])
+        counts = np.concatenate([[0], np.cumsum(~nulls)])
+        results = []
+        for lo in los:
+            total = sums[hi] - sums[lo]
+            count = counts[hi] - counts[lo]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result = total / count if method == AggregationType.AVG else total
+            results.append(np.where(count == 0, np.nan, result))
+        return results
+
+    return [
+        _to_column(results, values, method)
+        for results in sliding_aggregate(values, nulls, los, hi, method)
+    ]
+
+
+def _to_column(
+    results: list, values: np.ndarray, method: AggregationType
+) -> np.ndarray:
+    if method == AggregationType.DISTINCT:
+        return np.array(results, dtype=np.int64)
+    if np.issubdtype(values.dtype, np.number):
+        return np.array([np.nan if r is None else r for r in results], dtype=float)
+    return np.array(results, dtype=object)
+
+
+def _null_column(dtype: np.dtype, size: int) -> np.ndarray:
+    if np.issubdtype(dtype, np.number):
+        return np.full(size, np.nan)
+    return np.full(size, None, dtype=object)
+
+
+def _with_nulls(values: np.ndarray, nulls: np.ndarray) -> np.ndarray:
+    if not nulls.any():
+        return values
+    if np.issubdtype(values.dtype, np.number):
+        values = values.astype(np.float64)
+        values[nulls] = np.nan
+    else:
+        values = values.astype(object)
+        values[nulls] = None
+    return values
@@ -0,0 +1,215 @@
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from glacius.dtypes import DataType
+from glacius.feature_bundle import FeatureBundle
+from glacius.local.engine import compute_latest_features
+from glacius.local.io import Table, local_path
+
+# Stays below SQLITE_MAX_VARIABLE_NUMBER of old sqlite builds (999)
+_MAX_VARIABLES = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS online_features (
+    entity_id TEXT NOT NULL,
+    feature_name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (entity_id, feature_name)
+) WITHOUT ROWID
+"""
+
+
+class LocalOnlineStore:
+    """An embedded online store: the latest feature values of entities in a
+    single sqlite file on disk.
+
+    Reads have the interface and response shape of ``Client.get_online_features``,
+    so the store can serve features at the edge or on-prem without a network hop,
+    or be used as a test bed for feature logic. Values are keyed by (entity id,
+    feature name) in a clustered primary key, so a lookup is one index seek per
+    value. The store is thread safe.
+
+    Example:
+        store = LocalOnlineStore("/var/lib/glacius/production.sqlite")
+        materialize_local(store, [user_bundle])
+        store.get_online_features(["clicks_7d"], [user.id("u1")])
+    """
+
+    def __init__(self, path: str):
+        """Opens (or creates) a LocalOnlineStore.
+
+        Args:
+            path (str): The database file, a plain path or ``file://`` uri.
+        """
+        self._path = local_path(path)
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __len__(self) -> int:
+        """The number of stored values."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM online_features"
+            ).fetchone()[0]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}(path = {self._path})>"
+
+    def write(self, entity_ids: List[str], features: Table) -> None:
+        """Upserts feature values. Only the written (entity, feature) values are
+        replaced; other stored values are kept, see ``replace_features``.
+
+        Args:
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            features (Table): Feature name to values, row-aligned with entity_ids.
+                NaN values are stored as null.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO online_features VALUES (?, ?, ?)",
+                _rows(entity_ids, features),
+            )
+
+    def replace_features(self, entity_ids: List[str], features: Table) -> None:
+        """Replaces every stored value of the given features with new values.
+
+        In the same transaction, all stored values of these features are deleted
+        and the new ones inserted, so entities missing from entity_ids stop being
+        served for them and readers never see a mix of runs. Other features are
+        left untouched.
+
+        Args:
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            features (Table): Feature name to values, row-aligned with entity_ids.
+        """
+        names = list(features)
+        with self._lock, self._connection:
+            for start in range(0, len(names), _MAX_VARIABLES):
+                chunk = names[start : start + _MAX_VARIABLES]
+                self._connection.execute(
+                    "DELETE FROM online_features "
+                    f"WHERE feature_name IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO online_features VALUES (?, ?, ?)",
+                _rows(entity_ids, features),
+            )
+
+    def get_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        as_matrix: bool = False,
+        dtypes: Optional[Dict[str, DataType]] = None,
+        default: Optional[Any] = None,
+    ):
+        """Looks up the latest feature values of entities.
+
+        Args:
+            feature_names (List[str]): The features to fetch.
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            as_matrix (bool): Return an OnlineFeatureMatrix (entities x features
+                numpy matrix in request order) instead of a dictionary.
+            dtypes (Dict[str, DataType], optional): Feature name to Feature.dtype,
+                picks the matrix dtype.
+            default (Any, optional): Matrix value of missing features.
+
+        Returns:
+            Entity id to feature name to value, like the online store response, or
+            an OnlineFeatureMatrix. Entities without values are left out.
+        """
+        response: Dict[str, Dict[str, Any]] = {}
+        names = list(dict.fromkeys(feature_names))
+        ids = list(dict.fromkeys(entity_ids))
+        step = max(1, _MAX_VARIABLES - len(names))
+        with self._lock:
+            for start in range(0, len(ids), step):
+                for entity_id, feature_name, value in self._select(
+                    ids[start : start + step], names
+                ):
+                    response.setdefault(entity_id, {})[feature_name] = value
+
+        if not as_matrix:
+            return response
+
+        from glacius.online_matrix import decode_online_matrix
+
+        return decode_online_matrix(
+            response, feature_names, entity_ids, dtypes, default
+        )
+
+    def _select(
+        self, entity_ids: List[str], feature_names: List[str]
+    ) -> Iterator[Tuple[str, str, Any]]:
+        entity_params = ", ".join("?" * len(entity_ids))
+        feature_params = ", ".join("?" * len(feature_names))
+        return self._connection.execute(
+            "SELECT entity_id, feature_name, value FROM online_features "
+            f"WHERE entity_id IN ({entity_params}) "
+            f"AND feature_name IN ({feature_params})",
+            [*entity_ids, *feature_names],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "LocalOnlineStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def materialize_local(
+    store: LocalOnlineStore,
+    feature_bundles: List[FeatureBundle],
+    as_of: Optional[datetime] = None,
+    num_workers: int = 1,
+) -> int:
+    """Computes the latest feature values of every entity and writes them to a
+    local online store, replacing what earlier runs wrote for these features.
+
+    Args:
+        store (LocalOnlineStore): The store to write to.
+        feature_bundles (List[FeatureBundle]): Bundles backed by FileSources.
+        as_of (datetime, optional): Aggregate windows ending at this point in time
+            instead of now, e.g. to replay historical data. Naive datetimes are UTC.
+        num_workers (int): Processes to compute entity partitions in parallel with.
+
+    Returns:
+        int: The number of entity rows written, summed over bundles.
+    """
+    written = 0
+    for bundle in feature_bundles:
+        entity_ids, features = compute_latest_features(
+            bundle, as_of, num_workers=num_workers
+        )
+        store.replace_features(entity_ids, features)
+        written += len(entity_ids)
+    return written
+
+
+def _rows(entity_ids: List[str], features: Table) -> Iterator[Tuple[str, str, Any]]:
+    for feature_name, column in features.items():
+        for entity_id, value in zip(entity_ids, column.tolist()):
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            yield entity_id, feature_name, value
@@ -0,0 +1,213 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from glacius.dsl import find_columns
+from glacius.feature_bundle import FeatureBundle
+from glacius.local.io import Table
+from glacius.local.join import entity_codes
+
+# Column kinds with a fixed-width buffer: bool, integers, floats, datetimes
+_SHAREABLE_KINDS = "biufmM"
+_LABEL_TS = "__label_ts__"
+_ENTITY = "__entity__"
+
+ColumnSpec = Tuple[str, Any]
+
+
+def partition_rows(codes: np.ndarray, num_partitions: int) -> List[np.ndarray]:
+    """Splits rows into partitions by their entity.
+
+    Rows with the same entity code land in the same partition, so with codes of
+    ``entity_codes`` every entity's labels and events meet in one partition.
+
+    Args:
+        codes (np.ndarray): The dense integer entity code of every row.
+        num_partitions (int): The number of partitions.
+
+    Returns:
+        List[np.ndarray]: The ascending row indices of every partition.
+    """
+    partitions = codes % num_partitions
+    order = np.argsort(partitions, kind="stable")
+    counts = np.bincount(partitions, minlength=num_partitions)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+class SharedTables:
+    """Shared memory blocks holding tables for worker processes.
+
+    Fixed-width columns are copied once into shared memory and attached by the
+    workers without pickling their data. Object columns (e.g. strings) are
+    pickled with the task, so entity keys are shared as integer codes instead;
+    only string columns that feature expressions read are pickled. Blocks are
+    released when the context exits.
+    """
+
+    def __init__(self):
+        self._blocks: List[SharedMemory] = []
+
+    def share(self, table: Table, rows: np.ndarray) -> Dict[str, ColumnSpec]:
+        """Shares some rows of a table.
+
+        Args:
+            table (Table): The table.
+            rows (np.ndarray): The indices of the rows to share.
+
+        Returns:
+            Dict[str, ColumnSpec]: Picklable column specs, see ``attach_table``.
+        """
+        specs = {}
+        for name, column in table.items():
+            if column.dtype.kind not in _SHAREABLE_KINDS:
+                specs[name] = ("pickled", column[rows])
+                continue
+            block = SharedMemory(create=True, size=max(len(rows), 1) * column.itemsize)
+            self._blocks.append(block)
+            shared = np.ndarray(len(rows), dtype=column.dtype, buffer=block.buf)
+            np.take(column, rows, out=shared)
+            specs[name] = ("shared", (block.name, column.dtype.str, len(rows)))
+        return specs
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedTables":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def attach_table(specs: Dict[str, ColumnSpec]) -> Tuple[Table, List[SharedMemory]]:
+    """Attaches a table shared with ``SharedTables.share``.
+
+    Returns:
+        Tuple[Table, List[SharedMemory]]: The table, whose shared columns are
+            views of the blocks, and the blocks, to close once the table is no
+            longer referenced.
+    """
+    table, blocks = {}, []
+    for name, (kind, value) in specs.items():
+        if kind == "pickled":
+            table[name] = value
+            continue
+        block_name, dtype, size = value
+        block = SharedMemory(name=block_name)
+        blocks.append(block)
+        table[name] = np.ndarray(size, dtype=np.dtype(dtype), buffer=block.buf)
+    return table, blocks
+
+
+def _join_partition(
+    bundle_dict: Dict[str, Any],
+    label_specs: Dict[str, ColumnSpec],
+    event_specs: Dict[str, ColumnSpec],
+) -> Table:
+    from glacius.local.engine import join_events
+
+    labels, label_blocks = attach_table(label_specs)
+    events, event_blocks = attach_table(event_specs)
+    label_ts = labels.pop(_LABEL_TS)
+    bundle = FeatureBundle.from_dict(bundle_dict)
+    result = join_events(labels, label_ts, events, bundle, keys=[_ENTITY])
+    # Own copies, so no view of the shared blocks outlives them
+    features = {name: np.array(column) for name, column in result.items()}
+
+    del labels, events, label_ts, result
+    for block in label_blocks + event_blocks:
+        block.close()
+    return features
+
+
+class EntityPartitionedPool:
+    """A process pool that runs point-in-time joins in parallel, one entity hash
+    partition per task.
+
+    Labels and events are partitioned by entity, so every worker runs the full
+    join and aggregations of its partition independently, and the results are
+    scattered back into label order. Entities are encoded once, into dense codes
+    that both replace the key columns in the workers and pick the partitions.
+    """
+
+    def __init__(self, num_workers: int):
+        """Starts an EntityPartitionedPool.
+
+        Args:
+            num_workers (int): The number of worker processes and partitions.
+        """
+        self._num_workers = num_workers
+        self._executor = ProcessPoolExecutor(max_workers=num_workers)
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    def join(
+        self, labels: Table, label_ts: np.ndarray, events: Table, bundle: FeatureBundle
+    ) -> Table:
+        """Joins the features of a bundle onto the label spine, see
+        ``glacius.local.engine.join_events``."""
+        if not len(label_ts):
+            from glacius.local.engine import join_events
+
+            return join_events(labels, label_ts, events, bundle)
+
+        keys = bundle.entity.keys
+        label_codes, event_codes = entity_codes(labels, events, keys)
+        label_parts = partition_rows(label_codes, self._num_workers)
+        event_parts = partition_rows(event_codes, self._num_workers)
+        label_columns = {_ENTITY: label_codes, _LABEL_TS: label_ts}
+
+        # Key columns are replaced by the codes, unless an expression reads them
+        read = {
+            column
+            for feature in bundle.iter_features()
+            for column in find_columns(feature.expr)
+        }
+        event_columns = {
+            name: column
+            for name, column in events.items()
+            if name not in keys or name in read
+        }
+        event_columns[_ENTITY] = event_codes
+
+        bundle_dict = bundle.to_dict()
+        with SharedTables() as shared:
+            futures = [
+                self._executor.submit(
+                    _join_partition,
+                    bundle_dict,
+                    shared.share(label_columns, label_rows),
+                    shared.share(event_columns, event_rows),
+                )
+                for label_rows, event_rows in zip(label_parts, event_parts)
+                if len(label_rows)
+            ]
+            results = [future.result() for future in futures]
+
+        features: Table = {}
+        nonempty = [rows for rows in label_parts if len(rows)]
+        for rows, result in zip(nonempty, results):
+            for name, column in result.items():
+                if name not in features:
+                    features[name] = np.empty(len(label_ts), dtype=column.dtype)
+                elif features[name].dtype != column.dtype:
+                    dtype = np.result_type(features[name].dtype, column.dtype)
+                    features[name] = features[name].astype(dtype)
+                features[name][rows] = column
+        return features
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "EntityPartitionedPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
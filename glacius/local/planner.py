@@ -0,0 +1,71 @@
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from glacius.aggregation import AggregationType
+from glacius.dsl import Expr, find_columns
+from glacius.feature import Feature
+from glacius.feature_bundle import FeatureBundle
+
+
+class ScanGroup:
+    """Features of a bundle that share an expression and an aggregation method and
+    only differ in their window length. A group is computed with a single scan
+    over the sorted events: the expression is evaluated once and every window is
+    answered from the same pass."""
+
+    def __init__(self, expr: Expr, method: AggregationType):
+        self.expr = expr
+        self.method = method
+        self.features: List[Feature] = []
+
+    @property
+    def windows(self) -> List[timedelta]:
+        """List[timedelta]: The distinct window lengths of the group, ascending."""
+        return sorted({feature.agg.window for feature in self.features})
+
+    def __repr__(self):
+        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        return f"<{self.__class__.__name__}({', '.join(items)})>"
+
+
+def plan_bundle(bundle: FeatureBundle) -> List[ScanGroup]:
+    """Groups the features of a bundle into shared scans.
+
+    Args:
+        bundle (FeatureBundle): The bundle to plan.
+
+    Returns:
+        List[ScanGroup]: One group per distinct (expression, aggregation method),
+            in order of first appearance.
+    """
+    groups: Dict[Tuple[str, AggregationType], ScanGroup] = {}
+    for feature in bundle.iter_features():
+        key = (feature.expr_sql, feature.agg.method)
+        if key not in groups:
+            groups[key] = ScanGroup(feature.expr, feature.agg.method)
+        groups[key].features.append(feature)
+    return list(groups.values())
+
+
+def bundle_columns(bundle: FeatureBundle) -> List[str]:
+    """The source columns a bundle reads: its entity keys, the timestamp column and
+    every column its feature expressions reference.
+
+    Args:
+        bundle (FeatureBundle): The bundle.
+
+    Returns:
+        List[str]: Column names, in order of first reference.
+    """
+    columns = dict.fromkeys([*bundle.entity.keys, bundle.source.timestamp_col])
+    for feature in bundle.iter_features():
+        columns.update(dict.fromkeys(find_columns(feature.expr)))
+    return list(columns)
+
+
+def max_window(bundle: FeatureBundle) -> timedelta:
+    """The longest aggregation window of the features of a bundle."""
+    return max(
+        (feature.agg.window for feature in bundle.iter_features()),
+        default=timedelta(0),
+    )
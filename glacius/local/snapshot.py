@@ -0,0 +1,403 @@
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from glacius.dtypes import NUMPY_DTYPES, DataType
+from glacius.feature_bundle import FeatureBundle
+from glacius.hash_utils import fnv1a_64_array
+from glacius.local.engine import compute_latest_features
+from glacius.local.io import Table, local_path
+from glacius.online_matrix import OnlineFeatureMatrix, matrix_dtype
+
+MAGIC = b"GLSNAP01"
+# Blocks start on cache line boundaries, so every column is aligned for its dtype
+ALIGNMENT = 64
+# The index has at least twice as many slots as entities, which keeps linear
+# probe sequences short
+LOAD_FACTOR = 0.5
+
+_PREAMBLE = struct.Struct("<8sQ")
+
+
+class FeatureSnapshot:
+    """A read-only snapshot of materialized features, memory-mapped from disk.
+
+    The file holds one fixed-width column per feature (sized by ``Feature.dtype``)
+    with a validity column, the entity ids and an open-addressing hash index over
+    them. Columns are numpy views of the mapping: nothing is deserialized or
+    copied on open, and every process that opens the file shares the same page
+    cached copy. Pickling a snapshot (e.g. to send it to a worker process) only
+    pickles its path. Write snapshots with ``write_snapshot`` or
+    ``materialize_snapshot``.
+
+    File layout: the magic bytes, the length of a JSON header and the header,
+    which holds the offsets of the blocks that follow it.
+    """
+
+    def __init__(self, path: str):
+        """Opens a FeatureSnapshot.
+
+        Args:
+            path (str): The snapshot file, a plain path or ``file://`` uri.
+
+        Raises:
+            ValueError: If the file is not a feature snapshot.
+        """
+        self._path = local_path(path)
+        with open(self._path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_size = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{self._path} is not a feature snapshot")
+        header = json.loads(self._mmap[_PREAMBLE.size : _PREAMBLE.size + header_size])
+        base = _align(_PREAMBLE.size + header_size)
+
+        def block(dtype: Any, offset: int, count: int) -> np.ndarray:
+            return np.frombuffer(self._mmap, dtype, count, base + offset)
+
+        size = header["num_entities"]
+        capacity = header["capacity"]
+        self._entity_ids = block(f"S{header['id_width']}", header["entity_ids"], size)
+        self._slot_hashes = block(np.uint64, header["slot_hashes"], capacity)
+        self._slot_rows = block(np.int64, header["slot_rows"], capacity)
+        self._dtypes: Dict[str, DataType] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._valid: Dict[str, np.ndarray] = {}
+        for feature in header["features"]:
+            name, dtype = feature["name"], DataType(feature["dtype"])
+            self._dtypes[name] = dtype
+            self._columns[name] = block(NUMPY_DTYPES[dtype], feature["values"], size)
+            self._valid[name] = block(np.bool_, feature["valid"], size)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def dtypes(self) -> Dict[str, DataType]:
+        """Dict[str, DataType]: Feature name to its data type."""
+        return self._dtypes
+
+    @property
+    def entity_ids(self) -> np.ndarray:
+        """np.ndarray: The UTF-8 encoded entity ids, in row order."""
+        return self._entity_ids
+
+    def __len__(self) -> int:
+        """The number of entities."""
+        return len(self._entity_ids)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(path = {self._path}, "
+            f"entities = {len(self)}, features = {self.feature_names})>"
+        )
+
+    def __reduce__(self):
+        return (self.__class__, (self._path,))
+
+    def close(self) -> None:
+        """Unmaps the file. Arrays returned by ``column`` and ``valid`` keep their
+        pages mapped until they are released."""
+        mapping, self._mmap = self._mmap, None
+        self._entity_ids = self._slot_hashes = self._slot_rows = None
+        self._columns, self._valid = {}, {}
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # Views handed out still use the mapping, which is unmapped once
+                # the last of them is garbage collected
+                pass
+
+    def __enter__(self) -> "FeatureSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def column(self, feature_name: str) -> np.ndarray:
+        """The values of a feature in row order, a read-only view of the file.
+        Check ``valid`` for missing values."""
+        return self._columns[feature_name]
+
+    def valid(self, feature_name: str) -> np.ndarray:
+        """Boolean view, True where the feature has a value."""
+        return self._valid[feature_name]
+
+    def rows(self, entity_ids: Sequence[str]) -> np.ndarray:
+        """Finds the rows of entities through the hash index, all at once.
+
+        Args:
+            entity_ids (Sequence[str]): The entity ids, see ``Entity.id``.
+
+        Returns:
+            np.ndarray: The int64 row of every entity id, -1 if it isn't in the
+                snapshot.
+        """
+        keys = _encode_ids(entity_ids)
+        hashes = fnv1a_64_array(keys)
+        found = np.full(len(keys), -1, dtype=np.int64)
+        if not len(self):
+            return found
+        mask = np.uint64(len(self._slot_rows) - 1)
+
+        # Probe all keys in lockstep: every round resolves the keys that hit an
+        # empty slot (absent) or their own entry, and moves the rest one slot on.
+        pending = np.arange(len(keys))
+        positions = (hashes & mask).astype(np.int64)
+        while len(pending):
+            rows = self._slot_rows[positions]
+            empty = rows == -1
+            hit = (
+                ~empty
+                & (self._slot_hashes[positions] == hashes[pending])
+                & (self._entity_ids[rows] == keys[pending])
+            )
+            found[pending[hit]] = rows[hit]
+            unresolved = ~(empty | hit)
+            pending = pending[unresolved]
+            positions = (positions[unresolved] + 1) & (len(self._slot_rows) - 1)
+        return found
+
+    def get_online_features(
+        self,
+        feature_names: List[str],
+        entity_ids: List[str],
+        as_matrix: bool = False,
+        dtypes: Optional[Dict[str, DataType]] = None,
+        default: Optional[Any] = None,
+    ):
+        """Looks up feature values of entities, like ``Client.get_online_features``.
+
+        Args:
+            feature_names (List[str]): The features to fetch.
+            entity_ids (List[str]): The entity ids, see ``Entity.id``.
+            as_matrix (bool): Return an OnlineFeatureMatrix (entities x features
+                numpy matrix in request order) instead of a dictionary.
+            dtypes (Dict[str, DataType], optional): Picks the matrix dtype,
+                the snapshot's dtypes by default.
+            default (Any, optional): Matrix value of missing features. NaN for
+                float matrices and 0 for integer matrices by default.
+
+        Returns:
+            Entity id to feature name to value, like the online store response, or
+            an OnlineFeatureMatrix. Entities without values are left out.
+        """
+        rows = self.rows(entity_ids)
+        present = np.flatnonzero(rows >= 0)
+        present_rows = rows[present]
+
+        if not as_matrix:
+            response: Dict[str, Dict[str, Any]] = {}
+            for name in feature_names:
+                values = self._columns[name][present_rows].tolist()
+                valid = self._valid[name][present_rows]
+                for i, value, is_valid in zip(present, values, valid):
+                    if is_valid:
+                        response.setdefault(entity_ids[i], {})[name] = value
+            return response
+
+        dtype = matrix_dtype(feature_names, dtypes or self._dtypes)
+        if default is None:
+            default = np.nan if dtype.kind == "f" else 0
+        values = np.full((len(entity_ids), len(feature_names)), default, dtype=dtype)
+        mask = np.zeros((len(entity_ids), len(feature_names)), dtype=bool)
+        for j, name in enumerate(feature_names):
+            valid = self._valid[name][present_rows]
+            values[present[valid], j] = self._columns[name][present_rows[valid]]
+            mask[present[valid], j] = True
+        return OnlineFeatureMatrix(values, mask, list(entity_ids), list(feature_names))
+
+
+def write_snapshot(
+    path: str,
+    entity_ids: Sequence[str],
+    features: Table,
+    dtypes: Dict[str, DataType],
+) -> None:
+    """Writes materialized features to a FeatureSnapshot file.
+
+    Args:
+        path (str): The snapshot file, a plain path or ``file://`` uri.
+        entity_ids (Sequence[str]): Unique entity ids, see ``Entity.id``.
+        features (Table): Feature name to values, row-aligned with entity_ids.
+            NaN and None are missing values.
+        dtypes (Dict[str, DataType]): Feature name to its fixed-width data type.
+
+    Raises:
+        ValueError: If entity ids repeat or a feature isn't fixed width.
+    """
+    keys = _encode_ids(entity_ids)
+    if len(np.unique(keys)) != len(keys):
+        raise ValueError("Snapshot entity ids must be unique")
+    variable = [name for name in features if dtypes[name] not in NUMPY_DTYPES]
+    if variable:
+        raise ValueError(f"Features {variable} don't have a fixed-width data type")
+
+    hashes = fnv1a_64_array(keys)
+    slot_hashes, slot_rows = _build_index(hashes)
+
+    blocks: List[np.ndarray] = [keys, slot_hashes, slot_rows]
+    header: Dict[str, Any] = {
+        "num_entities": len(keys),
+        "id_width": keys.dtype.itemsize,
+        "capacity": len(slot_rows),
+        "features": [],
+    }
+    for name, column in features.items():
+        valid, values = _fixed_width(column, np.dtype(NUMPY_DTYPES[dtypes[name]]))
+        header["features"].append({"name": name, "dtype": dtypes[name].value})
+        blocks.extend([values, valid])
+
+    offset, offsets = 0, []
+    for block in blocks:
+        offsets.append(offset)
+        offset = _align(offset + block.nbytes)
+    header["entity_ids"], header["slot_hashes"], header["slot_rows"] = offsets[:3]
+    for i, feature in enumerate(header["features"]):
+        feature["values"], feature["valid"] = offsets[3 + 2 * i : 5 + 2 * i]
+
+    path = local_path(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    encoded_header = json.dumps(header).encode("utf-8")
+    base = _align(_PREAMBLE.size + len(encoded_header))
+    # Readers may already map the previous snapshot; replace it atomically
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, len(encoded_header)))
+        f.write(encoded_header)
+        for block, block_offset in zip(blocks, offsets):
+            f.seek(base + block_offset)
+            f.write(block.tobytes())
+        f.truncate(base + offset)
+    os.replace(tmp_path, path)
+
+
+def materialize_snapshot(
+    path: str,
+    feature_bundles: List[FeatureBundle],
+    as_of: Optional[datetime] = None,
+    num_workers: int = 1,
+) -> FeatureSnapshot:
+    """Computes the latest feature values of every entity and writes them to a
+    FeatureSnapshot.
+
+    Args:
+        path (str): The snapshot file, a plain path or ``file://`` uri.
+        feature_bundles (List[FeatureBundle]): Bundles backed by FileSources.
+        as_of (datetime, optional): Aggregate windows ending at this point in time
+            instead of now. Naive datetimes are UTC.
+        num_workers (int): Processes to compute entity partitions in parallel with.
+
+    Returns:
+        FeatureSnapshot: The opened snapshot.
+    """
+    results = [
+        compute_latest_features(bundle, as_of, num_workers=num_workers)
+        for bundle in feature_bundles
+    ]
+    dtypes = {
+        feature.name: feature.dtype
+        for bundle in feature_bundles
+        for feature in bundle.iter_features()
+    }
+
+    if len(results) == 1:
+        entity_ids, features = results[0]
+    else:
+        # Entities of different bundles only share a row if their ids are equal
+        entity_ids, inverse = np.unique(
+            np.concatenate([_encode_ids(ids) for ids, _ in results]),
+            return_inverse=True,
+        )
+        features, start = {}, 0
+        for ids, columns in results:
+            rows = inverse[start : start + len(ids)]
+            start += len(ids)
+            for name, column in columns.items():
+                merged = _null_column(column.dtype, len(entity_ids))
+                merged[rows] = column
+                features[name] = merged
+
+    write_snapshot(path, entity_ids, features, dtypes)
+    return FeatureSnapshot(path)
+
+
+def _build_index(hashes: np.ndarray):
+    capacity = 8
+    while capacity * LOAD_FACTOR < len(hashes):
+        capacity *= 2
+    slot_hashes = np.zeros(capacity, dtype=np.uint64)
+    slot_rows = np.full(capacity, -1, dtype=np.int64)
+
+    # Insert all rows in lockstep: every round, each free slot takes the first row
+    # probing it and the other rows move one slot on.
+    pending = np.arange(len(hashes))
+    positions = (hashes & np.uint64(capacity - 1)).astype(np.int64)
+    while len(pending):
+        free = np.flatnonzero(slot_rows[positions] == -1)
+        slots, first = np.unique(positions[free], return_index=True)
+        placed = free[first]
+        slot_rows[slots] = pending[placed]
+        slot_hashes[slots] = hashes[pending[placed]]
+
+        waiting = np.ones(len(pending), dtype=bool)
+        waiting[placed] = False
+        pending = pending[waiting]
+        positions = (positions[waiting] + 1) & (capacity - 1)
+    return slot_hashes, slot_rows
+
+
+def _null_column(dtype: np.dtype, size: int) -> np.ndarray:
+    """A column of missing values that values of dtype can be assigned to."""
+    if dtype.kind == "f":
+        return np.full(size, np.nan, dtype=dtype)
+    if dtype.kind in "mM":
+        return np.full(size, np.datetime64("NaT"), dtype=dtype)
+    # Integers don't have a null, and NaN would round those beyond 2**53
+    return np.full(size, None, dtype=object)
+
+
+def _fixed_width(column: np.ndarray, dtype: np.dtype):
+    if column.dtype == object:
+        valid = np.array([value is not None for value in column], dtype=bool)
+    elif column.dtype.kind == "f":
+        valid = ~np.isnan(column)
+    elif column.dtype.kind in "mM":
+        valid = ~np.isnat(column)
+    else:
+        valid = np.ones(len(column), dtype=bool)
+
+    present = column[valid]
+    if dtype.kind == "M" and present.dtype.kind in "iuf":
+        present = present.astype(np.int64)
+    values = np.zeros(len(column), dtype=dtype)
+    values[valid] = present
+    return valid, values
+
+
+def _encode_ids(entity_ids: Sequence[str]) -> np.ndarray:
+    ids = np.asarray(entity_ids)
+    if ids.dtype.kind == "S":
+        return ids
+    if len(ids) == 0:
+        return np.array([], dtype="S1")
+    return np.char.encode(ids.astype(str), "utf-8")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,403 @@
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+
+from glacius.aggregation import AggregationType
+from glacius.dtypes import INTEGRAL_TYPES, DataType
+from glacius.feature_bundle import FeatureBundle
+from glacius.local.io import Table, to_timestamps
+from glacius.local.join import (
+    aggregate_windows,
+    asof_positions,
+    common_key_dtype,
+    entity_codes,
+    is_null,
+)
+from glacius.local.planner import plan_bundle
+from glacius.optimizer import CommonSubexpressions
+
+# Default ceiling of the batches read ahead of the computation
+DEFAULT_BUFFER_BYTES = 256 * 1024 * 1024
+
+_NUMERIC_TYPES = INTEGRAL_TYPES | {DataType.FLOAT32, DataType.FLOAT64}
+
+# Values of object columns sampled to estimate their payload
+_OBJECT_SAMPLE = 64
+
+# Ceiling of the (label, event) pairs a DISTINCT window expands at once
+_DISTINCT_CHUNK = 1 << 22
+
+
+def table_nbytes(table: Table) -> int:
+    """Approximate memory of a table. The payload of object columns (e.g. str)
+    is estimated from a sample of their values."""
+    nbytes = 0
+    for column in table.values():
+        nbytes += column.nbytes
+        if column.dtype == object and len(column):
+            sample = column[:: max(len(column) // _OBJECT_SAMPLE, 1)]
+            payload = sum(sys.getsizeof(value) for value in sample)
+            nbytes += payload * len(column) // len(sample)
+    return nbytes
+
+
+def prefetch(
+    batches: Iterator[Table], max_buffered_bytes: int = DEFAULT_BUFFER_BYTES
+) -> Iterator[Table]:
+    """Reads batches ahead of their consumer in a background thread.
+
+    Reading (I/O and parsing) overlaps with the consumer's computation, and the
+    reader blocks while the buffered batches exceed max_buffered_bytes, so memory
+    stays bounded however far ahead reading could get. At least one batch is
+    always buffered, so batches larger than the ceiling still flow.
+
+    Args:
+        batches (Iterator[Table]): The batches, e.g. of ``iter_file_source``.
+        max_buffered_bytes (int): The memory ceiling of buffered batches.
+
+    Yields:
+        Table: The batches, in order.
+    """
+    condition = threading.Condition()
+    buffered: "deque[Tuple[Table, int]]" = deque()
+    state: Dict[str, Any] = {"bytes": 0, "done": False, "closed": False}
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                size = table_nbytes(batch)
+                with condition:
+                    while (
+                        buffered
+                        and state["bytes"] + size > max_buffered_bytes
+                        and not state["closed"]
+                    ):
+                        condition.wait()
+                    if state["closed"]:
+                        return
+                    buffered.append((batch, size))
+                    state["bytes"] += size
+                    condition.notify_all()
+        except BaseException as e:
+            state["error"] = e
+        finally:
+            with condition:
+                state["done"] = True
+                condition.notify_all()
+
+    reader = threading.Thread(target=produce, name="glacius-prefetch", daemon=True)
+    reader.start()
+    try:
+        while True:
+            with condition:
+                while not buffered and not state["done"]:
+                    condition.wait()
+                if not buffered:
+                    if "error" in state:
+                        raise state["error"]
+                    return
+                batch, size = buffered.popleft()
+                state["bytes"] -= size
+                condition.notify_all()
+            yield batch
+    finally:
+        with condition:
+            state["closed"] = True
+            condition.notify_all()
+
+
+class _WindowState:
+    """The aggregate of one window length for every label, folded over batches.
+
+    ``numeric`` comes from the features' dtypes and picks the null of empty
+    windows (NaN or None), also when no batch reached the labels at all.
+    """
+
+    def __init__(self, size: int, numeric: bool):
+        self.size = size
+        self.numeric = numeric
+
+    def update(
+        self,
+        values: np.ndarray,
+        nulls: np.ndarray,
+        event_ts: np.ndarray,
+        lo: np.ndarray,
+        hi: np.ndarray,
+    ) -> None:
+        raise NotImplementedError
+
+    def result(self) -> np.ndarray:
+        raise NotImplementedError
+
+
+class _SumState(_WindowState):
+    def __init__(self, size: int, numeric: bool, method: AggregationType):
+        super().__init__(size, numeric)
+        self.method = method
+        self.total = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+
+    def update(self, values, nulls, event_ts, lo, hi):
+        numeric = np.where(nulls, 0, values).astype(np.float64)
+        sums = np.concatenate([[0.0], np.cumsum(numeric)])
+        counts = np.concatenate([[0], np.cumsum(~nulls)])
+        self.total += sums[hi] - sums[lo]
+        self.count += counts[hi] - counts[lo]
+
+    def result(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.method == AggregationType.AVG:
+                result = self.total / self.count
+            else:
+                result = self.total
+        return np.where(self.count == 0, np.nan, result)
+
+
+class _ExtremumState(_WindowState):
+    """MIN/MAX: the extremum of every batch's window (from the sliding kernels),
+    combined with the extremum so far."""
+
+    def __init__(self, size: int, numeric: bool, method: AggregationType):
+        super().__init__(size, numeric)
+        self.method = method
+        self.best = None
+
+    def update(self, values, nulls, event_ts, lo, hi):
+        (window,) = aggregate_windows(values, [lo], hi, self.method)
+        if self.best is None:
+            self.best = window
+        elif self.best.dtype.kind == "f" and window.dtype.kind == "f":
+            combine = np.fmin if self.method == AggregationType.MIN else np.fmax
+            self.best = combine(self.best, window)
+        else:
+            pick = min if self.method == AggregationType.MIN else max
+            self.best = np.array(
+                [
+                    b if w is None else w if b is None else pick(b, w)
+                    for b, w in zip(self.best.tolist(), window.tolist())
+                ],
+                dtype=object,
+            )
+
+    def result(self):
+        if self.best is not None:
+            return self.best
+        if self.numeric:
+            return np.full(self.size, np.nan)
+        return np.full(self.size, None, dtype=object)
+
+
+class _LatestState(_WindowState):
+    """The non-null value of the newest event so far; later batches win ties,
+    like the stable sort of an in-memory join."""
+
+    def __init__(self, size: int, numeric: bool):
+        super().__init__(size, numeric)
+        self.value = np.full(size, None, dtype=object)
+        self.ts = np.full(size, np.iinfo(np.int64).min, dtype=np.int64)
+        self.found = np.zeros(size, dtype=bool)
+
+    def update(self, values, nulls, event_ts, lo, hi):
+        if not len(values):
+            return
+        self.numeric &= np.issubdtype(values.dtype, np.number)
+        # The newest non-null event before every hi, see aggregate_windows
+        valid = np.where(nulls, -1, np.arange(len(values)))
+        last = np.concatenate([[-1], np.maximum.accumulate(valid)])[hi]
+        newer = (last >= lo) & (event_ts[np.maximum(last, 0)] >= self.ts)
+        self.value[newer] = values[last[newer]]
+        self.ts[newer] = event_ts[last[newer]]
+        self.found |= newer
+
+    def result(self):
+        if not self.numeric:
+            return self.value
+        return np.where(self.found, self.value, np.nan).astype(np.float64)
+
+
+class _DistinctState(_WindowState):
+    """The distinct values of every label's window, as the sorted unique keys
+    ``value code * size + label`` over a sorted vocabulary of the values seen.
+
+    Memory is one int64 per distinct (label, value) pair; every batch expands its
+    windows into such pairs in chunks of at most ``_DISTINCT_CHUNK``.
+    """
+
+    def __init__(self, size: int, numeric: bool):
+        super().__init__(size, numeric)
+        self.vocabulary = None
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def update(self, values, nulls, event_ts, lo, hi):
+        present = ~nulls
+        if not self.size or not present.any():
+            return
+        vocabulary, inverse = np.unique(values[present], return_inverse=True)
+        codes = np.full(len(values), -1, dtype=np.int64)
+        codes[present] = self._merge_vocabulary(vocabulary)[inverse.ravel()]
+
+        lengths = np.maximum(hi - lo, 0)
+        ends = np.cumsum(lengths)
+        start = 0
+        while start < self.size:
+            # Labels [start, stop) expand into at most _DISTINCT_CHUNK pairs
+            offset = ends[start - 1] if start else 0
+            stop = np.searchsorted(ends, offset + _DISTINCT_CHUNK, side="right")
+            stop = min(max(stop, start + 1), self.size)
+            chunk = lengths[start:stop]
+            labels = np.repeat(np.arange(start, stop), chunk)
+            positions = np.arange(len(labels)) + np.repeat(
+                lo[start:stop] - (ends[start:stop] - chunk - offset), chunk
+            )
+            pair_codes = codes[positions]
+            found = pair_codes >= 0
+            keys = pair_codes[found] * self.size + labels[found]
+            self.keys = np.union1d(self.keys, keys)
+            start = stop
+
+    def _merge_vocabulary(self, vocabulary: np.ndarray) -> np.ndarray:
+        """Adds a batch's sorted distinct values to the vocabulary, re-codes the
+        keys and returns the codes of the batch's values."""
+        if self.vocabulary is None:
+            self.vocabulary = vocabulary
+            return np.arange(len(vocabulary), dtype=np.int64)
+        previous = self.vocabulary
+        if previous.dtype != vocabulary.dtype:
+            dtype = common_key_dtype(previous.dtype, vocabulary.dtype)
+            previous, vocabulary = previous.astype(dtype), vocabulary.astype(dtype)
+        self.vocabulary = np.union1d(previous, vocabulary)
+        # The vocabulary only grows, so re-coding keeps the keys sorted
+        recode = np.searchsorted(self.vocabulary, previous)
+        self.keys = recode[self.keys // self.size] * self.size + self.keys % self.size
+        return np.searchsorted(self.vocabulary, vocabulary).astype(np.int64)
+
+    def result(self):
+        return np.bincount(self.keys % max(self.size, 1), minlength=self.size)
+
+
+def _window_state(method: AggregationType, size: int, numeric: bool) -> _WindowState:
+    if method in (AggregationType.SUM, AggregationType.AVG):
+        return _SumState(size, numeric, method)
+    if method in (AggregationType.MIN, AggregationType.MAX):
+        return _ExtremumState(size, numeric, method)
+    if method == AggregationType.LATEST:
+        return _LatestState(size, numeric)
+    return _DistinctState(size, numeric)
+
+
+class StreamingJoin:
+    """The point-in-time join of one bundle onto a label spine, computed over a
+    stream of event batches.
+
+    A window over all events is the combination of the same window over every
+    batch (sums and counts add up, extrema of extrema, the newest of the newest,
+    unions of distinct values), so batches can arrive in any order and only the
+    label spine, the per-label aggregates and one batch are held in memory.
+    """
+
+    def __init__(self, labels: Table, label_ts: np.ndarray, bundle: FeatureBundle):
+        """Initializes a StreamingJoin.
+
+        Args:
+            labels (Table): The label spine, with the bundle's entity keys.
+            label_ts (np.ndarray): The label timestamps, microseconds since epoch.
+            bundle (FeatureBundle): The bundle whose features are joined.
+        """
+        if bundle.entity is None:
+            raise ValueError(f"Feature bundle {bundle.name} has no entity to join on")
+        keys = bundle.entity.keys
+        self._bundle = bundle
+
+        # The labels are coded once, as indexes into their distinct entities;
+        # batches only code their events against those.
+        codes, _ = entity_codes(labels, {key: labels[key][:0] for key in keys}, keys)
+        matched = codes >= 0
+        _, first, inverse = np.unique(
+            codes[matched], return_index=True, return_inverse=True
+        )
+        label_codes = np.full(len(codes), -1, dtype=np.int64)
+        label_codes[matched] = inverse.ravel()
+        rows = np.flatnonzero(matched)[first]
+        self._entities = {key: labels[key][rows] for key in keys}
+
+        # The aggregates are kept in (code, ts) order, so the merges below look up
+        # sorted queries. Shifting by a window keeps that order.
+        order = np.lexsort((label_ts, label_codes))
+        self._label_order = np.argsort(order)
+        self._label_codes = label_codes[order]
+        label_ts = self._label_ts = label_ts[order]
+
+        self._groups = plan_bundle(bundle)
+        self._shared = CommonSubexpressions([group.expr for group in self._groups])
+        # The lower bounds of every window length of a group come from one merge
+        # of the tiled labels, like join_events
+        self._window_queries = [
+            (
+                np.tile(self._label_codes, len(group.windows)),
+                np.concatenate(
+                    [
+                        label_ts - int(window.total_seconds() * 1_000_000)
+                        for window in group.windows
+                    ]
+                ),
+            )
+            for group in self._groups
+        ]
+        self._states = [
+            {
+                window: _window_state(
+                    group.method,
+                    len(label_ts),
+                    all(
+                        feature.dtype in _NUMERIC_TYPES
+                        for feature in group.features
+                        if feature.agg.window == window
+                    ),
+                )
+                for window in group.windows
+            }
+            for group in self._groups
+        ]
+
+    def update(self, events: Table) -> None:
+        """Folds a batch of events into the aggregates of every label."""
+        entity_codes_, event_codes = entity_codes(
+            self._entities, events, self._bundle.entity.keys
+        )
+        # Events of entities without labels are dropped
+        lookup = np.full(len(entity_codes_) + len(event_codes), -1, dtype=np.int64)
+        lookup[entity_codes_] = np.arange(len(entity_codes_))
+        event_codes = np.where(event_codes >= 0, lookup[event_codes], -1)
+        matched = np.flatnonzero(event_codes >= 0)
+        if not len(matched):
+            return
+
+        event_ts = to_timestamps(events[self._bundle.source.timestamp_col])[matched]
+        event_codes = event_codes[matched]
+        order = np.lexsort((event_ts, event_codes))
+        events = {name: column[matched[order]] for name, column in events.items()}
+        event_ts, event_codes = event_ts[order], event_codes[order]
+
+        hi = asof_positions(event_codes, event_ts, self._label_codes, self._label_ts)
+        cache = self._shared.cache()
+        for group, states, (query_codes, query_ts) in zip(
+            self._groups, self._states, self._window_queries
+        ):
+            values = np.broadcast_to(cache.evaluate(group.expr, events), event_ts.shape)
+            nulls = is_null(values)
+            lo = asof_positions(event_codes, event_ts, query_codes, query_ts)
+            for state, window_lo in zip(states.values(), np.split(lo, len(states))):
+                state.update(values, nulls, event_ts, window_lo, hi)
+
+    def result(self) -> Table:
+        """The feature columns, row-aligned with the labels."""
+        features = {}
+        for group, states in zip(self._groups, self._states):
+            for feature in group.features:
+                result = states[feature.agg.window].result()
+                features[feature.name] = result[self._label_order]
+        return features
@@ -0,0 +1,182 @@
+from collections import Counter, deque
+from typing import Any, Dict, List, Sequence, Type
+
+import numpy as np
+
+from glacius.aggregation import AggregationType
+
+
+class WindowKernel:
+    """Incrementally maintained state of one aggregation over a sliding window.
+
+    Events enter the window with ``add`` and leave it with ``remove`` in the same
+    order they were added, so no window is ever recomputed from scratch. ``i`` is
+    the position of the event in the sorted event array and ``value`` its value;
+    null values are never passed in.
+    """
+
+    def add(self, i: int, value: Any) -> None:
+        raise NotImplementedError
+
+    def remove(self, i: int, value: Any) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class SumKernel(WindowKernel):
+    """Running sum and count."""
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, i: int, value: Any) -> None:
+        self.total += value
+        self.count += 1
+
+    def remove(self, i: int, value: Any) -> None:
+        self.total -= value
+        self.count -= 1
+
+    def result(self) -> Any:
+        return self.total if self.count else None
+
+
+class AvgKernel(SumKernel):
+    def result(self) -> Any:
+        return self.total / self.count if self.count else None
+
+
+class LatestKernel(WindowKernel):
+    """Keeps the events in the window so the newest one survives evictions."""
+
+    def __init__(self):
+        self.events = deque()
+
+    def add(self, i: int, value: Any) -> None:
+        self.events.append((i, value))
+
+    def remove(self, i: int, value: Any) -> None:
+        if self.events and self.events[0][0] == i:
+            self.events.popleft()
+
+    def result(self) -> Any:
+        return self.events[-1][1] if self.events else None
+
+
+class MinKernel(WindowKernel):
+    """Monotonic deque: values increase from front to back and the front is the
+    minimum. Every event is pushed and popped at most once."""
+
+    def __init__(self):
+        self.candidates = deque()
+
+    def dominates(self, value: Any, other: Any) -> bool:
+        return value <= other
+
+    def add(self, i: int, value: Any) -> None:
+        candidates = self.candidates
+        while candidates and self.dominates(value, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((i, value))
+
+    def remove(self, i: int, value: Any) -> None:
+        if self.candidates and self.candidates[0][0] == i:
+            self.candidates.popleft()
+
+    def result(self) -> Any:
+        return self.candidates[0][1] if self.candidates else None
+
+
+class MaxKernel(MinKernel):
+    def dominates(self, value: Any, other: Any) -> bool:
+        return value >= other
+
+
+class DistinctKernel(WindowKernel):
+    """Reference counted set of the values in the window."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, i: int, value: Any) -> None:
+        self.counts[value] += 1
+
+    def remove(self, i: int, value: Any) -> None:
+        counts = self.counts
+        counts[value] -= 1
+        if not counts[value]:
+            del counts[value]
+
+    def result(self) -> Any:
+        return len(self.counts)
+
+
+KERNELS: Dict[AggregationType, Type[WindowKernel]] = {
+    AggregationType.SUM: SumKernel,
+    AggregationType.AVG: AvgKernel,
+    AggregationType.LATEST: LatestKernel,
+    AggregationType.MIN: MinKernel,
+    AggregationType.MAX: MaxKernel,
+    AggregationType.DISTINCT: DistinctKernel,
+}
+
+
+def sliding_aggregate(
+    values: np.ndarray,
+    nulls: np.ndarray,
+    los: Sequence[np.ndarray],
+    hi: np.ndarray,
+    method: AggregationType,
+) -> List[list]:
+    """Aggregates ``values[lo[i]:hi[i]]`` for every window i of every ``lo`` in
+    ``los`` in a single sweep over the events.
+
+    All window lengths share the upper bound ``hi``: an event is read once and
+    pushed into one kernel per window length, and each kernel evicts with its own
+    lower bound. Windows are visited in lexicographic order of their bounds.
+    Within one entity every bound only moves forward and the event ranges of
+    different entities don't overlap, so each event enters and leaves each kernel
+    at most once: O(len(los) * (len(values) + len(hi))).
+
+    Returns:
+        List[list]: For every ``lo`` one result per window, None for empty windows.
+    """
+    kernel_cls = KERNELS[method]
+    kernels = [kernel_cls() for _ in los]
+    starts = [0] * len(los)
+    stop = 0
+    items = values.tolist()
+    skip = nulls.tolist()
+    results = [[None] * len(hi) for _ in los]
+    bounds = [lo.tolist() for lo in los]
+    floor = np.minimum.reduce(los)
+
+    for q in np.lexsort((*los, hi, floor)).tolist():
+        q_hi = int(hi[q])
+        q_los = [int(lo[q]) for lo in bounds]
+        if q_hi < stop:
+            stop = min(q_los)
+            kernels = [kernel_cls() for _ in los]
+            starts = [stop] * len(los)
+        for k, q_lo in enumerate(q_los):
+            if q_lo >= stop:
+                kernels[k] = kernel_cls()
+                starts[k] = stop
+        while stop < q_hi:
+            if not skip[stop]:
+                for kernel in kernels:
+                    kernel.add(stop, items[stop])
+            stop += 1
+        for k, q_lo in enumerate(q_los):
+            kernel, start = kernels[k], starts[k]
+            while start < q_lo:
+                if not skip[start]:
+                    kernel.remove(start, items[start])
+                start += 1
+            starts[k] = start
+            results[k][q] = kernel.result()
+
+    return results
@@ -0,0 +1,190 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from glacius.aggregation import Aggregation, AggregationType
+from glacius.feature import Feature
+
+CacheKey = Tuple[str, str, str]  # (namespace, feature name, entity id)
+
+# Rough per-entry cost of the OrderedDict slot, key tuple and expiry float.
+_ENTRY_OVERHEAD = 200
+
+
+def ttl_for_aggregation(
+    agg: Aggregation, fraction: float = 0.01, default_ttl: float = 60.0
+) -> float:
+    """Derives a cache TTL in seconds from a feature's aggregation window.
+
+    A windowed aggregate drifts slowly relative to its window, so it may be served
+    for ``fraction`` of the window (a 7 day SUM is cached for ~100 minutes with the
+    default). LATEST values change with every new event and use ``default_ttl``.
+    """
+    if agg.method == AggregationType.LATEST:
+        return default_ttl
+    return agg.window.total_seconds() * fraction
+
+
+def merge_responses(
+    cached: Dict[str, Dict[str, Any]], fetched: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Completes the cached part of a response with freshly fetched values."""
+    for entity_id, values in fetched.items():
+        cached.setdefault(entity_id, {}).update(values)
+    return cached
+
+
+class CacheStats:
+    """Counters of an OnlineFeatureCache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        return f"<{self.__class__.__name__}({', '.join(items)})>"
+
+
+class OnlineFeatureCache:
+    """In-process LRU cache of online feature values.
+
+    Values are keyed by (namespace, feature name, entity id), expire after a
+    per-feature TTL and are evicted least recently used first once the approximate
+    memory budget is exceeded. The cache is thread safe.
+
+    Example:
+        cache = OnlineFeatureCache(max_bytes=64 * 1024**2)
+        cache.set_ttls_from_features(user_bundle.iter_features())
+        client = Client(api_key="***", namespace="production", online_cache=cache)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 60.0,
+        ttls: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes an OnlineFeatureCache.
+
+        Args:
+            max_bytes (int): Approximate memory budget of the cached entries.
+            default_ttl (float): TTL in seconds of features without their own TTL.
+            ttls (Dict[str, float], optional): TTL in seconds per feature name.
+            clock (Callable[[], float]): Monotonic time source in seconds.
+        """
+        self._max_bytes = max_bytes
+        self._default_ttl = default_ttl
+        self._ttls = dict(ttls) if ttls else {}
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, float, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        """CacheStats: Hit, miss, eviction and expiration counters."""
+        return self._stats
+
+    @property
+    def size_bytes(self) -> int:
+        """int: Approximate memory used by the cached entries."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_ttl(self, feature_name: str, ttl: float) -> None:
+        """Sets the TTL in seconds of a feature."""
+        self._ttls[feature_name] = ttl
+
+    def set_ttls_from_features(
+        self, features: Iterable[Feature], fraction: float = 0.01
+    ) -> None:
+        """Derives the TTL of every feature from its aggregation window.
+
+        See ``ttl_for_aggregation``.
+        """
+        for feature in features:
+            self._ttls[feature.name] = ttl_for_aggregation(
+                feature.agg, fraction, self._default_ttl
+            )
+
+    def lookup(
+        self, namespace: str, feature_names: List[str], entity_ids: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+        """Looks up every (feature, entity) pair of an online request.
+
+        Returns:
+            The cached values as ``{entity_id: {feature_name: value}}``, followed by
+            the entity ids and feature names that still have to be fetched to
+            complete the request.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing_entities: Dict[str, None] = {}
+        missing_features: Dict[str, None] = {}
+        now = self._clock()
+
+        with self._lock:
+            for entity_id in entity_ids:
+                values = found.setdefault(entity_id, {})
+                for feature_name in feature_names:
+                    key = (namespace, feature_name, entity_id)
+                    entry = self._entries.get(key)
+                    if entry is not None and entry[1] <= now:
+                        self._remove(key)
+                        self._stats.expirations += 1
+                        entry = None
+                    if entry is None:
+                        self._stats.misses += 1
+                        missing_entities[entity_id] = None
+                        missing_features[feature_name] = None
+                    else:
+                        self._stats.hits += 1
+                        self._entries.move_to_end(key)
+                        values[feature_name] = entry[0]
+
+        feature_names = [name for name in feature_names if name in missing_features]
+        return found, list(missing_entities), feature_names
+
+    def put(self, namespace: str, feature_name: str, entity_id: str, value: Any):
+        """Caches a single feature value."""
+        key = (namespace, feature_name, entity_id)
+        ttl = self._ttls.get(feature_name, self._default_ttl)
+        size = sys.getsizeof(feature_name) + sys.getsizeof(entity_id)
+        size += sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self._clock() + ttl, size)
+            self._size += size
+            while self._size > self._max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def put_response(self, namespace: str, response: Dict[str, Dict[str, Any]]):
+        """Caches every value of an online store response."""
+        for entity_id, values in response.items():
+            for feature_name, value in values.items():
+                self.put(namespace, feature_name, entity_id, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: CacheKey) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
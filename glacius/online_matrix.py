@@ -0,0 +1,104 @@
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from glacius.dtypes import INTEGRAL_TYPES, NUMPY_DTYPES, DataType
+
+
+class OnlineFeatureMatrix:
+    """Online features as a dense entities x features matrix.
+
+    Attributes:
+        values (np.ndarray): C-contiguous matrix with one row per requested entity
+            id and one column per requested feature name, in request order.
+            int64 if every feature is integral, float32 otherwise.
+        mask (np.ndarray): Boolean matrix, True where the online store returned a
+            value (not null, or NaN in float matrices). Missing values hold the
+            default.
+        entity_ids (List[str]): Row labels.
+        feature_names (List[str]): Column labels.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        mask: np.ndarray,
+        entity_ids: List[str],
+        feature_names: List[str],
+    ):
+        self.values = values
+        self.mask = mask
+        self.entity_ids = entity_ids
+        self.feature_names = feature_names
+
+    def __repr__(self):
+        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        return f"<{self.__class__.__name__}({', '.join(items)})>"
+
+
+def matrix_dtype(feature_names: List[str], dtypes: Optional[Dict[str, DataType]]):
+    """int64 if every feature is integral, float32 otherwise."""
+    if not dtypes:
+        return np.dtype(np.float32)
+
+    for name in feature_names:
+        dtype = dtypes.get(name)
+        # Dates and timestamps have a numpy type but no place in a numeric matrix
+        if dtype is not None and (
+            dtype not in NUMPY_DTYPES or dtype in (DataType.DATE, DataType.TIMESTAMP)
+        ):
+            raise ValueError(f"{name} has non-numeric type {dtype.value}")
+    integral = all(dtypes.get(name) in INTEGRAL_TYPES for name in feature_names)
+    return np.dtype(np.int64 if integral else np.float32)
+
+
+def decode_online_matrix(
+    response: Union[str, bytes, Dict[str, Dict[str, Any]]],
+    feature_names: List[str],
+    entity_ids: List[str],
+    dtypes: Optional[Dict[str, DataType]] = None,
+    default: Optional[Any] = None,
+) -> OnlineFeatureMatrix:
+    """Decodes an online store response into an OnlineFeatureMatrix.
+
+    The values of every entity are looked up in column order in one pass, and the
+    matrix is built by a single conversion of those rows.
+
+    Args:
+        response: The raw response body or the already decoded response.
+        feature_names (List[str]): Requested features, the column order.
+        entity_ids (List[str]): Requested entity ids, the row order.
+        dtypes (Dict[str, DataType], optional): Feature name to Feature.dtype.
+        default (Any, optional): Value of missing entries. NaN for float
+            matrices and 0 for integer matrices by default.
+
+    Returns:
+        OnlineFeatureMatrix: The decoded features.
+    """
+    dtype = matrix_dtype(feature_names, dtypes)
+    if default is None:
+        default = np.nan if dtype.kind == "f" else 0
+    if isinstance(response, (str, bytes)):
+        response = json.loads(response)
+
+    empty: Dict[str, Any] = {}
+    rows = [
+        list(map((response.get(entity_id) or empty).get, feature_names))
+        for entity_id in entity_ids
+    ]
+    shape = (len(entity_ids), len(feature_names))
+    if dtype.kind == "f":
+        # Missing values (None) convert to NaN
+        values = np.array(rows, dtype=np.float64).reshape(shape)
+        mask = ~np.isnan(values)
+        values = np.where(mask, values, default).astype(dtype)
+    else:
+        # Kept as Python ints, which may exceed the precision of a float
+        objects = np.array(rows, dtype=object).reshape(shape)
+        mask = np.not_equal(objects, None)
+        values = np.where(mask, objects, default).astype(dtype)
+
+    return OnlineFeatureMatrix(
+        np.ascontiguousarray(values), mask, list(entity_ids), list(feature_names)
+    )
@@ -0,0 +1,164 @@
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Sequence
+
+from glacius.dsl import Expr, col
+from glacius.feature_bundle import FeatureBundle
+
+
+def structural_key(expr: Expr) -> int:
+    """Key under which structurally equal expressions compare equal.
+
+    Expressions are interned, so structurally equal expressions are one object. The
+    key is only meaningful while the expression is alive.
+    """
+    return id(expr)
+
+
+class SubexpressionCache:
+    """Holds the values of shared sub-expressions for a single batch of columns.
+
+    Evaluate expressions through ``cache.evaluate(expr, columns)`` (or pass the
+    cache to ``Expr.evaluate``) so that each shared sub-expression is computed once
+    per batch no matter how many feature expressions contain it. Create a new cache
+    for every batch.
+    """
+
+    def __init__(self, shared: Mapping[int, Expr]):
+        self._shared = shared
+        self._values: Dict[int, Any] = {}
+        self.hits = 0
+
+    def evaluate(self, expr: Expr, columns: Mapping[str, Any]) -> Any:
+        if isinstance(expr, col):
+            return expr.evaluate(columns)
+
+        key = structural_key(expr)
+        if key not in self._shared:
+            return expr.evaluate(columns, self)
+        if key in self._values:
+            self.hits += 1
+        else:
+            self._values[key] = expr.evaluate(columns, self)
+        return self._values[key]
+
+
+class CommonSubexpressions:
+    """Common-subexpression elimination across a set of feature expressions.
+
+    Every sub-tree that occurs more than once (other than a bare column reference)
+    is marked as shared. Shared sub-trees are computed once per batch during local
+    evaluation and become a single named projection in the generated SQL.
+    """
+
+    def __init__(self, exprs: Sequence[Expr]):
+        self._exprs = list(exprs)
+        counts: Counter = Counter()
+        nodes: Dict[int, Expr] = {}
+
+        # A repeated sub-tree is only counted at its outermost occurrence; its own
+        # children are computed once as part of it and don't need a projection.
+        def count(expr: Any) -> None:
+            if not isinstance(expr, Expr) or isinstance(expr, col):
+                return
+            key = structural_key(expr)
+            counts[key] += 1
+            if key not in nodes:
+                nodes[key] = expr
+                for child in expr.children():
+                    count(child)
+
+        for expr in self._exprs:
+            count(expr)
+
+        self.shared: Dict[int, Expr] = {
+            key: nodes[key] for key, n in counts.items() if n > 1
+        }
+
+    @classmethod
+    def from_bundle(cls, bundle: FeatureBundle) -> "CommonSubexpressions":
+        return cls([feature.expr for feature in bundle.iter_features()])
+
+    def cache(self) -> SubexpressionCache:
+        """Returns an empty cache for evaluating one batch."""
+        return SubexpressionCache(self.shared)
+
+    def to_sql(self, source: str, names: Sequence[str]) -> str:
+        """Generates SQL computing every expression with shared projections.
+
+        Shared sub-expressions are projected once, innermost first, as
+        ``__cse_<n>`` columns and referenced by name from the expressions that
+        contain them.
+
+        Args:
+            source (str): The relation to select from, e.g. a table name.
+            names (Sequence[str]): Output column name of each expression.
+
+        Returns:
+            str: The SQL query.
+        """
+        aliases: Dict[int, str] = {}
+        levels: Dict[int, int] = {}
+        layers: List[List[str]] = []
+
+        # Children are visited before their parents, so shared nodes nested inside
+        # other shared nodes are aliased (and projected in an earlier layer) first.
+        for expr in self._exprs:
+            for node in _walk(expr):
+                key = structural_key(node)
+                if key not in self.shared or key in aliases:
+                    continue
+                level = 1 + max(
+                    (levels[k] for k in _shared_descendants(node, aliases)), default=-1
+                )
+                alias = f"__cse_{len(aliases)}"
+                sql = _substitute(node, aliases, root=True).compile()
+                aliases[key], levels[key] = alias, level
+                while len(layers) <= level:
+                    layers.append([])
+                layers[level].append(f"{sql} AS `{alias}`")
+
+        relation = source
+        for level, projections in enumerate(layers):
+            relation = (
+                f"(SELECT *, {', '.join(projections)} FROM {relation}) "
+                f"AS `__cse_layer_{level}`"
+            )
+
+        outputs = ", ".join(
+            f"{_substitute(expr, aliases).compile()} AS `{name}`"
+            for expr, name in zip(self._exprs, names)
+        )
+        return f"SELECT {outputs} FROM {relation}"
+
+
+def _walk(expr: Any):
+    """Yields every sub-expression of expr, children before parents."""
+    if not isinstance(expr, Expr):
+        return
+    for child in expr.children():
+        yield from _walk(child)
+    yield expr
+
+
+def _shared_descendants(expr: Expr, aliases: Mapping[int, str]):
+    for child in expr.children():
+        if not isinstance(child, Expr):
+            continue
+        key = structural_key(child)
+        if key in aliases:
+            yield key
+        else:
+            yield from _shared_descendants(child, aliases)
+
+
+def _substitute(expr: Any, aliases: Mapping[int, str], root: bool = False) -> Any:
+    if not isinstance(expr, Expr):
+        return expr
+    if not root:
+        alias = aliases.get(structural_key(expr))
+        if alias is not None:
+            return col(alias)
+    children = expr.children()
+    if not children:
+        return expr
+    return expr.with_children(*(_substitute(child, aliases) for child in children))
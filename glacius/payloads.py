@@ -0,0 +1,123 @@
+import json
+import zlib
+from collections.abc import Iterator as IteratorABC
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+try:
+    import zstandard
+except ImportError:  # zstd request bodies are optional
+    zstandard = None
+
+CONTENT_ENCODINGS = ("gzip", "zstd", None)
+CHUNK_SIZE = 64 * 1024
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def iter_json(value: Any) -> Iterator[str]:
+    """Encodes a value as JSON incrementally.
+
+    Like ``json.JSONEncoder.iterencode``, but iterators (e.g. generators) are
+    encoded as arrays element by element, so a payload can be serialized while
+    its parts are produced instead of after all of them exist.
+    """
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield f"{',' if i else ''}{_encoder.encode(str(key))}:"
+            yield from iter_json(item)
+        yield "}"
+    elif isinstance(value, IteratorABC):
+        yield "["
+        for i, item in enumerate(value):
+            if i:
+                yield ","
+            yield from iter_json(item)
+        yield "]"
+    else:
+        yield from _encoder.iterencode(value)
+
+
+def _compressor(content_encoding: Optional[str]) -> Any:
+    if content_encoding == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if content_encoding == "zstd":
+        if zstandard is None:
+            raise ImportError(
+                "zstd payloads require zstandard: pip install 'glacius[zstd]'"
+            )
+        return zstandard.ZstdCompressor().compressobj()
+    if content_encoding is None:
+        return None
+    raise ValueError(
+        f"Unsupported content encoding {content_encoding}, "
+        f"expected one of {CONTENT_ENCODINGS}"
+    )
+
+
+def encode_json_stream(
+    payload: Any,
+    content_encoding: Optional[str] = "gzip",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Encodes a payload into a stream of (compressed) JSON request body chunks.
+
+    Args:
+        payload (Any): The JSON payload; iterators in it are streamed as arrays.
+        content_encoding (str, optional): "gzip", "zstd" or None.
+        chunk_size (int): Bytes of JSON to collect before compressing a chunk.
+
+    Returns:
+        Iterator[bytes]: The body, in chunks.
+
+    Raises:
+        ValueError: If the content encoding is not supported.
+    """
+    return _encode_chunks(payload, _compressor(content_encoding), chunk_size)
+
+
+def _encode_chunks(payload: Any, compressor: Any, chunk_size: int) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for text in iter_json(payload):
+        buffer.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            data = "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+            chunk = compressor.compress(data) if compressor else data
+            if chunk:
+                yield chunk
+    data = "".join(buffer).encode("utf-8")
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def post_json(
+    url: str,
+    payload: Any,
+    headers: Dict[str, str],
+    content_encoding: Optional[str] = "gzip",
+) -> requests.Response:
+    """POSTs a JSON payload as a streamed, chunked and compressed request body.
+
+    Args:
+        url (str): The endpoint.
+        payload (Any): The JSON payload, see ``encode_json_stream``.
+        headers (Dict[str, str]): Request headers, e.g. the API key.
+        content_encoding (str, optional): "gzip", "zstd" or None.
+
+    Returns:
+        requests.Response: The response.
+    """
+    headers = {**headers, "Content-Type": "application/json"}
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    return requests.post(
+        url,
+        data=encode_json_stream(payload, content_encoding),
+        headers=headers,
+    )
@@ -0,0 +1,205 @@
+from typing import Any, Dict, List, Optional
+
+from glacius.feature_bundle import FeatureBundle
+from glacius.hash_utils import combine_hashes
+
+Manifest = Dict[str, Dict[str, Any]]
+
+
+def bundle_manifest_entry(bundle: FeatureBundle) -> Dict[str, Any]:
+    """Summarizes a bundle by identifiers: of the whole bundle, of everything but
+    its features ("header") and of every feature and template (by name)."""
+    members = [*bundle.features, *bundle.templates]
+    return {
+        "identifier": bundle.identifier,
+        "header": bundle.header_identifier,
+        "features": {member.name: member.identifier for member in members},
+    }
+
+
+def build_manifest(feature_bundles: List[FeatureBundle]) -> Manifest:
+    """Builds the compact manifest of registered state, keyed by bundle name."""
+    return {bundle.name: bundle_manifest_entry(bundle) for bundle in feature_bundles}
+
+
+class RegistrationDiff:
+    """The changes between a manifest of registered state and a set of bundles."""
+
+    def __init__(
+        self,
+        feature_bundles: List[Dict[str, Any]],
+        removed_bundles: List[str],
+        removed_features: Dict[str, List[str]],
+        manifest: Manifest,
+    ):
+        """Initializes a RegistrationDiff.
+
+        Args:
+            feature_bundles (List[Dict[str, Any]]): Added or changed bundle dicts,
+                marked by "partial". A partial bundle's header is unchanged and it
+                only carries its added or changed features and templates; the
+                others are complete and replace the registered bundle.
+            removed_bundles (List[str]): Names of bundles that were removed.
+            removed_features (Dict[str, List[str]]): Names of removed features by
+                bundle name, for bundles that still exist.
+            manifest (Manifest): The manifest after applying the diff.
+        """
+        self._feature_bundles = feature_bundles
+        self._removed_bundles = removed_bundles
+        self._removed_features = removed_features
+        self._manifest = manifest
+
+    @classmethod
+    def compute(
+        cls, previous: Manifest, feature_bundles: List[FeatureBundle]
+    ) -> "RegistrationDiff":
+        """Diffs bundles against the previously registered manifest.
+
+        Args:
+            previous (Manifest): The manifest of the registered state.
+            feature_bundles (List[FeatureBundle]): The complete desired state;
+                registered bundles missing here are removed.
+
+        Returns:
+            RegistrationDiff: The diff.
+        """
+        upserts = []
+        removed_features = {}
+        manifest = {}
+        for bundle in feature_bundles:
+            entry = bundle_manifest_entry(bundle)
+            manifest[bundle.name] = entry
+            old = previous.get(bundle.name)
+            if old is not None and old["identifier"] == entry["identifier"]:
+                continue
+
+            bundle_dict = bundle.to_dict()
+            bundle_dict["partial"] = (
+                old is not None and old["header"] == entry["header"]
+            )
+            if bundle_dict["partial"]:
+                old_features = old["features"]
+                for key, members in (
+                    ("features", bundle.features),
+                    ("templates", bundle.templates),
+                ):
+                    if key not in bundle_dict:
+                        continue
+                    bundle_dict[key] = [
+                        member_dict
+                        for member_dict, member in zip(bundle_dict[key], members)
+                        if old_features.get(member.name) != member.identifier
+                    ]
+                removed = [
+                    name for name in old_features if name not in entry["features"]
+                ]
+                if removed:
+                    removed_features[bundle.name] = removed
+                if not (bundle_dict["features"] or bundle_dict.get("templates")):
+                    continue
+            upserts.append(bundle_dict)
+
+        removed_bundles = [name for name in previous if name not in manifest]
+        return cls(upserts, removed_bundles, removed_features, manifest)
+
+    @property
+    def feature_bundles(self) -> List[Dict[str, Any]]:
+        return self._feature_bundles
+
+    @property
+    def removed_bundles(self) -> List[str]:
+        return self._removed_bundles
+
+    @property
+    def removed_features(self) -> Dict[str, List[str]]:
+        return self._removed_features
+
+    @property
+    def manifest(self) -> Manifest:
+        return self._manifest
+
+    def is_empty(self) -> bool:
+        """Whether the registered state is already up to date."""
+        return not (
+            self.feature_bundles or self.removed_bundles or self.removed_features
+        )
+
+    def to_payload(
+        self, commit_msg: str, base_manifest_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """The request body of an incremental registration.
+
+        Every bundle in "feature_bundles" has a "partial" flag: partial bundles
+        are merged into the registered bundle of the same name, after removing
+        its "removed_features"; complete bundles replace it.
+        """
+        return {
+            "incremental": True,
+            "base_manifest": base_manifest_id,
+            "feature_bundles": self.feature_bundles,
+            "removed_bundles": self.removed_bundles,
+            "removed_features": self.removed_features,
+            "commit_msg": commit_msg,
+        }
+
+    def __repr__(self):
+        items = (f"{k} = {v}" for k, v in self.__dict__.items())
+        return f"<{self.__class__.__name__}({', '.join(items)})>"
+
+
+def manifest_identifier(manifest: Manifest) -> str:
+    """The root hash of the namespace a manifest describes, so the server can
+    reject diffs against a state other than the one it holds."""
+    return combine_hashes(
+        *(
+            combine_hashes(name, manifest[name]["identifier"])
+            for name in sorted(manifest)
+        )
+    )
+
+
+def namespace_identifier(feature_bundles: List[FeatureBundle]) -> str:
+    """The root hash of a namespace: equal for namespaces with equal bundles,
+    regardless of bundle order. Equals ``manifest_identifier`` of its manifest."""
+    identifiers = {bundle.name: bundle.identifier for bundle in feature_bundles}
+    return combine_hashes(
+        *(combine_hashes(name, identifiers[name]) for name in sorted(identifiers))
+    )
+
+
+def diff_manifests(old: Manifest, new: Manifest) -> Dict[str, Any]:
+    """Diffs two namespace versions by walking their identifier trees.
+
+    Subtrees with equal identifiers are skipped, so the cost is proportional to
+    the number of bundles plus the features of changed bundles.
+
+    Args:
+        old (Manifest): The manifest of the older version.
+        new (Manifest): The manifest of the newer version.
+
+    Returns:
+        Dict[str, Any]: Names of "added_bundles", "removed_bundles" and
+            "changed_bundles"; the latter maps to the "added", "removed" and
+            "changed" features and whether the "header" changed.
+    """
+    changed = {}
+    for name, entry in new.items():
+        previous = old.get(name)
+        if previous is None or previous["identifier"] == entry["identifier"]:
+            continue
+        old_features, new_features = previous["features"], entry["features"]
+        changed[name] = {
+            "header": previous["header"] != entry["header"],
+            "added": [f for f in new_features if f not in old_features],
+            "removed": [f for f in old_features if f not in new_features],
+            "changed": [
+                f
+                for f, identifier in new_features.items()
+                if f in old_features and old_features[f] != identifier
+            ],
+        }
+    return {
+        "added_bundles": [name for name in new if name not in old],
+        "removed_bundles": [name for name in old if name not in new],
+        "changed_bundles": changed,
+    }
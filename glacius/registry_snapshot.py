@@ -0,0 +1,152 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from glacius.disk_cache import read_json, write_json
+from glacius.feature_template import FeatureTemplate
+
+
+class RegistrySnapshot:
+    """A local copy of the feature bundles of one namespace version.
+
+    Feature names are indexed to their bundle, so resolving names into bundle
+    dicts is a local lookup instead of a round-trip to the registry.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        namespace_version: str,
+        feature_bundles: List[Dict[str, Any]],
+        etag: Optional[str] = None,
+        fetched_at: Optional[float] = None,
+    ):
+        """Initializes a RegistrySnapshot.
+
+        Args:
+            namespace (str): The namespace.
+            namespace_version (str): The version the snapshot was pulled for.
+            feature_bundles (List[Dict[str, Any]]): Bundle dicts, see
+                ``FeatureBundle.to_dict``.
+            etag (str, optional): Validator of the registry response.
+            fetched_at (float, optional): Epoch seconds of the last (re)validation.
+        """
+        self._namespace = namespace
+        self._namespace_version = namespace_version
+        self._feature_bundles = feature_bundles
+        self._etag = etag
+        self._fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._index = {
+            feature["name"]: (i, j)
+            for i, bundle in enumerate(feature_bundles)
+            for j, feature in enumerate(bundle["features"])
+        }
+        # Features of templates are appended to their bundle's features, indexed on
+        # the first lookup that needs them
+        self._expanded: Optional[Dict[int, List[Dict[str, Any]]]] = None
+
+    @property
+    def namespace(self) -> str:
+        return self._namespace
+
+    @property
+    def namespace_version(self) -> str:
+        return self._namespace_version
+
+    @property
+    def feature_bundles(self) -> List[Dict[str, Any]]:
+        return self._feature_bundles
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._etag
+
+    @property
+    def fetched_at(self) -> float:
+        return self._fetched_at
+
+    @fetched_at.setter
+    def fetched_at(self, value: float):
+        self._fetched_at = value
+
+    def __contains__(self, feature_name: str) -> bool:
+        if feature_name not in self._index:
+            self._expand_templates()
+        return feature_name in self._index
+
+    def __len__(self) -> int:
+        self._expand_templates()
+        return len(self._index)
+
+    def _expand_templates(self) -> None:
+        if self._expanded is not None:
+            return
+        self._expanded = {}
+        for i, bundle in enumerate(self._feature_bundles):
+            features = self._expanded[i] = list(bundle["features"])
+            for template_dict in bundle.get("templates", []):
+                template = FeatureTemplate.from_dict(template_dict)
+                for feature in template.iter_features():
+                    self._index[feature.name] = (i, len(features))
+                    features.append(feature.to_dict())
+
+    def resolve(self, feature_names: List[str]) -> List[Dict[str, Any]]:
+        """Resolves feature names into bundle dicts, like the registry's filter.
+
+        Every returned bundle only contains the requested features; bundles are
+        returned in registry order.
+
+        Raises:
+            KeyError: If a feature name is not in the snapshot.
+        """
+        missing = [name for name in feature_names if name not in self]
+        if missing:
+            raise KeyError(
+                f"Features {missing} not found in {self.namespace} "
+                f"version {self.namespace_version}"
+            )
+
+        selected: Dict[int, List[int]] = {}
+        for name in dict.fromkeys(feature_names):
+            i, j = self._index[name]
+            selected.setdefault(i, []).append(j)
+
+        resolved = []
+        for i in sorted(selected):
+            bundle = self._feature_bundles[i]
+            features = self._expanded[i] if self._expanded else bundle["features"]
+            resolved.append(
+                {
+                    **{k: v for k, v in bundle.items() if k != "templates"},
+                    "features": [features[j] for j in sorted(selected[i])],
+                }
+            )
+        return resolved
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "namespace_version": self.namespace_version,
+            "etag": self.etag,
+            "fetched_at": self.fetched_at,
+            "feature_bundles": self.feature_bundles,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RegistrySnapshot":
+        return cls(
+            namespace=data["namespace"],
+            namespace_version=data["namespace_version"],
+            feature_bundles=data["feature_bundles"],
+            etag=data.get("etag"),
+            fetched_at=data.get("fetched_at"),
+        )
+
+    def save(self, path: str) -> None:
+        """Atomically writes the snapshot file."""
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RegistrySnapshot"]:
+        """Loads a snapshot file, None if there is none."""
+        data = read_json(path)
+        return cls.from_dict(data) if data is not None else None
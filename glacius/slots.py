@@ -0,0 +1,19 @@
+from typing import Any, Iterator, Tuple
+
+_MISSING = object()
+
+
+def slot_items(obj: Any) -> Iterator[Tuple[str, Any]]:
+    """Yields the assigned slots of an object as (name, value) pairs.
+
+    Slots are yielded base class first, in declaration order, which for the model
+    classes matches the order in which __init__ assigns them. Cached values
+    (``_cached*`` slots) are skipped.
+    """
+    for cls in reversed(type(obj).__mro__):
+        for name in cls.__dict__.get("__slots__", ()):
+            if name == "__weakref__" or name.startswith("_cached"):
+                continue
+            value = getattr(obj, name, _MISSING)
+            if value is not _MISSING:
+                yield name, value
@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+
+from aiohttp import web
+
+from glacius import AsyncClient
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.peers = set()
+
+        async def online_store(request):
+            body = await request.json()
+            self.requests.append((request.headers["X-API-Key"], body))
+            self.peers.add(request.transport.get_extra_info("peername"))
+            if body["feature_names"] == ["slow"]:
+                await asyncio.sleep(1)
+            if body["feature_names"] == ["missing"]:
+                return web.json_response({"detail": "not found"}, status=404)
+            return web.json_response(
+                {
+                    entity_id: {name: 1 for name in body["feature_names"]}
+                    for entity_id in body["entity_ids"]
+                }
+            )
+
+        app = web.Application()
+        app.router.add_post("/online-store", online_store)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.client = AsyncClient(
+            api_key="key",
+            namespace="development",
+            max_connections=4,
+            online_url=f"http://127.0.0.1:{port}",
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_concurrent_lookups_share_pooled_connections(self):
+        results = await asyncio.gather(
+            *(
+                self.client.get_online_features(["clicks_7d"], [f"user_id:{i}"])
+                for i in range(50)
+            )
+        )
+
+        self.assertEqual(results[3], {"user_id:3": {"clicks_7d": 1}})
+        self.assertEqual(len(self.requests), 50)
+        self.assertEqual(
+            self.requests[0],
+            (
+                "key",
+                {
+                    "namespace": "development",
+                    "feature_names": ["clicks_7d"],
+                    "entity_ids": ["user_id:0"],
+                },
+            ),
+        )
+        self.assertLessEqual(len(self.peers), 4)
+
+    async def test_per_call_deadline(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.get_online_features(["slow"], ["user_id:1"], timeout=0.05)
+
+    async def test_error_response_returns_none(self):
+        self.assertIsNone(
+            await self.client.get_online_features(["missing"], ["user_id:1"])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from glacius.batching import AsyncOnlineRequestBatcher, OnlineRequestBatcher
+
+
+def respond(feature_names, entity_ids):
+    return {
+        entity_id: {name: f"{name}@{entity_id}" for name in feature_names}
+        for entity_id in entity_ids
+    }
+
+
+class TestOnlineRequestBatcher(unittest.TestCase):
+    def test_concurrent_threads_share_requests(self):
+        calls = []
+        lock = threading.Lock()
+
+        def fetch(feature_names, entity_ids):
+            with lock:
+                calls.append((feature_names, entity_ids))
+            return respond(feature_names, entity_ids)
+
+        batcher = OnlineRequestBatcher(fetch, max_wait=0.05, max_batch_size=1000)
+        requests = [(["a"] if i % 2 else ["a", "b"], [f"e{i % 10}"]) for i in range(40)]
+        with ThreadPoolExecutor(max_workers=40) as pool:
+            results = list(
+                pool.map(lambda r: batcher.get_online_features(*r), requests)
+            )
+
+        self.assertLess(len(calls), len(requests))
+        for feature_names, entity_ids in calls:
+            self.assertEqual(len(entity_ids), len(set(entity_ids)))
+        for (feature_names, entity_ids), result in zip(requests, results):
+            self.assertEqual(result, respond(feature_names, entity_ids))
+
+    def test_full_batch_is_flushed_early(self):
+        calls = []
+
+        def fetch(feature_names, entity_ids):
+            calls.append(entity_ids)
+            return respond(feature_names, entity_ids)
+
+        batcher = OnlineRequestBatcher(fetch, max_wait=10, max_batch_size=2)
+        result = batcher.get_online_features(["a"], ["e1", "e2"])
+
+        self.assertEqual(result, respond(["a"], ["e1", "e2"]))
+        self.assertEqual(calls, [["e1", "e2"]])
+
+    def test_errors_reach_every_caller(self):
+        def fetch(feature_names, entity_ids):
+            raise ConnectionError("down")
+
+        batcher = OnlineRequestBatcher(fetch, max_wait=0.001)
+        with self.assertRaises(ConnectionError):
+            batcher.get_online_features(["a"], ["e1"])
+
+
+class TestAsyncOnlineRequestBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_coroutines_share_one_request(self):
+        calls = []
+
+        async def fetch(feature_names, entity_ids):
+            calls.append((feature_names, entity_ids))
+            return respond(feature_names, entity_ids)
+
+        batcher = AsyncOnlineRequestBatcher(fetch, max_wait=0.01)
+        requests = [(["a", "b"][: 1 + i % 2], [f"e{i % 5}"]) for i in range(20)]
+        results = await asyncio.gather(
+            *(batcher.get_online_features(*request) for request in requests)
+        )
+
+        self.assertEqual(calls, [(["a", "b"], ["e0", "e1", "e2", "e3", "e4"])])
+        for (feature_names, entity_ids), result in zip(requests, results):
+            self.assertEqual(result, respond(feature_names, entity_ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
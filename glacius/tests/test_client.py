@@ -0,0 +1,292 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from glacius import Client
+from glacius.registry_snapshot import RegistrySnapshot
+from glacius.tests.test_feature_template import clicks_template
+from glacius.tests.test_registration import bundle, feature
+
+
+def workspace_response(*args, **kwargs):
+    response = mock.Mock(status_code=200)
+    response.json.return_value = "test-dev"
+    return response
+
+
+class TestClientWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @mock.patch("glacius.client.requests.get", side_effect=workspace_response)
+    def test_workspace_is_resolved_on_first_use(self, get):
+        client = Client(api_key="secret", namespace="development")
+        get.assert_not_called()
+
+        self.assertEqual(client.workspace, "test-dev")
+        self.assertEqual(client.workspace, "test-dev")
+        get.assert_called_once()
+
+    @mock.patch("glacius.client.requests.get", side_effect=workspace_response)
+    def test_workspace_is_cached_on_disk_by_key_hash(self, get):
+        Client(api_key="secret", namespace="a", cache_dir=self.tmp.name).workspace
+        client = Client(api_key="secret", namespace="b", cache_dir=self.tmp.name)
+
+        self.assertEqual(client.workspace, "test-dev")
+        get.assert_called_once()
+        (cached,) = os.listdir(os.path.join(self.tmp.name, "workspaces"))
+        self.assertNotIn("secret", cached)
+
+    @mock.patch("glacius.client.requests.get", side_effect=workspace_response)
+    def test_expired_workspace_is_resolved_again(self, get):
+        Client(
+            api_key="secret",
+            namespace="a",
+            cache_dir=self.tmp.name,
+            workspace_cache_ttl=-1,
+        ).workspace
+        Client(api_key="secret", namespace="a", cache_dir=self.tmp.name).workspace
+
+        self.assertEqual(get.call_count, 2)
+
+
+BUNDLES = [
+    {
+        "name": "user_clicks",
+        "features": [
+            {"name": "clicks_1d", "expr": "clicked"},
+            {"name": "clicks_7d", "expr": "clicked"},
+        ],
+    },
+    {"name": "user_views", "features": [{"name": "views_1d", "expr": "viewed"}]},
+]
+
+
+def registry_response(url, headers=None, **kwargs):
+    if headers.get("If-None-Match") == '"v1"':
+        return mock.Mock(status_code=304)
+    response = mock.Mock(status_code=200, headers={"ETag": '"v1"'})
+    response.json.return_value = {"feature_bundles": BUNDLES}
+    return response
+
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @mock.patch("glacius.client.requests.post")
+    @mock.patch("glacius.client.requests.get", side_effect=registry_response)
+    def test_pulled_registry_resolves_locally(self, get, post):
+        client = Client(api_key="secret", namespace="development")
+        client.pull_registry()
+
+        bundles = client._resolve_feature_bundles(["views_1d", "clicks_7d"], "latest")
+
+        post.assert_not_called()
+        self.assertEqual([b["name"] for b in bundles], ["user_clicks", "user_views"])
+        self.assertEqual([f["name"] for f in bundles[0]["features"]], ["clicks_7d"])
+        with self.assertRaises(KeyError):
+            client._resolve_feature_bundles(["unknown"], "latest")
+
+    @mock.patch("glacius.client.requests.get", side_effect=registry_response)
+    def test_latest_is_revalidated_with_etag(self, get):
+        Client(api_key="k", namespace="dev", cache_dir=self.tmp.name).pull_registry()
+        client = Client(api_key="k", namespace="dev", cache_dir=self.tmp.name)
+
+        snapshot = client.pull_registry()
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args[1]["headers"]["If-None-Match"], '"v1"')
+        self.assertIn("views_1d", snapshot)
+
+    @mock.patch("glacius.client.post_json")
+    @mock.patch("glacius.client.requests.get")
+    def test_register_expires_latest_snapshot(self, get, post_json):
+        registered = [BUNDLES[0]]
+
+        def registry(url, headers=None, **kwargs):
+            etag = f'"v{len(registered)}"'
+            if headers.get("If-None-Match") == etag:
+                return mock.Mock(status_code=304)
+            response = mock.Mock(status_code=200, headers={"ETag": etag})
+            response.json.return_value = {"feature_bundles": list(registered)}
+            return response
+
+        def register(url, payload, *args):
+            registered.extend(payload["feature_bundles"])
+            return mock.Mock(status_code=200)
+
+        get.side_effect = registry
+        post_json.side_effect = register
+        client = Client(api_key="k", namespace="dev", workspace="ws")
+        client.pull_registry()
+        client._resolve_feature_bundles(["clicks_1d"], "latest")
+        self.assertEqual(get.call_count, 1)
+
+        client.register([bundle("user_views", [feature("views_1d")])], "add views")
+        bundles = client._resolve_feature_bundles(["views_1d"], "latest")
+
+        self.assertEqual(bundles[0]["name"], "user_views")
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args[1]["headers"]["If-None-Match"], '"v1"')
+
+    @mock.patch("glacius.client.requests.get", side_effect=registry_response)
+    def test_latest_is_revalidated_once_stale(self, get):
+        client = Client(api_key="k", namespace="dev", registry_revalidate_after=-1)
+        client.pull_registry()
+
+        client._resolve_feature_bundles(["clicks_1d"], "latest")
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args[1]["headers"]["If-None-Match"], '"v1"')
+
+    @mock.patch("glacius.client.requests.get", side_effect=registry_response)
+    def test_pinned_version_is_read_from_disk(self, get):
+        Client(api_key="k", namespace="dev", cache_dir=self.tmp.name).pull_registry("3")
+        client = Client(api_key="k", namespace="dev", cache_dir=self.tmp.name)
+
+        bundles = client._resolve_feature_bundles(["clicks_1d"], "3")
+
+        get.assert_called_once()
+        self.assertEqual(bundles[0]["features"], [BUNDLES[0]["features"][0]])
+
+
+class MockRegistryHandler(BaseHTTPRequestHandler):
+    """Records requests, decoding chunked and gzip bodies like the registry."""
+
+    def do_GET(self):
+        self.respond(None)
+
+    def do_POST(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size + 2)[:-2]
+                if not size:
+                    break
+                body += chunk
+        else:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.respond(json.loads(body))
+
+    def respond(self, body):
+        self.server.received.append((self.command, self.path, self.headers, body))
+        status, response = self.server.routes.get((self.command, self.path), (404, {}))
+        if callable(response):
+            response = response(body)
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestClientPayloads(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockRegistryHandler)
+        self.server.received = []
+        self.server.routes = {
+            ("POST", "/namespace/ws/dev/register_features"): (200, {"ok": True}),
+            ("POST", "/jobs/ws/dev/latest"): (200, lambda job: {"job": job}),
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        patcher = mock.patch("glacius.client.API_URL", api_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client(
+            api_key="k", namespace="dev", workspace="ws", cache_dir=self.tmp.name
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def posts(self):
+        return [r for r in self.server.received if r[0] == "POST"]
+
+    def test_register_streams_single_encoded_gzip_payload(self):
+        clicks = bundle("clicks", [feature("clicks_1d")])
+
+        self.assertEqual(self.client.register([clicks], "init"), {"ok": True})
+
+        ((_, _, headers, body),) = self.posts()
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(
+            body, {"feature_bundles": [clicks.to_dict()], "commit_msg": "init"}
+        )
+
+    def test_incremental_register_uploads_only_changes(self):
+        clicks = [feature("clicks_1d"), feature("clicks_7d", 7)]
+
+        self.client.register([bundle("clicks", clicks)], "init", incremental=True)
+        self.assertEqual(len(self.posts()[-1][3]["feature_bundles"]), 1)
+
+        self.assertIsNone(
+            self.client.register([bundle("clicks", clicks)], "noop", incremental=True)
+        )
+        self.assertEqual(len(self.posts()), 1)
+
+        clicks[1] = feature("clicks_7d", 14)
+        self.client.register([bundle("clicks", clicks)], "change", incremental=True)
+        (changed,) = self.posts()[-1][3]["feature_bundles"]
+        self.assertEqual([f["name"] for f in changed["features"]], ["clicks_7d"])
+        # Only the first registration had to fetch the registry's manifest
+        self.assertEqual(len(self.server.received), 3)
+
+    def test_templates_are_sent_expanded(self):
+        clicks = bundle("clicks", [feature("clicks_1d")])
+        clicks.add_template(clicks_template())
+        names = [f.name for f in clicks.iter_features()]
+
+        self.client.register([clicks], "init")
+        self.client.register([clicks], "init", incremental=True)
+        self.client.get_offline_features(
+            bundle("labels", []).source, "s3://out", feature_bundles=[clicks]
+        )
+
+        registered, incremental, job = (body for *_, body in self.posts())
+        for sent in (
+            registered["feature_bundles"][0],
+            incremental["feature_bundles"][0],
+            job["inputs"]["feature_bundles"][0],
+        ):
+            self.assertNotIn("templates", sent)
+            self.assertEqual([f["name"] for f in sent["features"]], names)
+
+    def test_job_inputs_are_streamed(self):
+        self.client._snapshots["latest"] = RegistrySnapshot(
+            "dev", "latest", [bundle("clicks", [feature("clicks_1d")]).to_dict()]
+        )
+
+        self.client.materialize_features(["clicks_1d"])
+
+        ((_, _, headers, body),) = self.posts()
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(
+            body["inputs"]["feature_bundles"][0]["features"][0]["name"], "clicks_1d"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,24 @@
+import pickle
+import random
 import unittest
 
-from glacius.dsl import add, and_, col, mul, or_, reconstruct, sub, when
+import numpy as np
+
+from glacius.dsl import (
+    Condition,
+    add,
+    and_,
+    col,
+    concat,
+    date_diff,
+    div,
+    mul,
+    or_,
+    parse_value,
+    reconstruct,
+    sub,
+    when,
+)
 
 
 class TestDSL(unittest.TestCase):
@@ -73,5 +91,142 @@ class TestDSL(unittest.TestCase):
             self.fail(f"Reconstruction failed: {e}")
 
 
+class TestDSLEvaluate(unittest.TestCase):
+    columns = {
+        "genre": np.array(["comedy", "action", "comedy", "drama"], dtype=object),
+        "stream_type": np.array(["SVOD", "SVOD", "AVOD", "SVOD"], dtype=object),
+        "streamed_secs": np.array([10, 20, 30, 40]),
+        "start": np.array(["2023-01-01", "2023-01-05", "2023-02-01", "2023-03-01"]),
+        "end": np.array(["2023-01-02", "2023-01-05", "2023-02-11", "2023-03-31"]),
+    }
+
+    def test_evaluate_when_with_and(self):
+        feature_expr = (
+            when(and_(col("genre") == "comedy", col("stream_type") == "SVOD"))
+            .then(1)
+            .otherwise(0)
+        )
+        np.testing.assert_array_equal(feature_expr.evaluate(self.columns), [1, 0, 0, 0])
+
+    def test_evaluate_when_with_or_and_arithmetic(self):
+        feature_expr = (
+            when(or_(col("genre") == "comedy", col("genre") == "action"))
+            .then(add(mul(col("streamed_secs"), 2), 1))
+            .otherwise(sub(col("streamed_secs"), 40))
+        )
+        np.testing.assert_array_equal(
+            feature_expr.evaluate(self.columns), [21, 41, 61, 0]
+        )
+
+    def test_evaluate_comparisons_and_division(self):
+        np.testing.assert_array_equal(
+            (col("streamed_secs") >= 20).evaluate(self.columns),
+            [False, True, True, True],
+        )
+        np.testing.assert_allclose(
+            div(col("streamed_secs"), 4).evaluate(self.columns), [2.5, 5, 7.5, 10]
+        )
+
+    def test_evaluate_concat_and_date_diff(self):
+        np.testing.assert_array_equal(
+            concat(col("genre"), "_", col("stream_type")).evaluate(self.columns),
+            ["comedy_SVOD", "action_SVOD", "comedy_AVOD", "drama_SVOD"],
+        )
+        np.testing.assert_array_equal(
+            date_diff(col("end"), col("start")).evaluate(self.columns), [1, 0, 10, 30]
+        )
+
+
+def random_expr(rng, depth):
+    if depth == 0:
+        return rng.choice(
+            [col(rng.choice("abc")), rng.randint(-5, 5), 2.5, "it's", True]
+        )
+    node = rng.choice([when, and_, or_, add, sub, mul, div, concat, date_diff, "cmp"])
+    children = [random_expr(rng, depth - 1) for _ in range(3)]
+    if node is when:
+        return when(children[0]).then(children[1]).otherwise(children[2])
+    if node == "cmp":
+        operator = rng.choice(["=", "!=", "<", ">="])
+        return Condition(children[0], operator, children[1])
+    if node in (and_, or_, concat):
+        return node(*children[: rng.randint(2, 3)])
+    return node(children[0], children[1])
+
+
+class TestDSLParser(unittest.TestCase):
+    def test_random_expressions_round_trip(self):
+        rng = random.Random(13)
+        for _ in range(300):
+            compiled = random_expr(rng, rng.randint(1, 4)).compile()
+            self.assertEqual(reconstruct(compiled).compile(), compiled)
+
+    def test_nesting_is_parenthesized_where_needed(self):
+        self.assertEqual(
+            and_(or_(col("a") == 1, col("b") == 2), col("c") == 3).compile(),
+            "(`a` = 1 OR `b` = 2) AND `c` = 3",
+        )
+        self.assertEqual(sub(col("a"), sub(col("b"), 1)).compile(), "`a` - (`b` - 1)")
+        self.assertEqual(mul(add(col("a"), 1), col("b")).compile(), "(`a` + 1) * `b`")
+        self.assertEqual(add(mul(col("a"), 2), 1).compile(), "`a` * 2 + 1")
+
+    def test_operators_inside_literals_and_functions(self):
+        expr = reconstruct("CONCAT(`a`, ', ', 'x = y') = 'a AND b'")
+        self.assertEqual(expr.right, "a AND b")
+        self.assertEqual(expr.left.args, (expr.left.args[0], ", ", "x = y"))
+
+        expr = reconstruct("`a` >= 1 + 2 * `b`")
+        self.assertEqual(expr.operator, ">=")
+        self.assertIsInstance(expr.right, add)
+        self.assertIsInstance(expr.right.right, mul)
+
+    def test_literals(self):
+        self.assertEqual(parse_value("'it''s'"), "it's")
+        self.assertEqual(parse_value("-1.5e3"), -1500.0)
+        self.assertIs(parse_value("False"), False)
+
+    def test_invalid_expressions_raise(self):
+        for text in ["`a` = ", "CASE WHEN `a` THEN 1 END", "`a` = 1 = 2", "(`a`", "x"]:
+            with self.assertRaises(ValueError, msg=text):
+                parse_value(text)
+
+    def test_reconstruct_is_cached(self):
+        compiled = "CASE WHEN `genre` = 'comedy' THEN 1 ELSE 0 END"
+        self.assertIs(reconstruct(compiled), reconstruct(compiled))
+
+
+class TestDSLInterning(unittest.TestCase):
+    def test_equal_expressions_are_one_object(self):
+        first = when(col("genre") == "comedy").then(add(col("secs"), 1)).otherwise(0)
+        second = when(col("genre") == "comedy").then(add(col("secs"), 1)).otherwise(0)
+
+        self.assertIs(first, second)
+        self.assertIs(first, reconstruct(first.compile()))
+        self.assertIs(when(col("a") == 1), when(col("a") == 1, None, None))
+        self.assertIsNot(add(col("a"), 1), add(col("a"), 1.0))
+        self.assertIsNot(add(col("a"), 1), add(col("a"), True))
+
+    def test_nodes_are_immutable(self):
+        base = when(col("genre") == "comedy")
+        with_then = base.then(1)
+
+        self.assertIsNot(base, with_then)
+        self.assertIsNone(base.true_value)
+        with self.assertRaises(AttributeError):
+            with_then.true_value = 2
+        with self.assertRaises(ValueError):
+            base.compile()
+
+    def test_compile_and_hash_are_memoized(self):
+        expr = mul(add(col("a"), 1), col("b"))
+        self.assertIs(expr.compile(), expr.compile())
+        self.assertEqual(hash(expr), hash(mul(add(col("a"), 1), col("b"))))
+        self.assertEqual(len({col("a"), col("a"), col("b")}), 2)
+
+    def test_pickled_expressions_are_interned(self):
+        expr = concat(col("genre"), "_", col("stream_type"))
+        self.assertIs(pickle.loads(pickle.dumps(expr)), expr)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from datetime import timedelta
+
+from glacius import (
+    Aggregation,
+    AggregationType,
+    FeatureBundle,
+    FeatureTemplate,
+    Int64,
+    add,
+    col,
+    param,
+    when,
+)
+from glacius.local.planner import plan_bundle
+from glacius.registry_snapshot import RegistrySnapshot
+from glacius.tests.test_registration import bundle, feature
+
+
+def clicks_template():
+    return FeatureTemplate(
+        name="clicks_{category}_{method.value}_{window.days}d",
+        expr=lambda category: when(col("category") == category)
+        .then(col("clicks"))
+        .otherwise(0),
+        dtype=Int64,
+        params={
+            "category": ["books", "games"],
+            "method": [AggregationType.SUM, AggregationType.MAX],
+            "window": [timedelta(days=1), timedelta(days=7), timedelta(days=30)],
+        },
+        agg=Aggregation(method=AggregationType.SUM),
+    )
+
+
+class TestFeatureTemplate(unittest.TestCase):
+    def test_expands_the_parameter_product(self):
+        template = clicks_template()
+        features = list(template.iter_features())
+
+        self.assertEqual(len(template), 12)
+        self.assertEqual(len(features), 12)
+        self.assertEqual(features[0].name, "clicks_books_SUM_1d")
+        self.assertEqual(features[-1].name, "clicks_games_MAX_30d")
+        self.assertEqual(
+            features[-1].expr_sql,
+            "CASE WHEN `category` = 'games' THEN `clicks` ELSE 0 END",
+        )
+        self.assertEqual(features[-1].agg.window, timedelta(days=30))
+        self.assertEqual(features[-1].agg.method, AggregationType.MAX)
+        self.assertIs(features[0].expr, features[5].expr)
+
+    def test_params_bind_into_column_names(self):
+        template = FeatureTemplate(
+            name="{metric}_sum",
+            expr=add(col(f"{param('metric')}_count"), 1),
+            dtype=Int64,
+            params={"metric": ["clicks", "views"]},
+        )
+        self.assertEqual(
+            [f.expr_sql for f in template.iter_features()],
+            ["`clicks_count` + 1", "`views_count` + 1"],
+        )
+
+    def test_params_must_match_the_expression(self):
+        with self.assertRaises(ValueError):
+            FeatureTemplate(
+                name="x_{a}",
+                expr=col("x") == param("b"),
+                dtype=Int64,
+                params={"a": [1]},
+            )
+
+    def test_serializes_compactly(self):
+        template = clicks_template()
+        data = template.to_dict()
+
+        self.assertEqual(
+            data["expr_sql"],
+            "CASE WHEN `category` = ${category} THEN `clicks` ELSE 0 END",
+        )
+        self.assertEqual(data["params"]["window"], [86400, 604800, 2592000])
+        loaded = FeatureTemplate.from_dict(data)
+        self.assertEqual(loaded.identifier, template.identifier)
+        self.assertEqual(
+            [f.to_dict() for f in loaded.iter_features()],
+            [f.to_dict() for f in template.iter_features()],
+        )
+
+    def test_bundle_with_templates(self):
+        plain = bundle("clicks", [feature("clicks_1d")])
+        self.assertNotIn("templates", plain.to_dict())
+
+        with_template = bundle("clicks", [feature("clicks_1d")])
+        with_template.add_template(clicks_template())
+        data = with_template.to_dict()
+
+        self.assertEqual(len(data["templates"]), 1)
+        self.assertNotEqual(with_template.identifier, plain.identifier)
+        self.assertEqual(len(list(with_template.iter_features())), 13)
+        loaded = FeatureBundle.from_dict(data)
+        self.assertEqual(loaded.identifier, with_template.identifier)
+        # Both categories with both methods, each scanning three windows
+        self.assertEqual(
+            sorted((len(g.windows), g.method.value) for g in plan_bundle(loaded)),
+            [(1, "SUM")] + [(3, "MAX")] * 2 + [(3, "SUM")] * 2,
+        )
+
+    def test_snapshot_resolves_template_features(self):
+        with_template = bundle("clicks", [feature("clicks_1d")])
+        with_template.add_template(clicks_template())
+        snapshot = RegistrySnapshot("dev", "1", [with_template.to_dict()])
+
+        (resolved,) = snapshot.resolve(["clicks_games_MAX_7d", "clicks_1d"])
+
+        self.assertNotIn("templates", resolved)
+        self.assertEqual(
+            [f["name"] for f in resolved["features"]],
+            ["clicks_1d", "clicks_games_MAX_7d"],
+        )
+        self.assertEqual(len(snapshot), 13)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,750 @@
+import csv
+import os
+import random
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+
+from glacius import (
+    Aggregation,
+    AggregationType,
+    Entity,
+    Feature,
+    FeatureBundle,
+    FileSource,
+    FileType,
+    Float64,
+    String,
+    col,
+    when,
+)
+from glacius.local import (
+    EntityPartitionedPool,
+    LocalOnlineStore,
+    compute_latest_features,
+    compute_offline_features,
+    materialize_local,
+)
+from glacius.local.engine import join_events
+from glacius.local.io import read_file_source, source_files, to_timestamps
+from glacius.local.join import aggregate_windows, entity_codes
+from glacius.local.parallel import partition_rows
+from glacius.local.planner import bundle_columns, plan_bundle
+from glacius.local.stream import StreamingJoin, prefetch, table_nbytes
+from glacius.local.window import sliding_aggregate
+
+START = datetime(2023, 1, 1)
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+class TestLocalEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = random.Random(7)
+
+        self.events = [
+            (
+                rng.choice(["u1", "u2", "u3"]),
+                START + timedelta(hours=rng.randint(0, 24 * 20)),
+                rng.choice(["books", "games"]),
+                rng.randint(0, 9),
+            )
+            for _ in range(400)
+        ]
+        self.labels = [
+            (
+                rng.choice(["u1", "u2", "u3", "u4"]),
+                START + timedelta(hours=rng.randint(0, 24 * 20)),
+            )
+            for _ in range(100)
+        ]
+
+        self.events_path = os.path.join(self.tmp.name, "events.csv")
+        self.labels_path = os.path.join(self.tmp.name, "labels.csv")
+        write_csv(
+            self.events_path,
+            ["user_id", "timestamp", "category", "clicks"],
+            [(u, t.isoformat(sep=" "), c, v) for u, t, c, v in self.events],
+        )
+        write_csv(
+            self.labels_path,
+            ["user_id", "timestamp"],
+            [(u, t.isoformat(sep=" ")) for u, t in self.labels],
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def bundle(self, features):
+        return FeatureBundle(
+            name="user_bundle",
+            source=FileSource(
+                name="events",
+                description="",
+                timestamp_col="timestamp",
+                uri=self.events_path,
+                file_type=FileType.CSV,
+            ),
+            entity=Entity(key="user_id"),
+            features=features,
+        )
+
+    def labels_source(self):
+        return FileSource(
+            name="labels",
+            description="",
+            timestamp_col="timestamp",
+            uri=f"file://{self.labels_path}",
+            file_type=FileType.CSV,
+        )
+
+    def expected(self, user, ts, window, method):
+        values = [
+            v if c == "books" else 0
+            for u, t, c, v in self.events
+            if u == user and ts - window < t <= ts
+        ]
+        if method == AggregationType.DISTINCT:
+            return len(set(values))
+        if not values:
+            return None
+        if method == AggregationType.SUM:
+            return sum(values)
+        if method == AggregationType.AVG:
+            return sum(values) / len(values)
+        if method == AggregationType.MIN:
+            return min(values)
+        if method == AggregationType.MAX:
+            return max(values)
+
+    def test_point_in_time_window_aggregations(self):
+        features = [
+            Feature(
+                name=f"books_clicks_{method.value}_{days}d",
+                expr=when(col("category") == "books").then(col("clicks")).otherwise(0),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=days)),
+            )
+            for method in AggregationType
+            if method != AggregationType.LATEST
+            for days in (1, 3, 7)
+        ]
+        result = compute_offline_features(self.labels_source(), [self.bundle(features)])
+
+        for feature in features:
+            for i, (user, ts) in enumerate(self.labels):
+                expected = self.expected(
+                    user, ts, feature.agg.window, feature.agg.method
+                )
+                actual = result[feature.name][i]
+                if expected is None:
+                    self.assertTrue(actual != actual, feature.name)
+                else:
+                    self.assertAlmostEqual(actual, expected, msg=feature.name)
+
+    def test_no_events_yield_nulls(self):
+        write_csv(self.events_path, ["user_id", "timestamp", "category", "clicks"], [])
+        features = [
+            Feature(
+                name=f"clicks_{method.value}",
+                expr=col("clicks"),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=1)),
+            )
+            for method in AggregationType
+        ] + [
+            Feature(
+                name="latest_category",
+                expr=col("category"),
+                dtype=String,
+                agg=Aggregation(method=AggregationType.LATEST),
+            )
+        ]
+        result = compute_offline_features(self.labels_source(), [self.bundle(features)])
+
+        for feature in features:
+            column = result[feature.name]
+            self.assertEqual(len(column), len(self.labels), feature.name)
+            if feature.agg.method == AggregationType.DISTINCT:
+                self.assertTrue((column == 0).all())
+            else:
+                self.assertTrue(
+                    all(value is None or value != value for value in column)
+                )
+
+    def test_integer_keys_with_a_null_key_event(self):
+        # The empty key cell makes the events' user_id column float64
+        write_csv(
+            self.events_path,
+            ["user_id", "timestamp", "category", "clicks"],
+            [(u[1:], t.isoformat(sep=" "), c, v) for u, t, c, v in self.events]
+            + [("", START.isoformat(sep=" "), "books", 1)],
+        )
+        write_csv(
+            self.labels_path,
+            ["user_id", "timestamp"],
+            [(u[1:], t.isoformat(sep=" ")) for u, t in self.labels],
+        )
+        feature = Feature(
+            name="books_clicks_sum_7d",
+            expr=when(col("category") == "books").then(col("clicks")).otherwise(0),
+            dtype=Float64,
+            agg=Aggregation(method=AggregationType.SUM, window=timedelta(days=7)),
+        )
+        result = compute_offline_features(
+            self.labels_source(), [self.bundle([feature])]
+        )
+
+        for i, (user, ts) in enumerate(self.labels):
+            expected = self.expected(user, ts, feature.agg.window, feature.agg.method)
+            actual = result[feature.name][i]
+            if expected is None:
+                self.assertTrue(actual != actual)
+            else:
+                self.assertAlmostEqual(actual, expected)
+
+        ids, _ = compute_latest_features(self.bundle([feature]), START)
+        self.assertEqual(sorted(ids), ["user_id:1", "user_id:2", "user_id:3"])
+
+    def test_time_range_pruning_every_event_yields_nulls(self):
+        # Labels long after the last event: the read prunes every event
+        write_csv(
+            self.labels_path,
+            ["user_id", "timestamp"],
+            [(u, (t + timedelta(days=30)).isoformat(sep=" ")) for u, t in self.labels],
+        )
+        features = [
+            Feature(
+                name=f"clicks_{method.value}_2d",
+                expr=col("clicks"),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=2)),
+            )
+            for method in AggregationType
+        ] + [
+            Feature(
+                name="latest_category_2d",
+                expr=col("category"),
+                dtype=String,
+                agg=Aggregation(
+                    method=AggregationType.LATEST, window=timedelta(days=2)
+                ),
+            )
+        ]
+        bundle = self.bundle(features)
+        # In memory and streamed, where no batch reaches the labels at all
+        for batch_size in (None, 50):
+            result = compute_offline_features(
+                self.labels_source(), [bundle], batch_size=batch_size
+            )
+            for feature in features:
+                column = result[feature.name]
+                if feature.agg.method == AggregationType.DISTINCT:
+                    self.assertTrue((column == 0).all(), feature.name)
+                else:
+                    self.assertTrue(
+                        all(value is None or value != value for value in column),
+                        feature.name,
+                    )
+            self.assertTrue(all(v is None for v in result["latest_category_2d"]))
+
+    def test_plan_shares_scans_across_windows(self):
+        features = [
+            Feature(
+                name=f"total_clicks_{category}_{days}d",
+                expr=when(col("category") == category).then(col("clicks")).otherwise(0),
+                dtype=Float64,
+                agg=Aggregation(
+                    method=AggregationType.SUM, window=timedelta(days=days)
+                ),
+            )
+            for category in ("books", "games")
+            for days in (1, 3, 5, 7)
+        ]
+        groups = plan_bundle(self.bundle(features))
+
+        self.assertEqual(len(groups), 2)
+        for group in groups:
+            self.assertEqual([w.days for w in group.windows], [1, 3, 5, 7])
+            self.assertEqual(len(group.features), 4)
+
+    def test_latest_never_leaks_future_events(self):
+        feature = Feature(
+            name="latest_category",
+            expr=col("category"),
+            dtype=Float64,
+            agg=Aggregation(method=AggregationType.LATEST, window=timedelta(days=2)),
+        )
+        result = compute_offline_features(
+            self.labels_source(), [self.bundle([feature])]
+        )
+
+        for i, (user, ts) in enumerate(self.labels):
+            in_window = sorted(
+                (t, c)
+                for u, t, c, _ in self.events
+                if u == user and ts - timedelta(days=2) < t <= ts
+            )
+            if not in_window:
+                self.assertIsNone(result["latest_category"][i])
+                continue
+            last_ts = in_window[-1][0]
+            # Events sharing the last timestamp are all valid "latest" values.
+            candidates = {c for t, c in in_window if t == last_ts}
+            self.assertIn(result["latest_category"][i], candidates)
+
+    def test_streaming_matches_in_memory(self):
+        expr = when(col("category") == "books").then(col("clicks")).otherwise(0)
+        features = [
+            Feature(
+                name=f"books_clicks_{method.value}_{days}d",
+                expr=expr,
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=days)),
+            )
+            for method in AggregationType
+            for days in (1, 7)
+        ] + [
+            Feature(
+                name="latest_category",
+                expr=col("category"),
+                dtype=String,
+                agg=Aggregation(method=AggregationType.LATEST),
+            )
+        ]
+        bundle = self.bundle(features)
+        expected = compute_offline_features(self.labels_source(), [bundle])
+        streamed = compute_offline_features(
+            self.labels_source(), [bundle], batch_size=37, max_buffered_bytes=4096
+        )
+        for feature in features:
+            np.testing.assert_array_equal(
+                streamed[feature.name], expected[feature.name], feature.name
+            )
+
+        as_of = START + timedelta(days=12)
+        ids, values = compute_latest_features(bundle, as_of)
+        streamed_ids, streamed_values = compute_latest_features(
+            bundle, as_of, batch_size=50
+        )
+        self.assertEqual(streamed_ids, ids)
+        for feature in features:
+            np.testing.assert_array_equal(
+                streamed_values[feature.name], values[feature.name], feature.name
+            )
+
+    def test_process_pool_matches_serial(self):
+        features = [
+            Feature(
+                name=f"clicks_{method.value}_3d",
+                expr=col("clicks"),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=3)),
+            )
+            for method in AggregationType
+        ] + [
+            Feature(
+                name="latest_category",
+                expr=col("category"),
+                dtype=String,
+                agg=Aggregation(method=AggregationType.LATEST),
+            )
+        ]
+        bundle = self.bundle(features)
+        expected = compute_offline_features(self.labels_source(), [bundle])
+        parallel = compute_offline_features(
+            self.labels_source(), [bundle], num_workers=3
+        )
+        for feature in features:
+            np.testing.assert_array_equal(
+                parallel[feature.name], expected[feature.name], feature.name
+            )
+
+        as_of = START + timedelta(days=12)
+        ids, values = compute_latest_features(bundle, as_of)
+        parallel_ids, parallel_values = compute_latest_features(
+            bundle, as_of, num_workers=2
+        )
+        self.assertEqual(parallel_ids, ids)
+        for feature in features:
+            np.testing.assert_array_equal(
+                parallel_values[feature.name], values[feature.name], feature.name
+            )
+
+        with self.assertRaises(ValueError):
+            compute_latest_features(bundle, as_of, batch_size=50, num_workers=2)
+
+    def test_partition_rows_colocates_entities(self):
+        users = np.array([f"u{i % 7}" for i in range(100)], dtype=object)
+        codes, _ = entity_codes({"user_id": users}, {"user_id": users[:0]}, ["user_id"])
+        partitions = partition_rows(codes, 4)
+        self.assertEqual(len(partitions), 4)
+        np.testing.assert_array_equal(
+            np.sort(np.concatenate(partitions)), np.arange(100)
+        )
+        owners = {}
+        for index, rows in enumerate(partitions):
+            for user in users[rows]:
+                self.assertEqual(owners.setdefault(user, index), index)
+
+    def test_process_pool_partitions_without_events(self):
+        # Only u1 has events, so most partitions get labels but no events
+        features = [
+            Feature(
+                name=f"clicks_{method.value}",
+                expr=col("clicks"),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=3)),
+            )
+            for method in AggregationType
+        ] + [
+            Feature(
+                name="latest_category",
+                expr=col("category"),
+                dtype=String,
+                agg=Aggregation(method=AggregationType.LATEST),
+            )
+        ]
+        bundle = self.bundle(features)
+        events = read_file_source(bundle.source)
+        events = {
+            name: column[events["user_id"] == "u1"] for name, column in events.items()
+        }
+        labels = {"user_id": np.array([f"u{i % 8}" for i in range(40)], dtype=object)}
+        label_ts = np.full(40, 10 * 24 * 3600 * 1_000_000, dtype=np.int64)
+        label_ts += to_timestamps(np.array([START.isoformat()]))[0]
+
+        expected = join_events(labels, label_ts, events, bundle)
+        with EntityPartitionedPool(4) as pool:
+            parallel = pool.join(labels, label_ts, events, bundle)
+        for feature in features:
+            np.testing.assert_array_equal(
+                parallel[feature.name], expected[feature.name], feature.name
+            )
+
+    def test_streamed_latest_skips_nulls(self):
+        feature = Feature(
+            name="latest_clicks",
+            expr=col("clicks"),
+            dtype=Float64,
+            agg=Aggregation(method=AggregationType.LATEST, window=timedelta(days=3)),
+        )
+        bundle = self.bundle([feature])
+        rng = np.random.default_rng(5)
+        events = {
+            "user_id": np.array(["u1", "u2"] * 50, dtype=object),
+            "timestamp": np.arange(100, dtype=np.int64) * 3600,
+            "clicks": np.where(rng.random(100) < 0.6, np.nan, rng.random(100)),
+        }
+        labels = {"user_id": np.array(["u1", "u2", "u3"] * 10, dtype=object)}
+        label_ts = rng.integers(0, 100 * 3600, 30) * 1_000_000
+
+        expected = join_events(labels, label_ts, events, bundle)["latest_clicks"]
+        join = StreamingJoin(labels, label_ts, bundle)
+        for start in range(0, 100, 30):
+            join.update({name: c[start : start + 30] for name, c in events.items()})
+        np.testing.assert_array_equal(join.result()["latest_clicks"], expected)
+        self.assertFalse(np.isnan(expected).all())
+
+    @mock.patch("glacius.local.stream._DISTINCT_CHUNK", 7)
+    def test_streamed_distinct_merges_vocabularies(self):
+        features = [
+            Feature(
+                name=f"distinct_category_{days}d",
+                expr=col("category"),
+                dtype=Float64,
+                agg=Aggregation(
+                    method=AggregationType.DISTINCT, window=timedelta(days=days)
+                ),
+            )
+            for days in (1, 4)
+        ]
+        bundle = self.bundle(features)
+        rng = np.random.default_rng(3)
+        categories = np.array(["a", "b", "c", "d", "e", None], dtype=object)
+        events = {
+            "user_id": rng.choice(["u1", "u2", "u3"], 200).astype(object),
+            "timestamp": rng.integers(0, 10 * 24, 200) * 3600,
+            "category": categories[rng.integers(0, 6, 200)],
+        }
+        labels = {"user_id": rng.choice(["u1", "u2", "u4", None], 40).astype(object)}
+        label_ts = rng.integers(0, 10 * 24, 40) * 3600 * 1_000_000
+
+        expected = join_events(labels, label_ts, events, bundle)
+        join = StreamingJoin(labels, label_ts, bundle)
+        # Every batch brings categories the previous ones did not have
+        for letters in ("ab", "cde", "abcde"):
+            batch = np.isin(events["category"], list(letters))
+            join.update({name: column[batch] for name, column in events.items()})
+        for feature in features:
+            np.testing.assert_array_equal(
+                join.result()[feature.name], expected[feature.name], feature.name
+            )
+
+    def test_table_nbytes_counts_object_payloads(self):
+        ids = np.array([f"user-{i:040d}" for i in range(1000)], dtype=object)
+        self.assertGreater(table_nbytes({"user_id": ids}), 1000 * 40)
+
+    def test_prefetch_applies_backpressure(self):
+        produced = []
+
+        def batches():
+            for i in range(20):
+                produced.append(i)
+                yield {"x": np.zeros(100)}  # 800 bytes
+
+        consumed = 0
+        for _ in prefetch(batches(), max_buffered_bytes=2000):
+            consumed += 1
+            time.sleep(0.005)
+            # At most two buffered batches, plus one the reader waits to add
+            self.assertLessEqual(len(produced) - consumed, 3)
+        self.assertEqual(consumed, 20)
+
+        def failing():
+            yield {"x": np.zeros(1)}
+            raise OSError("disk error")
+
+        with self.assertRaises(OSError):
+            list(prefetch(failing()))
+
+    def test_parquet_reads_prune_columns_and_time_range(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        events = sorted(self.events, key=lambda event: event[1])
+        columns = {
+            "user_id": [u for u, _, _, _ in events],
+            "timestamp": pa.array([t for _, t, _, _ in events], pa.timestamp("ms")),
+            "epoch": [
+                t.replace(tzinfo=timezone.utc).timestamp() for _, t, _, _ in events
+            ],
+            "category": [c for _, _, c, _ in events],
+            "clicks": [v for _, _, _, v in events],
+            **{f"unused_{i}": list(range(len(events))) for i in range(20)},
+        }
+        path = os.path.join(self.tmp.name, "events.parquet")
+        pq.write_table(pa.table(columns), path, row_group_size=50)
+
+        features = [
+            Feature(
+                name=f"books_clicks_{days}d",
+                expr=when(col("category") == "books").then(col("clicks")).otherwise(0),
+                dtype=Float64,
+                agg=Aggregation(
+                    method=AggregationType.SUM, window=timedelta(days=days)
+                ),
+            )
+            for days in (1, 3)
+        ]
+        bundle = self.bundle(features)
+        self.assertEqual(
+            bundle_columns(bundle), ["user_id", "timestamp", "category", "clicks"]
+        )
+
+        csv_result = compute_offline_features(self.labels_source(), [bundle])
+        for timestamp_col in ("timestamp", "epoch"):
+            source = FileSource(
+                name="events",
+                description="",
+                timestamp_col=timestamp_col,
+                uri=path,
+                file_type=FileType.PARQUET,
+            )
+            parquet_bundle = FeatureBundle(
+                name="user_bundle",
+                source=source,
+                entity=Entity(key="user_id"),
+                features=features,
+            )
+            result = compute_offline_features(self.labels_source(), [parquet_bundle])
+            for feature in features:
+                np.testing.assert_array_equal(
+                    result[feature.name], csv_result[feature.name]
+                )
+
+            lo, hi = START + timedelta(days=5), START + timedelta(days=6)
+            time_range = tuple(
+                int(np.datetime64(t, "us").astype(np.int64)) for t in (lo, hi)
+            )
+            table = read_file_source(source, [timestamp_col, "clicks"], time_range)
+            self.assertEqual(list(table), [timestamp_col, "clicks"])
+            self.assertEqual(
+                table["clicks"].tolist(),
+                [v for _, t, _, v in events if lo <= t <= hi],
+            )
+
+    def test_partitioned_source_reads_only_label_range(self):
+        root = os.path.join(self.tmp.name, "partitioned")
+        by_day = {}
+        for event in self.events:
+            by_day.setdefault(event[1].strftime("%Y-%m-%d"), []).append(event)
+        for day, events in by_day.items():
+            os.makedirs(os.path.join(root, f"dt={day}"))
+            write_csv(
+                os.path.join(root, f"dt={day}", "part-0.csv"),
+                ["user_id", "timestamp", "category", "clicks"],
+                [(u, t.isoformat(sep=" "), c, v) for u, t, c, v in events],
+            )
+        open(os.path.join(root, f"dt={day}", "_SUCCESS"), "w").close()
+
+        source = FileSource(
+            name="events",
+            description="",
+            timestamp_col="timestamp",
+            uri=f"file://{root}/",
+            file_type=FileType.CSV,
+            partition_by="dt",
+        )
+        self.assertEqual(FileSource.from_dict(source.to_dict()).partition_by, "dt")
+        self.assertEqual(
+            source.partition_paths(
+                datetime(2023, 1, 30, 12), datetime(2023, 2, 1, 0, 0)
+            ),
+            [f"file://{root}/dt=2023-01-{d}" for d in ("30", "31")]
+            + [f"file://{root}/dt=2023-02-01"],
+        )
+
+        features = [
+            Feature(
+                name="books_clicks_2d",
+                expr=when(col("category") == "books").then(col("clicks")).otherwise(0),
+                dtype=Float64,
+                agg=Aggregation(method=AggregationType.SUM, window=timedelta(days=2)),
+            )
+        ]
+        partitioned = FeatureBundle(
+            name="user_bundle",
+            source=source,
+            entity=Entity(key="user_id"),
+            features=features,
+        )
+        expected = compute_offline_features(
+            self.labels_source(), [self.bundle(features)]
+        )
+        result = compute_offline_features(self.labels_source(), [partitioned])
+        np.testing.assert_array_equal(
+            result["books_clicks_2d"], expected["books_clicks_2d"]
+        )
+
+        start = np.datetime64(START + timedelta(days=3), "us").astype(np.int64)
+        files = source_files(source, (int(start), int(start) + 36 * 3600 * 10**6))
+        self.assertEqual(
+            [os.path.basename(os.path.dirname(path)) for path in files],
+            ["dt=2023-01-04", "dt=2023-01-05"],
+        )
+
+    def test_materialize_local_online_store(self):
+        features = [
+            Feature(
+                name=f"books_clicks_{method.value}_{days}d",
+                expr=when(col("category") == "books").then(col("clicks")).otherwise(0),
+                dtype=Float64,
+                agg=Aggregation(method=method, window=timedelta(days=days)),
+            )
+            for method in (AggregationType.SUM, AggregationType.AVG)
+            for days in (1, 7)
+        ]
+        bundle = self.bundle(features)
+        as_of = START + timedelta(days=18, hours=5)
+        path = os.path.join(self.tmp.name, "online", "store.sqlite")
+        with LocalOnlineStore(path) as store:
+            self.assertEqual(materialize_local(store, [bundle], as_of), 3)
+
+        names = [feature.name for feature in features]
+        ids = [bundle.entity.id(user) for user in ("u1", "u2", "u3", "u4")]
+        with LocalOnlineStore(path) as store:
+            response = store.get_online_features(names, ids)
+            matrix = store.get_online_features(names, ids, as_matrix=True)
+
+        self.assertNotIn("user_id:u4", response)
+        self.assertFalse(matrix.mask[3].any())
+        for feature in features:
+            for user in ("u1", "u2", "u3"):
+                expected = self.expected(
+                    user, as_of, feature.agg.window, feature.agg.method
+                )
+                actual = response[f"user_id:{user}"][feature.name]
+                if expected is None:
+                    self.assertIsNone(actual, feature.name)
+                else:
+                    self.assertAlmostEqual(actual, expected, msg=feature.name)
+
+        # Rematerializing a subset of the features replaces only their values:
+        # entities without events in the new run are no longer served for them,
+        # and the bundle's other features keep being served
+        write_csv(
+            self.events_path,
+            ["user_id", "timestamp", "category", "clicks"],
+            [("u1", (as_of - timedelta(hours=1)).isoformat(sep=" "), "books", 4)],
+        )
+        with LocalOnlineStore(path) as store:
+            materialize_local(store, [self.bundle(features[:1])], as_of)
+            rerun = store.get_online_features(names, ids)
+
+        self.assertEqual(rerun["user_id:u1"][names[0]], 4)
+        for user in ("u2", "u3"):
+            self.assertNotIn(names[0], rerun[f"user_id:{user}"])
+        for user in ("u1", "u2", "u3"):
+            for name in names[1:]:
+                self.assertEqual(
+                    rerun[f"user_id:{user}"][name],
+                    response[f"user_id:{user}"][name],
+                    name,
+                )
+
+
+class TestWindowKernels(unittest.TestCase):
+    def test_kernels_match_recomputed_windows(self):
+        rng = random.Random(3)
+        values = np.array([rng.choice([None, 1, 2, 3, 5, 8]) for _ in range(300)])
+        nulls = np.array([value is None for value in values])
+        # Three entities owning consecutive event ranges, windows sliding forward.
+        lo, hi = [], []
+        for start, stop in ((0, 120), (120, 121), (121, 300)):
+            a = b = start
+            for _ in range(40):
+                b = min(stop, b + rng.randint(0, 6))
+                a = min(b, a + rng.randint(0, 5))
+                lo.append(a)
+                hi.append(b)
+        order = list(range(len(lo)))
+        rng.shuffle(order)
+        lo, hi = np.array(lo)[order], np.array(hi)[order]
+
+        reducers = {
+            AggregationType.SUM: sum,
+            AggregationType.AVG: lambda w: sum(w) / len(w),
+            AggregationType.MIN: min,
+            AggregationType.MAX: max,
+            AggregationType.LATEST: lambda w: w[-1],
+        }
+        for method in AggregationType:
+            (results,) = sliding_aggregate(values, nulls, [lo], hi, method)
+            for result, start, stop in zip(results, lo, hi):
+                window = [v for v in values[start:stop] if v is not None]
+                if method == AggregationType.DISTINCT:
+                    self.assertEqual(result, len(set(window)))
+                elif not window:
+                    self.assertIsNone(result)
+                else:
+                    self.assertAlmostEqual(result, reducers[method](window))
+
+        # The vectorized LATEST skips null values like the kernel
+        (latest,) = aggregate_windows(values, [lo], hi, AggregationType.LATEST)
+        (expected,) = sliding_aggregate(values, nulls, [lo], hi, AggregationType.LATEST)
+        self.assertEqual(latest.tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from glacius import Entity, FeatureBundle, col, when
+from glacius.hash_utils import fnv1a_64
+from glacius.tests.test_registration import bundle, feature
+
+
+class TestDefinitionModel(unittest.TestCase):
+    def test_definitions_have_no_instance_dict(self):
+        definition = bundle("clicks", [feature("clicks_1d")])
+        for obj in [
+            definition.features[0],
+            definition.features[0].agg,
+            definition.source,
+            definition.entity,
+            when(col("a") == 1).then(col("b")).otherwise(0),
+        ]:
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+    def test_dict_round_trip_and_repr(self):
+        definition = bundle("clicks", [feature("clicks_1d"), feature("clicks_7d", 7)])
+        definition.identifier
+
+        loaded = FeatureBundle.from_dict(definition.to_dict())
+
+        self.assertEqual(loaded.to_dict(), definition.to_dict())
+        self.assertEqual(loaded.identifier, definition.identifier)
+        self.assertEqual(
+            repr(definition.source),
+            "<FileSource(_name = events, _description = , "
+            "_timestamp_col = timestamp, _source_type = SourceType.FILE, "
+            "_uri = s3://bucket/events, _file_type = FileType.PARQUET, "
+            "_query = None, _partition_by = None, _partition_format = %Y-%m-%d)>",
+        )
+        self.assertEqual(repr(definition.entity), "<Entity(keys = ['user_id'])>")
+
+
+class TestEntityIds(unittest.TestCase):
+    def test_bulk_ids_match_single_ids(self):
+        entity = Entity(keys=["user_id", "device"])
+        users = np.arange(100)
+        devices = ["ios", "web", "ünïcode", ""] * 25
+
+        ids = entity.ids(users, devices)
+        expected = [entity.id(str(u), d) for u, d in zip(users, devices)]
+        self.assertEqual(ids, expected)
+        self.assertEqual(ids[0], "device:ios:user_id:0")
+
+        hashes = entity.ids(users, devices, hashed=True)
+        self.assertEqual(hashes.dtype, np.uint64)
+        self.assertEqual(hashes.tolist(), [fnv1a_64(i.encode("utf-8")) for i in ids])
+
+    def test_bulk_ids_need_every_key(self):
+        with self.assertRaises(Exception):
+            Entity(keys=["user_id", "device"]).ids([1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import timedelta
+
+from glacius import Aggregation, AggregationType, Feature, Int32, col
+from glacius.online_cache import OnlineFeatureCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestOnlineFeatureCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = OnlineFeatureCache(default_ttl=10, clock=self.clock)
+
+    def test_lookup_returns_hits_and_what_to_fetch(self):
+        self.cache.put_response("dev", {"user_id:1": {"a": 1, "b": 2}})
+
+        found, entity_ids, feature_names = self.cache.lookup(
+            "dev", ["a", "b", "c"], ["user_id:1", "user_id:2"]
+        )
+
+        self.assertEqual(found, {"user_id:1": {"a": 1, "b": 2}, "user_id:2": {}})
+        self.assertEqual(entity_ids, ["user_id:1", "user_id:2"])
+        self.assertEqual(feature_names, ["a", "b", "c"])
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (2, 4))
+
+    def test_entries_expire_after_their_ttl(self):
+        features = [
+            Feature(
+                name="clicks_1d",
+                expr=col("clicks"),
+                dtype=Int32,
+                agg=Aggregation(method=AggregationType.SUM, window=timedelta(days=1)),
+            ),
+            Feature(name="last_click", expr=col("clicks"), dtype=Int32),
+        ]
+        self.cache.set_ttls_from_features(features, fraction=0.01)
+        self.cache.put_response("dev", {"user_id:1": {"clicks_1d": 3, "last_click": 1}})
+
+        self.clock.now = 500
+        found, _, _ = self.cache.lookup(
+            "dev", ["clicks_1d", "last_click"], ["user_id:1"]
+        )
+        self.assertEqual(found, {"user_id:1": {"clicks_1d": 3}})
+        self.assertEqual(self.cache.stats.expirations, 1)
+
+        self.clock.now = 865
+        _, entity_ids, _ = self.cache.lookup("dev", ["clicks_1d"], ["user_id:1"])
+        self.assertEqual(entity_ids, ["user_id:1"])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.put("dev", "a", "user_id:1", 1)
+        entry_size = self.cache.size_bytes
+        cache = OnlineFeatureCache(max_bytes=entry_size * 2, clock=self.clock)
+
+        cache.put("dev", "a", "user_id:1", 1)
+        cache.put("dev", "a", "user_id:2", 1)
+        cache.lookup("dev", ["a"], ["user_id:1"])
+        cache.put("dev", "a", "user_id:3", 1)
+
+        found, missing, _ = cache.lookup("dev", ["a"], ["user_id:1", "user_id:2"])
+        self.assertEqual(missing, ["user_id:2"])
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertLessEqual(cache.size_bytes, entry_size * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
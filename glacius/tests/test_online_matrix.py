@@ -0,0 +1,80 @@
+import json
+import unittest
+
+import numpy as np
+
+from glacius import Date, Float32, Int32, Int64, String, Timestamp
+from glacius.online_matrix import decode_online_matrix
+
+RESPONSE = {
+    "user_id:1": {"clicks_7d": 3, "spend_7d": 1.5, "unrequested": 9},
+    "user_id:2": {"clicks_7d": 5, "spend_7d": None},
+    "user_id:9": {"clicks_7d": 1},
+}
+
+
+class TestDecodeOnlineMatrix(unittest.TestCase):
+    def test_raw_and_decoded_responses_match(self):
+        feature_names = ["spend_7d", "clicks_7d"]
+        entity_ids = ["user_id:2", "user_id:1", "user_id:3"]
+        dtypes = {"clicks_7d": Int32, "spend_7d": Float32}
+
+        from_raw = decode_online_matrix(
+            json.dumps(RESPONSE).encode(), feature_names, entity_ids, dtypes
+        )
+        from_dict = decode_online_matrix(RESPONSE, feature_names, entity_ids, dtypes)
+
+        for matrix in (from_raw, from_dict):
+            self.assertEqual(matrix.values.dtype, np.float32)
+            self.assertTrue(matrix.values.flags.c_contiguous)
+            np.testing.assert_array_equal(
+                matrix.values, [[np.nan, 5], [1.5, 3], [np.nan, np.nan]]
+            )
+            np.testing.assert_array_equal(
+                matrix.mask, [[False, True], [True, True], [False, False]]
+            )
+
+    def test_integral_features_decode_to_int64_with_default(self):
+        matrix = decode_online_matrix(
+            json.dumps(RESPONSE),
+            ["clicks_7d"],
+            ["user_id:1", "user_id:4"],
+            {"clicks_7d": Int64},
+            default=-1,
+        )
+
+        self.assertEqual(matrix.values.dtype, np.int64)
+        np.testing.assert_array_equal(matrix.values, [[3], [-1]])
+
+        # Beyond the precision of a float
+        large = decode_online_matrix(
+            {"user_id:1": {"clicks_7d": 2**60 + 1}},
+            ["clicks_7d"],
+            ["user_id:1"],
+            {"clicks_7d": Int64},
+        )
+        self.assertEqual(large.values[0, 0], 2**60 + 1)
+
+    def test_empty_entity_objects_decode_to_missing_rows(self):
+        body = json.dumps({"user_id:1": {}, "user_id:2": {"clicks_7d": 5}})
+        matrix = decode_online_matrix(body, ["clicks_7d"], ["user_id:1", "user_id:2"])
+
+        np.testing.assert_array_equal(matrix.values, [[np.nan], [5]])
+        np.testing.assert_array_equal(matrix.mask, [[False], [True]])
+
+        empty = decode_online_matrix("{}", ["clicks_7d"], ["user_id:1"])
+        np.testing.assert_array_equal(empty.mask, [[False]])
+
+    def test_non_numeric_features_are_rejected(self):
+        for dtype in (String, Date, Timestamp):
+            with self.assertRaisesRegex(ValueError, "non-numeric"):
+                decode_online_matrix(
+                    {"user_id:1": {"name": "2024-01-01"}},
+                    ["name"],
+                    ["user_id:1"],
+                    {"name": dtype},
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
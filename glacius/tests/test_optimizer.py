@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from glacius.dsl import add, and_, col, mul, when
+from glacius.optimizer import CommonSubexpressions
+
+
+class TestCommonSubexpressions(unittest.TestCase):
+    def setUp(self):
+        self.exprs = [
+            when(and_(col("category") == category, col("price") > 10))
+            .then(col(value))
+            .otherwise(0)
+            for category in ("books", "games")
+            for value in ("clicks", "views")
+        ] + [add(mul(col("clicks"), 2), 1), mul(col("clicks"), 2)]
+        self.cse = CommonSubexpressions(self.exprs)
+
+    def test_detects_outermost_shared_subtrees(self):
+        self.assertEqual(
+            {expr.compile() for expr in self.cse.shared.values()},
+            {
+                "`category` = 'books' AND `price` > 10",
+                "`category` = 'games' AND `price` > 10",
+                "`price` > 10",
+                "`clicks` * 2",
+            },
+        )
+
+    def test_cached_evaluation_matches_plain_evaluation(self):
+        columns = {
+            "category": np.array(["books", "games", "books"], dtype=object),
+            "price": np.array([5, 20, 30]),
+            "clicks": np.array([1, 2, 3]),
+            "views": np.array([4, 5, 6]),
+        }
+        cache = self.cse.cache()
+        for expr in self.exprs:
+            np.testing.assert_array_equal(
+                cache.evaluate(expr, columns), expr.evaluate(columns)
+            )
+        self.assertEqual(cache.hits, 4)
+
+    def test_sql_projects_shared_subtrees_once(self):
+        sql = self.cse.to_sql("events", [f"f{i}" for i in range(len(self.exprs))])
+        self.assertEqual(sql.count("`price` > 10"), 1)
+        self.assertEqual(sql.count("`clicks` * 2"), 1)
+        self.assertIn("`__cse_3` + 1 AS `f4`", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
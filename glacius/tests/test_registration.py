@@ -0,0 +1,171 @@
+import unittest
+from datetime import timedelta
+
+from glacius import (
+    Aggregation,
+    AggregationType,
+    Entity,
+    Feature,
+    FeatureBundle,
+    FileSource,
+    FileType,
+    Float64,
+    col,
+)
+from glacius.registration import (
+    RegistrationDiff,
+    build_manifest,
+    diff_manifests,
+    manifest_identifier,
+    namespace_identifier,
+)
+
+
+def feature(name, window_days=1):
+    return Feature(
+        name=name,
+        expr=col("clicks"),
+        dtype=Float64,
+        agg=Aggregation(method=AggregationType.SUM, window=timedelta(days=window_days)),
+    )
+
+
+def bundle(name, features, uri="s3://bucket/events"):
+    return FeatureBundle(
+        name=name,
+        source=FileSource(
+            name="events",
+            description="",
+            timestamp_col="timestamp",
+            uri=uri,
+            file_type=FileType.PARQUET,
+        ),
+        entity=Entity(key="user_id"),
+        features=features,
+    )
+
+
+class TestRegistrationDiff(unittest.TestCase):
+    def setUp(self):
+        self.registered = [
+            bundle("clicks", [feature("clicks_1d"), feature("clicks_7d", 7)]),
+            bundle("views", [feature("views_1d")]),
+        ]
+        self.manifest = build_manifest(self.registered)
+
+    def test_unchanged_bundles_produce_an_empty_diff(self):
+        diff = RegistrationDiff.compute(self.manifest, self.registered)
+
+        self.assertTrue(diff.is_empty())
+        self.assertEqual(diff.manifest, self.manifest)
+
+    def test_only_changed_features_are_uploaded(self):
+        bundles = [
+            bundle("clicks", [feature("clicks_1d"), feature("clicks_7d", 14)]),
+            bundle("views", [feature("views_1d")]),
+        ]
+
+        diff = RegistrationDiff.compute(self.manifest, bundles)
+
+        (changed,) = diff.feature_bundles
+        self.assertEqual(changed["name"], "clicks")
+        self.assertTrue(changed["partial"])
+        self.assertEqual([f["name"] for f in changed["features"]], ["clicks_7d"])
+        self.assertEqual(diff.manifest, build_manifest(bundles))
+
+    def test_removals_and_changed_headers(self):
+        bundles = [
+            bundle("clicks", [feature("clicks_1d")], uri="s3://bucket/clicks"),
+            bundle("carts", [feature("carts_1d")]),
+        ]
+
+        diff = RegistrationDiff.compute(self.manifest, bundles)
+
+        self.assertEqual(
+            [(b["name"], len(b["features"])) for b in diff.feature_bundles],
+            [("clicks", 1), ("carts", 1)],
+        )
+        # Same shape as a partial bundle with one changed feature, but complete
+        self.assertEqual([b["partial"] for b in diff.feature_bundles], [False, False])
+        self.assertEqual(diff.removed_bundles, ["views"])
+        # A new header re-uploads the whole bundle, replacing its features
+        self.assertEqual(diff.removed_features, {})
+
+        bundles[0] = bundle("clicks", [feature("clicks_1d")])
+        diff = RegistrationDiff.compute(self.manifest, bundles)
+        self.assertEqual(diff.removed_features, {"clicks": ["clicks_7d"]})
+        self.assertEqual([b["name"] for b in diff.feature_bundles], ["carts"])
+
+
+class TestIdentifiers(unittest.TestCase):
+    def test_bundle_identifier_tracks_added_features(self):
+        clicks = bundle("clicks", [feature("clicks_1d")])
+        before = clicks.identifier
+        self.assertEqual(before, bundle("clicks", [feature("clicks_1d")]).identifier)
+
+        clicks.add_feature(feature("clicks_7d", 7))
+
+        self.assertNotEqual(clicks.identifier, before)
+        self.assertEqual(
+            clicks.header_identifier, bundle("clicks", []).header_identifier
+        )
+        self.assertNotIn("_cached", repr(clicks))
+
+    def test_bundle_features_are_read_only(self):
+        features = [feature("clicks_1d")]
+        clicks = bundle("clicks", features)
+        before = clicks.identifier
+
+        features.append(feature("clicks_7d", 7))
+        with self.assertRaises(AttributeError):
+            clicks.features.append(feature("clicks_7d", 7))
+
+        self.assertEqual(len(clicks.features), 1)
+        self.assertEqual(clicks.identifier, before)
+
+    def test_namespace_identifier_is_the_manifest_root(self):
+        bundles = [bundle("clicks", [feature("clicks_1d")]), bundle("views", [])]
+
+        self.assertEqual(
+            namespace_identifier(bundles), namespace_identifier(bundles[::-1])
+        )
+        self.assertEqual(
+            namespace_identifier(bundles), manifest_identifier(build_manifest(bundles))
+        )
+        self.assertNotEqual(
+            namespace_identifier(bundles), namespace_identifier(bundles[:1])
+        )
+
+    def test_diff_manifests(self):
+        old = build_manifest(
+            [
+                bundle("clicks", [feature("clicks_1d"), feature("clicks_7d", 7)]),
+                bundle("views", [feature("views_1d")]),
+            ]
+        )
+        new = build_manifest(
+            [
+                bundle("clicks", [feature("clicks_1d", 2), feature("clicks_30d", 30)]),
+                bundle("carts", [feature("carts_1d")]),
+            ]
+        )
+
+        self.assertEqual(
+            diff_manifests(old, new),
+            {
+                "added_bundles": ["carts"],
+                "removed_bundles": ["views"],
+                "changed_bundles": {
+                    "clicks": {
+                        "header": False,
+                        "added": ["clicks_30d"],
+                        "removed": ["clicks_7d"],
+                        "changed": ["clicks_1d"],
+                    }
+                },
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
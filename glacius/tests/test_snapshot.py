@@ -0,0 +1,182 @@
+import os
+import pickle
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from glacius import (
+    Aggregation,
+    AggregationType,
+    Entity,
+    Feature,
+    FeatureBundle,
+    FileSource,
+    FileType,
+    Float64,
+    Int64,
+    String,
+    Timestamp,
+    col,
+)
+from glacius.hash_utils import fnv1a_64, fnv1a_64_array
+from glacius.local import FeatureSnapshot, materialize_snapshot, write_snapshot
+
+
+class TestFeatureSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snapshot.glsnap")
+
+        user = Entity(key="user_id")
+        self.ids = [user.id(f"u{i}") for i in range(5000)]
+        self.clicks = np.arange(5000, dtype=np.int64)
+        self.ctr = np.where(self.clicks % 3 == 0, np.nan, self.clicks / 10000)
+        write_snapshot(
+            self.path,
+            self.ids,
+            {"clicks": self.clicks, "ctr": self.ctr},
+            {"clicks": Int64, "ctr": Float64},
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fnv1a_64(self):
+        self.assertEqual(fnv1a_64(b""), 0xCBF29CE484222325)
+        self.assertEqual(fnv1a_64(b"a"), 0xAF63DC4C8601EC8C)
+        self.assertEqual(fnv1a_64(b"foobar"), 0x85944171F73967E8)
+
+        values = ["", "a", "user_id:u42", "ünïcode"]
+        self.assertEqual(
+            fnv1a_64_array(values).tolist(),
+            [fnv1a_64(value.encode("utf-8")) for value in values],
+        )
+
+    def test_columns_are_zero_copy_views(self):
+        snapshot = FeatureSnapshot(self.path)
+        self.assertEqual(len(snapshot), 5000)
+        self.assertEqual(snapshot.feature_names, ["clicks", "ctr"])
+
+        clicks = snapshot.column("clicks")
+        self.assertFalse(clicks.flags.owndata)
+        self.assertFalse(clicks.flags.writeable)
+        np.testing.assert_array_equal(clicks, self.clicks)
+        np.testing.assert_array_equal(snapshot.valid("ctr"), ~np.isnan(self.ctr))
+
+    def test_index_lookup(self):
+        snapshot = FeatureSnapshot(self.path)
+        rng = np.random.default_rng(3)
+        queries = rng.integers(0, 6000, size=2000)
+        ids = [f"user_id:u{i}" for i in queries]
+
+        rows = snapshot.rows(ids)
+        expected = np.where(queries < 5000, queries, -1)
+        np.testing.assert_array_equal(rows, expected)
+
+    def test_get_online_features(self):
+        snapshot = pickle.loads(pickle.dumps(FeatureSnapshot(self.path)))
+        ids = ["user_id:u3", "user_id:u4", "user_id:missing"]
+
+        response = snapshot.get_online_features(["clicks", "ctr"], ids)
+        self.assertEqual(
+            response,
+            {"user_id:u3": {"clicks": 3}, "user_id:u4": {"clicks": 4, "ctr": 0.0004}},
+        )
+
+        matrix = snapshot.get_online_features(["ctr", "clicks"], ids, as_matrix=True)
+        self.assertEqual(matrix.values.dtype, np.float32)
+        np.testing.assert_array_equal(
+            matrix.mask, [[False, True], [True, True], [False, False]]
+        )
+        np.testing.assert_allclose(matrix.values[1], [0.0004, 4])
+
+    def test_close_unmaps_the_file(self):
+        with FeatureSnapshot(self.path) as snapshot:
+            clicks = snapshot.column("clicks")
+        self.assertIsNone(snapshot._mmap)
+        # Views handed out before closing stay readable
+        self.assertEqual(clicks[42], 42)
+
+        snapshot = FeatureSnapshot(self.path)
+        snapshot.close()
+        snapshot.close()
+
+    def test_merged_bundles_keep_timestamp_nulls(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        start = datetime(2023, 1, 1)
+
+        def bundle(name, users, feature):
+            path = os.path.join(self.tmp.name, f"{name}.parquet")
+            timestamps = [start + timedelta(hours=i) for i in range(len(users))]
+            pq.write_table(
+                pa.table(
+                    {"user_id": users, "timestamp": timestamps, "clicks": [1] * 2}
+                ),
+                path,
+            )
+            return FeatureBundle(
+                name=name,
+                source=FileSource(
+                    name=name,
+                    description="",
+                    timestamp_col="timestamp",
+                    uri=path,
+                    file_type=FileType.PARQUET,
+                ),
+                entity=Entity(key="user_id"),
+                features=[feature],
+            )
+
+        seen = bundle(
+            "seen",
+            ["u1", "u2"],
+            Feature(
+                name="last_seen",
+                expr=col("timestamp"),
+                dtype=Timestamp,
+                agg=Aggregation(method=AggregationType.LATEST),
+            ),
+        )
+        clicks = bundle(
+            "clicks",
+            ["u2", "u3"],
+            Feature(
+                name="clicks",
+                expr=col("clicks"),
+                dtype=Int64,
+                agg=Aggregation(method=AggregationType.SUM, window=timedelta(days=1)),
+            ),
+        )
+        with materialize_snapshot(
+            self.path, [seen, clicks], as_of=start + timedelta(hours=2)
+        ) as snapshot:
+            rows = snapshot.rows(["user_id:u1", "user_id:u2", "user_id:u3"])
+            np.testing.assert_array_equal(
+                snapshot.valid("last_seen")[rows], [True, True, False]
+            )
+            np.testing.assert_array_equal(
+                snapshot.column("last_seen")[rows[:2]],
+                np.array([start, start + timedelta(hours=1)], dtype="datetime64[us]"),
+            )
+            np.testing.assert_array_equal(
+                snapshot.valid("clicks")[rows], [False, True, True]
+            )
+
+    def test_rejects_duplicates_and_variable_width(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, ["a", "a"], {}, {})
+        with self.assertRaises(ValueError):
+            write_snapshot(
+                self.path,
+                ["a"],
+                {"name": np.array(["x"], dtype=object)},
+                {"name": String},
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()